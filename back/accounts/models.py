@@ -8,6 +8,13 @@ DEFAULT_AVATAR_CHOICES = [
     ('default3', '기본 프로필 3'),
 ]
 
+# 업로드한 이미지가 없을 때 default_avatar 선택지별 정적 파일 경로
+DEFAULT_AVATAR_URLS = {
+    'default1': '/static/avatars/default1.png',
+    'default2': '/static/avatars/default2.png',
+    'default3': '/static/avatars/default3.png',
+}
+
 class User(AbstractUser):
     # 이메일을 고유 필수 필드로 설정
     email          = models.EmailField(unique=True)
@@ -66,9 +73,4 @@ class User(AbstractUser):
         """
         if self.avatar:
             return self.avatar.url
-        choice_map = {
-            'default1': '/static/avatars/default1.png',
-            'default2': '/static/avatars/default2.png',
-            'default3': '/static/avatars/default3.png',
-        }
-        return choice_map.get(self.default_avatar, choice_map['default1'])
\ No newline at end of file
+        return DEFAULT_AVATAR_URLS.get(self.default_avatar, DEFAULT_AVATAR_URLS['default1'])
\ No newline at end of file
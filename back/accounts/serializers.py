@@ -4,7 +4,7 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
 from .models import DEFAULT_AVATAR_CHOICES
-from api.serializers import BookSerializer
+from api.services import shelves
 
 User = get_user_model()
 
@@ -14,8 +14,6 @@ class UserSerializer(serializers.ModelSerializer):
     occupation = serializers.CharField(read_only=True)
     gender = serializers.CharField(read_only=True)
     interests = serializers.CharField(read_only=True)
-    favorites  = BookSerializer(many=True, read_only=True)
-    read_books = BookSerializer(many=True, read_only=True)
 
     class Meta:
         model = User
@@ -23,7 +21,7 @@ class UserSerializer(serializers.ModelSerializer):
             'id', 'username', 'email', 'name',
             'nickname', 'phone', 'birthdate', 'address',
             'status_message', 'avatar_url', 'default_avatar',
-            'favorites', 'read_books', 'occupation', 'gender', 'interests'
+            'occupation', 'gender', 'interests'
         ]
         read_only_fields = ['username', 'email']
 
@@ -37,6 +35,17 @@ class UserSerializer(serializers.ModelSerializer):
         # 이미지가 없으면 빈 문자열 반환
         return ""
 
+    def to_representation(self, instance):
+        # 찜/읽음은 도서 전체가 아니라 ID 목록 + 개수 + shelf_version 으로만 내려준다.
+        # context 의 shelf_since 가 있으면 그 버전 이후 변경분(shelf_changes)만.
+        data = super().to_representation(instance)
+        since = self.context.get('shelf_since')
+        if since is None:
+            data.update(shelves.summary(instance.pk))
+        else:
+            data.update(shelves.changes(instance.pk, since))
+        return data
+
 class UserUpdateSerializer(serializers.ModelSerializer):
     # emotion_tags removed
     occupation = serializers.ChoiceField(
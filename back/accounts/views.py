@@ -7,7 +7,10 @@ from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
-from api.serializers import BookSerializer
+from api import fast_serializers
+from api.pagination import ShelfPagination
+from api.serializers import BookListSerializer, book_card_queryset
+from api.services import shelves
 
 from .serializers import UserSerializer, UserUpdateSerializer
 from api.models import Book
@@ -28,8 +31,8 @@ class AuthViewSet(viewsets.ViewSet):
     )
     def me_favorites(self, request):
         """Frontend expects: GET /api/auth/me/favorites -> list[Book]."""
-        books = request.user.favorites.all()
-        serializer = BookSerializer(books, many=True, context={'request': request})
+        books = book_card_queryset(request.user.favorites.all())
+        serializer = BookListSerializer(books, many=True, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(
@@ -165,11 +168,18 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get', 'patch'], url_path='me')
     def me(self, request):
         """
-        GET  /api/auth/users/me     → 현재 사용자 정보 반환  
+        GET  /api/auth/users/me     → 현재 사용자 정보 반환 (찜/읽음은 ID 목록 + 개수 + shelf_version)
+        GET  /api/auth/users/me?since=<shelf_version> → 그 버전 이후 찜/읽음 변경분(shelf_changes)만
         PATCH /api/auth/users/me    → 사용자 정보 업데이트
         """
         if request.method == 'GET':
-            serializer = UserSerializer(request.user, context={'request': request})
+            context = {'request': request}
+            since = request.query_params.get('since')
+            if since not in (None, ''):
+                if not since.isdigit():
+                    return Response({'error': 'since must be a shelf_version'}, status=status.HTTP_400_BAD_REQUEST)
+                context['shelf_since'] = int(since)
+            serializer = UserSerializer(request.user, context=context)
             return Response(serializer.data)
 
         # PATCH
@@ -207,10 +217,20 @@ class UserViewSet(viewsets.ModelViewSet):
         GET /api/auth/users/me/favorites → 찜한 도서 목록 반환
         """
         user = request.user
-        books = user.favorites.all()  # 유저가 찜한 도서 목록을 가져옵니다.
-        serialized_books = BookSerializer(books, many=True, context={'request': request})
+        books = book_card_queryset(user.favorites.all())  # 유저가 찜한 도서 목록을 가져옵니다.
+        serialized_books = BookListSerializer(books, many=True, context={'request': request})
         return Response(serialized_books.data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['get'], url_path=r'me/shelf/(?P<shelf>favorites|read_books)')
+    def shelf(self, request, shelf=None):
+        """
+        GET /api/auth/users/me/shelf/{favorites|read_books}?page=&page_size= → 최근 추가 순 도서 카드 페이지
+        """
+        entries = shelves.through(shelf).objects.filter(user_id=request.user.pk).order_by('-id')
+        paginator = ShelfPagination()
+        page = paginator.paginate_queryset(entries.values_list('book_id', flat=True), request, view=self)
+        return paginator.get_paginated_response(fast_serializers.cards_by_ids(page))
+
     @action(detail=False, methods=['post', 'delete'], url_path=r'me/read_books/(?P<book_pk>[^/.]+)')
     def read_books(self, request, book_pk=None):
         """
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Author, Book, Review
+from .models import Category, Author, Book, LLMCache, Review, UserRecommendation
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -22,3 +22,14 @@ class ReviewAdmin(admin.ModelAdmin):
     list_display  = ('user', 'book', 'created_at')
     search_fields = ('user__username', 'book__title')
 
+
+@admin.register(LLMCache)
+class LLMCacheAdmin(admin.ModelAdmin):
+    list_display  = ('kind', 'model', 'hits', 'created_at', 'last_used_at')
+    list_filter   = ('kind', 'model')
+
+
+@admin.register(UserRecommendation)
+class UserRecommendationAdmin(admin.ModelAdmin):
+    list_display  = ('user', 'basis', 'updated_at')
+    search_fields = ('user__username',)
@@ -0,0 +1,131 @@
+"""Async (ASGI) versions of the AI endpoints.
+
+Same query parameters and response bodies as `BookViewSet.ai_search` and
+`recommend_by_profile`, but written as plain Django async views: the model
+round trip — and, in semantic mode, the prompt's embedding request — is awaited
+on `AsyncOpenAI` (see `api.services.ai`, `embedding_cache.aget_or_embed`), so a
+request waiting on an upstream API holds no worker thread. ORM work runs through Django's async
+ORM or `sync_to_async` in short bursts before and after the call.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+
+from api.services import ai, embedding_cache, semantic_search
+from api.views import (
+    _ai_search_fallback_data,
+    _ai_search_terms_data,
+    _recommend_fallback_data,
+    _recommend_found_data,
+    _semantic_params,
+    _semantic_search_data,
+    _stored_recommend_data,
+)
+
+
+def _json(data, status_code=status.HTTP_200_OK, headers=None):
+    # Same renderer as the DRF views, so both variants return identical bytes.
+    return HttpResponse(JSONRenderer().render(data), status=status_code,
+                        content_type='application/json', headers=headers)
+
+
+async def _authenticate(request):
+    """DRF-equivalent auth: `Authorization: Token <key>`, else the session user."""
+    header = request.headers.get('Authorization', '')
+    parts = header.split()
+    if parts and parts[0].lower() == 'token':
+        if len(parts) != 2:
+            return None
+        token = await Token.objects.select_related('user').filter(key=parts[1]).afirst()
+        if token is None or not token.user.is_active:
+            return None
+        return token.user
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+async def _recommend_inputs(user):
+    """Async-ORM twin of `api.views._recommend_inputs`."""
+    fav_qs = user.favorites.all()
+    read_qs = user.read_books.all()
+    fav_rows = [row async for row in fav_qs.values_list('id', 'title')]
+    read_rows = [row async for row in read_qs.values_list('id', 'title')]
+    return {
+        'exclude_ids': {i for i, _ in fav_rows} | {i for i, _ in read_rows},
+        'fav_titles': [t for _, t in fav_rows][:10],
+        'read_titles': [t for _, t in read_rows][:20],
+        'profile': {
+            'occupation': getattr(user, 'occupation', '') or '',
+            'gender': getattr(user, 'gender', '') or '',
+            'interests': getattr(user, 'interests', '') or '',
+        },
+    }
+
+
+@require_GET
+async def ai_search(request):
+    """GET /api/books/ai-search/async/ — async twin of `BookViewSet.ai_search`."""
+    params = request.GET
+    prompt_in = str(params.get('prompt') or '').strip()
+    if not prompt_in:
+        return _json([])
+
+    nonce = params.get('nonce')
+
+    mode = params.get('mode') or getattr(settings, 'AI_SEARCH_DEFAULT_MODE', 'semantic')
+    if mode == 'semantic' and semantic_search.available() and semantic_search.index_ready():
+        try:
+            _semantic_params(params)
+        except ValidationError as exc:
+            return _json(exc.detail, status.HTTP_400_BAD_REQUEST)
+        try:
+            vector = await embedding_cache.aget_or_embed(prompt_in)
+        except Exception:
+            vector = None  # Embedding API down / misconfigured: keyword path, as the sync view
+        if vector is not None:
+            # only the DB / vector-index lookup runs in a thread
+            data = await sync_to_async(_semantic_search_data)(params, prompt_in, nonce, vector=vector)
+            if data is not None:
+                return _json(data)
+
+    config = ai.openai_config()
+    if not config.api_key:
+        return _json(await sync_to_async(_ai_search_fallback_data)(prompt_in, nonce))
+
+    terms = await ai.asearch_terms(config, prompt_in)
+    if not terms:
+        return _json(await sync_to_async(_ai_search_fallback_data)(prompt_in, nonce))
+    return _json(await sync_to_async(_ai_search_terms_data)(terms, prompt_in, nonce))
+
+
+@require_GET
+async def recommend_by_profile(request):
+    """GET /api/recommendations/me/async/ — async twin of `recommend_by_profile`."""
+    user = await _authenticate(request)
+    if user is None:
+        return _json({'detail': 'Authentication credentials were not provided.'},
+                     status.HTTP_401_UNAUTHORIZED, headers={'WWW-Authenticate': 'Token'})
+
+    nonce = request.GET.get('nonce')
+    stored = await sync_to_async(_stored_recommend_data)(request.GET, user.id, nonce)
+    if stored is not None:
+        return _json(stored)
+
+    inputs = await _recommend_inputs(user)
+
+    config = ai.openai_config()
+    if not config.api_key:
+        return _json(await sync_to_async(_recommend_fallback_data)(user.id, inputs['exclude_ids'], nonce))
+
+    candidates = await ai.arecommend_titles(
+        config, inputs['profile'], inputs['fav_titles'], inputs['read_titles'], nonce,
+    )
+    return _json(await sync_to_async(_recommend_found_data)(
+        candidates, user.id, inputs['exclude_ids'], nonce,
+    ))
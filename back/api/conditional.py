@@ -0,0 +1,54 @@
+"""ETag / Last-Modified for read-only endpoints whose version is cheap to look up.
+
+The caller computes the validators first (one cache read or one aggregate
+query) and passes a `build` callable for the body; a matching
+`If-None-Match` / `If-Modified-Since` gets its 304 before `build` runs.
+Responses carry `Cache-Control: no-cache` so browsers keep them and
+revalidate on every revisit instead of re-downloading.
+"""
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+def etag(*parts) -> str:
+    """Strong entity tag from the version parts (datetimes to the microsecond)."""
+    return '"' + '-'.join(p.strftime('%Y%m%d%H%M%S%f') if hasattr(p, 'strftime') else str(p)
+                          for p in parts) + '"'
+
+
+def _validators(response, tag, last_modified):
+    response['ETag'] = tag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def _seconds(last_modified):
+    if last_modified is not None and hasattr(last_modified, 'timestamp'):
+        last_modified = last_modified.timestamp()
+    if last_modified is not None:
+        last_modified = int(last_modified)  # HTTP dates have whole seconds
+    return last_modified
+
+
+def not_modified(request, tag: str, last_modified):
+    """The 304 response when the client already has `tag` / `last_modified`, else None."""
+    last_modified = _seconds(last_modified)
+    response = get_conditional_response(request, etag=tag, last_modified=last_modified)
+    return None if response is None else _validators(response, tag, last_modified)
+
+
+def validated(data, tag: str, last_modified) -> Response:
+    """`Response(data)` carrying `tag` (and `last_modified` unless None)."""
+    return _validators(Response(data), tag, _seconds(last_modified))
+
+
+def respond(request, tag: str, last_modified, build) -> Response:
+    """304 when the client already has `tag`, else `Response(build())`; both with validators.
+
+    `last_modified` is a datetime or POSIX timestamp (or None).
+    """
+    return not_modified(request, tag, last_modified) or validated(build(), tag, last_modified)
@@ -0,0 +1,150 @@
+"""Read-only fast path for the hot book/review serializers.
+
+`BookListSerializer`, `BookSerializer`, `SimilarBookSerializer` and
+`ReviewSerializer` dispatch every field through DRF's field machinery on model
+instances. The functions here read `values()` rows (only the columns the
+response needs, joins included) and build the same dicts directly: same keys,
+same order, same values, so the rendered JSON is byte-identical
+(`api.tests.FastSerializerTest`, `benchmark_serializers`). Cover URLs are
+stored upgraded (`api.models.upgrade_cover_url`), so they are copied as is.
+
+The DRF serializers stay the reference (writes, browsable API); a field added
+there has to be added here too.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from rest_framework import serializers
+
+from accounts.models import DEFAULT_AVATAR_URLS
+
+CARD_VALUES = (
+    'id', 'isbn', 'title', 'publisher', 'cover_url', 'pub_date',
+    'category_id', 'category__name', 'genre_id', 'genre__name', 'author_id', 'author__name',
+    'global_recommend_count', 'review_count',
+)
+SIMILAR_VALUES = ('id', 'title', 'cover_url', 'author_id', 'author__name')
+REVIEW_VALUES = (
+    'id', 'book_id', 'book__cover_url', 'user__email', 'user_id', 'user__nickname',
+    'user__avatar', 'user__default_avatar', 'content', 'created_at',
+)
+
+_datetime = serializers.DateTimeField()
+
+
+def _date(value):
+    return value.isoformat() if value else None
+
+
+def _related(data, field, pk, name) -> None:
+    # DRF skips `<field>_name` (source='<field>.name') when the FK is null
+    if pk is None:
+        data[field] = None
+    else:
+        data[field] = {'id': pk, 'name': name}
+        data[f'{field}_name'] = name
+
+
+def card_values(queryset):
+    """`values()` rows shaped for `cards()` (joins + review count, no model instances)."""
+    return queryset.annotate(review_count=Count('review', distinct=True)).values(*CARD_VALUES)
+
+
+def card(row) -> dict:
+    data = {
+        'id': row['id'],
+        'isbn': row['isbn'],
+        'title': row['title'],
+        'publisher': row['publisher'],
+        'cover_url': row['cover_url'],
+        'pub_date': _date(row['pub_date']),
+    }
+    _related(data, 'category', row['category_id'], row['category__name'])
+    _related(data, 'genre', row['genre_id'], row['genre__name'])
+    _related(data, 'author', row['author_id'], row['author__name'])
+    data['global_recommend_count'] = row['global_recommend_count']
+    data['review_count'] = row['review_count']
+    return data
+
+
+def cards(rows) -> list[dict]:
+    """`BookListSerializer(many=True).data` for `card_values()` rows."""
+    return [card(row) for row in rows]
+
+
+def cards_by_ids(ids, queryset=None) -> list[dict]:
+    """Cards for `ids` in that order (missing ids dropped)."""
+    from api.models import Book
+
+    queryset = Book.objects.all() if queryset is None else queryset
+    rows = {row['id']: row for row in card_values(queryset.filter(id__in=ids))}
+    return [card(rows[i]) for i in ids if i in rows]
+
+
+def _similar(pk, title, cover_url, author_id, author_name) -> dict:
+    data = {'id': pk, 'title': title, 'cover_url': cover_url}
+    if author_id is not None:
+        data['author_name'] = author_name
+    return data
+
+
+def similar(queryset) -> list[dict]:
+    """`SimilarBookSerializer(many=True).data`."""
+    return [_similar(*row) for row in queryset.values_list(*SIMILAR_VALUES)]
+
+
+def similar_by_ids(ids) -> list[dict]:
+    from api.models import Book
+
+    rows = {row[0]: row for row in Book.objects.filter(id__in=ids).values_list(*SIMILAR_VALUES)}
+    return [_similar(*rows[i]) for i in ids if i in rows]
+
+
+def reviews(queryset, request=None) -> list[dict]:
+    """`ReviewSerializer(many=True).data` (avatar URLs absolute when `request` is given)."""
+    storage = get_user_model()._meta.get_field('avatar').storage
+    data = []
+    for (pk, book_id, cover_url, email, user_id, nickname,
+         avatar, default_avatar, content, created_at) in queryset.values_list(*REVIEW_VALUES):
+        avatar_url = (storage.url(avatar) if avatar
+                      else DEFAULT_AVATAR_URLS.get(default_avatar, DEFAULT_AVATAR_URLS['default1']))
+        data.append({
+            'id': pk,
+            'book_id': book_id,
+            'book_cover_url': cover_url,
+            'book': book_id,
+            'user': email,  # str(user): USERNAME_FIELD
+            'user_id': user_id,
+            'user_nickname': nickname,
+            'user_avatar': request.build_absolute_uri(avatar_url) if request else avatar_url,
+            'content': content,
+            'created_at': _datetime.to_representation(created_at),
+        })
+    return data
+
+
+def book_detail(book_id, request=None) -> dict | None:
+    """`BookSerializer(book).data`, or None when the book does not exist."""
+    from api.models import Book, Review
+
+    row = Book.objects.filter(id=book_id).values(*CARD_VALUES[:-1], 'description').first()
+    if row is None:
+        return None
+    review_list = reviews(Review.objects.filter(book_id=row['id']).order_by('-created_at'), request)
+    data = {
+        'id': row['id'],
+        'isbn': row['isbn'],
+        'title': row['title'],
+        'publisher': row['publisher'],
+        'cover_url': row['cover_url'],
+        'description': row['description'],
+        'pub_date': _date(row['pub_date']),
+    }
+    _related(data, 'category', row['category_id'], row['category__name'])
+    _related(data, 'genre', row['genre_id'], row['genre__name'])
+    _related(data, 'author', row['author_id'], row['author__name'])
+    data['global_recommend_count'] = row['global_recommend_count']
+    data['similar_books'] = similar(Book.objects.filter(recommended_for=row['id']))
+    data['reviews'] = review_list
+    data['review_count'] = len(review_list)
+    return data
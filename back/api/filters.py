@@ -0,0 +1,22 @@
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from api.services import search_index
+
+
+class BookSearchFilter(filters.SearchFilter):
+    """`?search=` over the FTS5 index when available, `icontains` otherwise.
+
+    Same semantics as SearchFilter: every search term must appear (as a
+    substring) in one of the indexed columns `fts_columns`.
+    """
+    fts_columns = ('title', 'author')
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms or not search_index.available():
+            return super().filter_queryset(request, queryset, view)
+        matching = search_index.matching_ids_sql([' '.join(terms)], columns=self.fts_columns)
+        if matching is None:
+            return super().filter_queryset(request, queryset, view)
+        return queryset.filter(id__in=RawSQL(*matching))
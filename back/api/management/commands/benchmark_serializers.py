@@ -0,0 +1,76 @@
+# api/management/commands/benchmark_serializers.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from api import fast_serializers
+from api.models import Book
+from api.renderers import FastJSONRenderer
+from api.serializers import BookListSerializer, BookSerializer, SimilarBookSerializer, book_card_queryset
+
+
+class Command(BaseCommand):
+    help = ('도서 직렬화 속도 비교: DRF serializer + JSONRenderer vs values() 빠른 경로 + orjson. '
+            '두 경로의 JSON 바이트가 같은지도 확인합니다 (DB의 도서를 그대로 사용).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=1000, help='카드 목록에 쓸 도서 수 (기본: 1000)')
+        parser.add_argument('--details', type=int, default=50, help='상세 직렬화에 쓸 도서 수 (기본: 50)')
+        parser.add_argument('--repeat', type=int, default=5, help='반복 횟수, 최솟값을 보고 (기본: 5)')
+
+    def _best(self, fn, repeat):
+        best, out = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            out = fn()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, out
+
+    def _report(self, label, n, slow, fast):
+        (slow_s, slow_bytes), (fast_s, fast_bytes) = slow, fast
+        if slow_bytes != fast_bytes:
+            raise CommandError(f'{label}: 출력이 다릅니다 ({len(slow_bytes)} vs {len(fast_bytes)} bytes)')
+        self.stdout.write(
+            f'{label:<8} n={n:<5} drf={slow_s * 1000:8.1f}ms  fast={fast_s * 1000:8.1f}ms  '
+            f'x{slow_s / fast_s:4.1f}  ({len(fast_bytes)} bytes, identical)'
+        )
+
+    def handle(self, *args, **opts):
+        repeat = max(1, opts['repeat'])
+        ids = list(Book.objects.order_by('-global_recommend_count', 'id').values_list('id', flat=True)[:opts['books']])
+        if not ids:
+            raise CommandError('도서가 없습니다. update_aladin_books 로 먼저 채우세요.')
+        drf, fast = JSONRenderer(), FastJSONRenderer()
+        request = RequestFactory().get('/api/books/')
+
+        # 1) 카드 목록 (GET /api/books/, 홈 컬렉션, 추천): 쿼리 + 직렬화 + 렌더링
+        qs = Book.objects.filter(id__in=ids).order_by('-global_recommend_count', 'id')
+        self._report('cards', len(ids), self._best(
+            lambda: drf.render(BookListSerializer(book_card_queryset(qs), many=True).data), repeat,
+        ), self._best(
+            lambda: fast.render(fast_serializers.cards(fast_serializers.card_values(qs))), repeat,
+        ))
+
+        # 2) 유사 도서 카드
+        self._report('similar', len(ids), self._best(
+            lambda: drf.render(SimilarBookSerializer(qs.select_related('author'), many=True).data), repeat,
+        ), self._best(
+            lambda: fast.render(fast_serializers.similar(qs)), repeat,
+        ))
+
+        # 3) 상세 (리뷰 + 유사 도서 포함)
+        detail_ids = ids[:max(1, opts['details'])]
+        detail_qs = Book.objects.select_related('author', 'category', 'genre').prefetch_related('similar_books')
+
+        def _drf_details():
+            books = detail_qs.in_bulk(detail_ids)
+            return b''.join(drf.render(BookSerializer(books[i], context={'request': request}).data)
+                            for i in detail_ids)
+
+        self._report('detail', len(detail_ids), self._best(_drf_details, repeat), self._best(
+            lambda: b''.join(fast.render(fast_serializers.book_detail(i, request)) for i in detail_ids), repeat,
+        ))
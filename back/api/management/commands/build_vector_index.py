@@ -0,0 +1,65 @@
+# api/management/commands/build_vector_index.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services.vector_index import (
+    VectorIndex,
+    build_index_from_db,
+    recall_at_k,
+)
+
+
+class Command(BaseCommand):
+    help = 'Book.embedding으로 mmap 기반 IVF 벡터 인덱스를 빌드하고 current로 원자적으로 교체합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--nlist',
+            type=int,
+            default=0,
+            help='IVF 리스트(클러스터) 수. 0이면 도서 수에 맞춰 자동 결정(1024권 미만은 정확 검색). '
+                 '도서 수와 학습 표본 상한(32768)을 넘으면 그 값으로 줄임.',
+        )
+        parser.add_argument(
+            '--nprobe',
+            type=int,
+            default=0,
+            help='검색 시 탐색할 리스트 수 기본값. 0이면 nlist의 10%%.',
+        )
+        parser.add_argument(
+            '--recall-sample',
+            type=int,
+            default=200,
+            help='정확 코사인 검색 대비 recall@k 측정에 쓸 질의 수 (0이면 측정 생략).',
+        )
+        parser.add_argument(
+            '--k',
+            type=int,
+            default=10,
+            help='recall 측정 시 k (기본: 10)',
+        )
+
+    def handle(self, *args, **opts):
+        started = time.monotonic()
+        try:
+            path = build_index_from_db(
+                nlist=opts.get('nlist') or None,
+                nprobe=opts.get('nprobe') or None,
+            )
+        except ValueError as e:
+            raise CommandError(f'인덱스 빌드 실패: {e}')
+
+        index = VectorIndex(path)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ 인덱스 빌드 완료: {path.name} (count={len(index)}, dim={index.dim}, '
+            f'nlist={index.nlist}, nprobe={index.nprobe}, {time.monotonic() - started:.1f}s)'
+        ))
+
+        sample = int(opts.get('recall_sample') or 0)
+        if sample > 0:
+            k = max(1, int(opts.get('k') or 10))
+            recall = recall_at_k(index, k=k, sample=sample)
+            style = self.style.SUCCESS if recall >= 0.9 else self.style.WARNING
+            self.stdout.write(style(f'recall@{k} (vs exact cosine, n={min(sample, len(index))}): {recall:.3f}'))
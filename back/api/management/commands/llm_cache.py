@@ -0,0 +1,31 @@
+# backend/api/management/commands/llm_cache.py
+
+from django.core.management.base import BaseCommand
+
+from api.services import llm_cache
+
+
+class Command(BaseCommand):
+    help = 'LLM 응답 캐시 상태 확인 및 정리 (ai_search / recommend / author_info)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--purge-expired', action='store_true', help='TTL이 지난 항목 삭제')
+        parser.add_argument('--clear', action='store_true', help='모든 항목 삭제')
+        parser.add_argument('--reset-stats', action='store_true', help='적중/미스 누적 횟수 초기화')
+
+    def handle(self, *args, **opts):
+        if opts.get('clear'):
+            self.stdout.write(f"삭제: {llm_cache.clear()}건")
+        elif opts.get('purge_expired'):
+            self.stdout.write(f"만료 항목 삭제: {llm_cache.purge_expired()}건")
+        if opts.get('reset_stats'):
+            llm_cache.reset_counters()
+
+        info = llm_cache.summary()
+        kinds = ', '.join(f"{k}={n}" for k, n in info['by_kind'].items()) or '-'
+        self.stdout.write(f"size={info['size']} ({kinds}), stored_hits={info['stored_hits']}")
+        self.stdout.write(
+            f"lookups: hits={info['hits']}, misses={info['misses']}, hit_rate={info['hit_rate']:.1%}"
+        )
+        for kind, s in info['lookups_by_kind'].items():
+            self.stdout.write(f"  {kind}: hits={s.hits}, misses={s.misses}, hit_rate={s.hit_rate:.1%}")
@@ -4,12 +4,12 @@ import json
 import re
 from datetime import datetime
 from django.core.management.base import BaseCommand
-from api.models import Book, Author, Category, Genre
-from api.services.aladin import (
-    fetch_best_sellers_all,
-    fetch_new_items_all,
-    fetch_editor_picks_all,
-)
+from django.db import transaction
+from django.utils import timezone
+from api.models import Book, Author, Category, Genre, upgrade_cover_url
+from api.services.aladin import iter_source_pages
+from api.services.aladin_cache import AladinCache
+from api.services import response_cache, search_index
 
 # 7개 장르 매핑
 GENRE_MAP = {
@@ -76,6 +76,53 @@ def looks_weird_item(title: str, author: str, isbn: str) -> bool:
         return True
     return False
 
+def parse_item(item: dict) -> dict | None:
+    """Normalize one Aladin item into Book fields; None if it looks bogus."""
+    # — 제목 정리
+    raw_title = item.get("title", "").strip()
+    title = re.split(r"\s*-\s*", raw_title, 1)[0]
+    title = re.sub(r"\s*\(.*?\)$", "", title).strip() or raw_title
+
+    # — ISBN 정규화 및 이상치 스킵
+    isbn = normalize_isbn(item)
+    name = (item.get("author", "") or "").strip()
+    if looks_weird_item(title=title, author=name, isbn=isbn):
+        return None
+
+    # — 출간일 파싱
+    pd_raw = item.get("pubDate", "") or ""
+    pd_digits = "".join(ch for ch in pd_raw if ch.isdigit())
+    pub_date = None
+    if len(pd_digits) >= 8:
+        try:
+            pub_date = datetime.strptime(pd_digits[:8], "%Y%m%d").date()
+        except ValueError:
+            pub_date = None
+
+    # — 설명(description) 기본 문구 처리
+    desc = (item.get("description") or "").strip()
+    if not desc:
+        desc = "아직 설명이 등록되지 않은 도서입니다."
+
+    return {
+        "isbn":        isbn,
+        "title":       title,
+        "author_name": name,
+        "publisher":   item.get("publisher", "").strip(),
+        "cover_url":   upgrade_cover_url(item.get("cover", "").strip()),
+        "description": desc,
+        "pub_date":    pub_date,
+        "genre_name":  classify_genre(item.get("categoryName", "")),
+    }
+
+
+# Fields overwritten on re-sync. category/global_recommend_count are kept as-is.
+BOOK_SYNC_FIELDS = ["title", "author", "publisher", "cover_url", "description", "pub_date", "genre"]
+
+# Rows per upsert statement / IN-list lookup.
+BULK_CHUNK = 500
+
+
 class Command(BaseCommand):
     help = 'Aladin API에서 도서 동기화'
 
@@ -93,118 +140,244 @@ class Command(BaseCommand):
             help='페이지당 가져올 개수 (알라딘 MaxResults 상한 50). 기본: 50',
         )
         parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='작가/장르를 메모리 맵으로 일괄 해석하고 isbn 기준 bulk upsert로 저장 '
+                 '(결과는 기본 모드와 동일, 대량 동기화용).',
+        )
+        parser.add_argument(
+            '--parallel',
+            type=int,
+            default=None,
+            help='동시에 요청할 알라딘 페이지 수 (기본: settings.ALADIN_MAX_PARALLEL). '
+                 '페이지는 도착하는 대로 소스/페이지 순서를 지켜 저장 단계로 넘어갑니다.',
+        )
+        cache_mode = parser.add_mutually_exclusive_group()
+        cache_mode.add_argument(
+            '--replay',
+            action='store_true',
+            help='네트워크 없이 녹화된(캐시된) 알라딘 응답만 사용. 녹화되지 않은 페이지가 있으면 실패합니다.',
+        )
+        cache_mode.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='응답 캐시를 읽지도 쓰지도 않고 항상 알라딘 API를 호출합니다.',
+        )
+        parser.add_argument(
+            '--cache-dir',
+            default=None,
+            help='응답 캐시/녹화 디렉터리 (기본: settings.ALADIN_CACHE_DIR)',
         )
 
     def handle(self, *args, **opts):
         total = int(opts.get('total') or 50)
         per_page = int(opts.get('per_page') or 50)
+        bulk = bool(opts.get('bulk'))
+        parallel = opts.get('parallel')
+        mode = 'replay' if opts.get('replay') else 'off' if opts.get('no_cache') else None
+        cache = AladinCache(directory=opts.get('cache_dir'), mode=mode)
 
         # 1) 장르 테이블 기본값 생성
         for g in GENRE_MAP.keys():
             Genre.objects.get_or_create(name=g)
 
-        # 2) 동기화 대상 소스
+        # 2) 동기화 대상 소스 (QueryType → 카테고리 이름)
         sources = [
-            ("베스트셀러",  fetch_best_sellers_all),
-            ("신간",        fetch_new_items_all),
-            ("블로거 추천", fetch_editor_picks_all),
+            ("Bestseller", "베스트셀러"),
+            ("ItemNewAll", "신간"),
+            ("BlogBest",   "블로거 추천"),
         ]
+        labels = dict(sources)
+        cats = {}
+        for query_type, label in sources:
+            cats[query_type], _ = Category.objects.get_or_create(name=label)
 
         # Cross-source de-dup so the first processed source wins category.
         global_seen_isbns = set()
+        progress = {qt: {"seen": set(), "idx": 0, "upserted": 0, "skipped": 0} for qt, _ in sources}
+        # --bulk: 페이지가 아니라 BULK_CHUNK 단위로 모아서 저장 (쿼리 수가 페이지 수에 비례하지 않도록)
+        buffered = []
+
+        def _finish(qt):
+            if buffered:
+                self._upsert_bulk(buffered, cats[qt])
+                buffered.clear()
+            st = progress[qt]
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ '{labels[qt]}' 완료 (upserted={st['upserted']}, skipped={st['skipped']})"
+            ))
+
+        # 3) 페이지는 동시에 받아오고, 도착하는 대로 (소스, 페이지) 순서대로 저장
+        current = None
+        pages = iter_source_pages([qt for qt, _ in sources], total=total, per_page=per_page,
+                                  parallelism=parallel, cache=cache)
+        try:
+            for query_type, items in pages:
+                if query_type != current:
+                    if current is not None:
+                        _finish(current)
+                    current = query_type
+                    self.stdout.write(f"→ Sync '{labels[query_type]}' (최대 {total}, per_page={per_page})…")
+
+                cat = cats[query_type]
+                # Per-source de-dup (API quirks) + cross-source category precedence
+                st = progress[query_type]
+                for item in items:
+                    st["idx"] += 1
+                    row = parse_item(item)
+                    if row is None:
+                        st["skipped"] += 1
+                        continue
+                    isbn = row["isbn"]
+                    if isbn in st["seen"]:
+                        st["skipped"] += 1
+                        continue
+                    st["seen"].add(isbn)
+
+                    # Category precedence: if already seen in earlier source, skip.
+                    if isbn in global_seen_isbns:
+                        st["skipped"] += 1
+                        continue
+                    global_seen_isbns.add(isbn)
+
+                    if not bulk:
+                        self.stdout.write(f"[{st['idx']}/{total}] {row['title']}")
+                        self._upsert_one(row, cat)
+                    else:
+                        buffered.append(row)
+                    st["upserted"] += 1
+
+                if len(buffered) >= BULK_CHUNK:
+                    self._upsert_bulk(buffered, cat)
+                    buffered.clear()
+
+            if current is not None:
+                _finish(current)
+        except Exception:
+            # 이미 저장된 페이지는 그대로 남으므로 어디까지 반영됐는지 알림 (버퍼에만 있던 행은 저장 안 됨)
+            if current is not None:
+                st = progress[current]
+                self.stderr.write(self.style.ERROR(
+                    f"✗ '{labels[current]}' 중단 (upserted={st['upserted'] - len(buffered)}, skipped={st['skipped']})"
+                ))
+            raise
+        finally:
+            # bulk 저장은 모델 시그널을 거치지 않으므로 (일부만 저장됐더라도) 홈 화면 응답 캐시를 직접 무효화
+            response_cache.bump_catalog_version()
+
+            c = cache.counters
+            self.stdout.write(
+                f"Aladin cache[{cache.mode}]: hits={c.hits}, revalidated={c.revalidated}, fetched={c.fetched}"
+            )
+
+    def _upsert_one(self, row: dict, cat: Category) -> Book:
+        # — 작가 처리 (Author 모델은 name만 저장합니다.)
+        author, _ = Author.objects.get_or_create(name=row["author_name"])
+        genre, _ = Genre.objects.get_or_create(name=row["genre_name"])
+
+        # — Book upsert
+        defaults = {
+            "title":                  row["title"],
+            "author":                 author,
+            "publisher":              row["publisher"],
+            "cover_url":              row["cover_url"],
+            "description":            row["description"],
+            "pub_date":               row["pub_date"],
+            "genre":                  genre,
+        }
+
+        book, created_book = Book.objects.get_or_create(
+            isbn=row["isbn"],
+            defaults={
+                **defaults,
+                "category": cat,
+                "global_recommend_count": 0,
+            },
+        )
 
-        for label, fn in sources:
-            cat, _ = Category.objects.get_or_create(name=label)
-            self.stdout.write(f"→ Sync '{label}' (최대 {total}, per_page={per_page})…")
-            items = fn(total=total, per_page=per_page)
-
-            # Per-source de-dup (API quirks) + cross-source category precedence
-            seen_isbns = set()
-
-            skipped = 0
-            upserted = 0
-
-            for idx, item in enumerate(items, start=1):
-                # — 제목 정리
-                raw_title = item.get("title", "").strip()
-                title = re.split(r"\s*-\s*", raw_title, 1)[0]
-                title = re.sub(r"\s*\(.*?\)$", "", title).strip() or raw_title
-
-                # — ISBN 정규화 및 이상치/중복 스킵
-                isbn = normalize_isbn(item)
-                name = (item.get("author", "") or "").strip()
-                if looks_weird_item(title=title, author=name, isbn=isbn):
-                    skipped += 1
-                    continue
-                if isbn in seen_isbns:
-                    skipped += 1
-                    continue
-                seen_isbns.add(isbn)
-
-                # Category precedence: if already seen in earlier source, skip.
-                if isbn in global_seen_isbns:
-                    skipped += 1
-                    continue
-                global_seen_isbns.add(isbn)
-
-                self.stdout.write(f"[{idx}/{len(items)}] {title}")
-
-                # — 출간일 파싱
-                pd_raw = item.get("pubDate", "") or ""
-                pd_digits = "".join(ch for ch in pd_raw if ch.isdigit())
-                pub_date = None
-                if len(pd_digits) >= 8:
-                    try:
-                        pub_date = datetime.strptime(pd_digits[:8], "%Y%m%d").date()
-                    except ValueError:
-                        pub_date = None
-
-                # — 작가 처리
-                author, created = Author.objects.get_or_create(name=name)
-
-                # Author 모델은 name만 저장합니다.
-                # (작가 소개/이미지/대표작은 저장하지 않음)
-
-                # — 장르 분류
-                raw_catname = item.get("categoryName", "")
-                gen_name = classify_genre(raw_catname)
-                genre, _ = Genre.objects.get_or_create(name=gen_name)
-
-                # — 설명(description) 기본 문구 처리
-                desc = (item.get("description") or "").strip()
-                if not desc:
-                    desc = "아직 설명이 등록되지 않은 도서입니다."
-
-                # — Book upsert
-                defaults = {
-                    "title":                  title,
-                    "author":                 author,
-                    "publisher":              item.get("publisher", "").strip(),
-                    "cover_url":              item.get("cover", "").strip(),
-                    "description":            desc,
-                    "pub_date":               pub_date,
-                    "genre":                  genre,
+        if not created_book:
+            # Update basic fields, but do NOT override existing category.
+            for k, v in defaults.items():
+                setattr(book, k, v)
+            if book.category_id is None:
+                book.category = cat
+            if book.genre_id is None:
+                book.genre = genre
+            book.save()
+        return book
+
+    def _upsert_bulk(self, rows: list[dict], cat: Category) -> None:
+        """Same result as `_upsert_one` per row, in a handful of statements per chunk."""
+        if not rows:
+            return
+
+        # — 작가: 한 번에 조회, 없는 이름만 등장 순서대로 생성
+        names = list(dict.fromkeys(r["author_name"] for r in rows))
+        authors = self._name_map(Author, names)
+        missing = [n for n in names if n not in authors]
+        if missing:
+            Author.objects.bulk_create([Author(name=n) for n in missing], ignore_conflicts=True)
+            authors.update(self._name_map(Author, missing))
+
+        # — 장르: 기본 7개 + 분류 결과 (대부분 이미 존재)
+        genres = dict(Genre.objects.values_list("name", "id"))
+        for gname in dict.fromkeys(r["genre_name"] for r in rows):
+            if gname not in genres:
+                genres[gname] = Genre.objects.get_or_create(name=gname)[0].id
+
+        sync_columns = [f + "_id" if f in ("author", "genre") else f for f in BOOK_SYNC_FIELDS]
+
+        def synced(r):
+            values = {"author": authors[r["author_name"]], "genre": genres[r["genre_name"]]}
+            return tuple(values[f] if f in values else r[f] for f in BOOK_SYNC_FIELDS)
+
+        with transaction.atomic():
+            for start in range(0, len(rows), BULK_CHUNK):
+                chunk = rows[start:start + BULK_CHUNK]
+                # 기존 행과 비교해 동기화 필드가 바뀐 행만 다시 쓰고 updated_at(ETag)을 올린다
+                incoming = {r["isbn"]: synced(r) for r in chunk}
+                existing = {
+                    isbn: (pk, tuple(values))
+                    for isbn, pk, *values in Book.objects.filter(isbn__in=list(incoming))
+                                                        .values_list("isbn", "id", *sync_columns)
                 }
-
-                book, created_book = Book.objects.get_or_create(
-                    isbn=isbn,
-                    defaults={
-                        **defaults,
-                        "category": cat,
-                        "global_recommend_count": 0,
-                    },
+                changed_ids = [existing[i][0] for i, v in incoming.items() if i in existing and existing[i][1] != v]
+                write = {i for i, v in incoming.items() if i not in existing or existing[i][1] != v}
+                chunk = [r for r in chunk if r["isbn"] in write]
+                Book.objects.bulk_create(
+                    [
+                        Book(
+                            isbn=r["isbn"],
+                            title=r["title"],
+                            author_id=authors[r["author_name"]],
+                            publisher=r["publisher"],
+                            cover_url=r["cover_url"],
+                            description=r["description"],
+                            pub_date=r["pub_date"],
+                            genre_id=genres[r["genre_name"]],
+                            category=cat,
+                            global_recommend_count=0,
+                        )
+                        for r in chunk
+                    ],
+                    update_conflicts=True,
+                    unique_fields=["isbn"],
+                    update_fields=BOOK_SYNC_FIELDS,
+                )
+                now = timezone.now()
+                Book.objects.filter(id__in=changed_ids).update(updated_at=now)
+                # Existing rows keep their category unless they had none.
+                Book.objects.filter(
+                    isbn__in=list(incoming), category__isnull=True,
+                ).update(category=cat, updated_at=now)
+                # bulk upsert는 시그널을 타지 않으므로 검색 인덱스를 직접 갱신 (새 행·바뀐 행만)
+                search_index.index_books(
+                    Book.objects.filter(isbn__in=list(write)).values_list("id", flat=True)
                 )
 
-                if not created_book:
-                    # Update basic fields, but do NOT override existing category.
-                    for k, v in defaults.items():
-                        setattr(book, k, v)
-                    if book.category_id is None:
-                        book.category = cat
-                    if book.genre_id is None:
-                        book.genre = genre
-                    book.save()
-
-                upserted += 1
-
-            self.stdout.write(self.style.SUCCESS(f"✓ '{label}' 완료 (upserted={upserted}, skipped={skipped})"))
+    @staticmethod
+    def _name_map(model, names: list[str]) -> dict[str, int]:
+        found: dict[str, int] = {}
+        for start in range(0, len(names), BULK_CHUNK):
+            found.update(model.objects.filter(name__in=names[start:start + BULK_CHUNK]).values_list("name", "id"))
+        return found
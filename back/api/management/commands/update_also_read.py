@@ -0,0 +1,56 @@
+# api/management/commands/update_also_read.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services import co_reading
+
+
+class Command(BaseCommand):
+    help = '찜/읽음 기록으로 도서 간 공동 독자 유사도(item-item CF)를 계산해 도서별 상위 k권을 AlsoRead에 저장합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='마지막 실행 이후 찜/읽음이 바뀐 도서(AlsoReadDirty)와 영향받는 도서만 다시 계산',
+        )
+        parser.add_argument(
+            '--k',
+            type=int,
+            default=0,
+            help='도서별로 저장할 이웃 수. 0이면 ALSO_READ_TOP_K',
+        )
+        parser.add_argument(
+            '--min-common',
+            type=int,
+            default=0,
+            help='이웃으로 인정할 최소 공동 독자 수. 0이면 ALSO_READ_MIN_COMMON',
+        )
+        parser.add_argument(
+            '--block-size',
+            type=int,
+            default=1024,
+            help='한 번에 공동 독자 수를 계산할 도서(행) 수 — 메모리 상한을 정함 (기본: 1024)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=co_reading.EDGE_CHUNK,
+            help=f'through 테이블을 읽을 때 한 번에 가져올 행 수 (기본: {co_reading.EDGE_CHUNK})',
+        )
+
+    def handle(self, *args, **opts):
+        started = time.monotonic()
+        run = co_reading.update_dirty if opts['incremental'] else co_reading.rebuild
+        stats = run(
+            k=opts.get('k') or None,
+            min_common=opts.get('min_common') or None,
+            block_size=max(1, opts['block_size']),
+            chunk_size=max(1, opts['chunk_size']),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ also-read 갱신: edges={stats.edges}, users={stats.users}, books={stats.books}, '
+            f'rescored={stats.rows}, links={stats.links} ({time.monotonic() - started:.1f}s)'
+        ))
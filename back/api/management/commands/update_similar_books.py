@@ -1,12 +1,18 @@
 # api/management/commands/update_similar_books.py
 
 import os
+import tempfile
 import numpy as np
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
 from api.models import Book
-from api.utils import get_upstage_embedding
+from api.services import book_versions
+from api.services.embedding_batcher import EmbeddingStats, embed_books, iter_books_needing_embedding
+from api.services.embedding_cache import CacheStats
+from api.services.similarity import iter_topk
+from api.services.vector_index import stage_vectors
 
 
 class Command(BaseCommand):
@@ -22,7 +28,8 @@ class Command(BaseCommand):
         parser.add_argument(
             '--create-embeddings',
             action='store_true',
-            help='임베딩이 없는 도서에 대해 Upstage 임베딩을 생성(네트워크/API 필요). 기본은 생성하지 않음.',
+            help='임베딩이 없거나 제목/설명이 바뀐 도서에 대해 Upstage 임베딩을 생성(네트워크/API 필요). '
+                 '같은 텍스트는 임베딩 캐시에서 재사용. 기본은 생성하지 않음.',
         )
         parser.add_argument(
             '--limit',
@@ -30,6 +37,43 @@ class Command(BaseCommand):
             default=0,
             help='처리할 도서 수 제한(0이면 전체). 디버깅용.',
         )
+        parser.add_argument(
+            '--engine',
+            choices=['legacy', 'blocked'],
+            default='legacy',
+            help='legacy: 도서별 전체 정렬(소규모용). blocked: values_list 스트리밍 + 블록 단위 '
+                 'argpartition + 프로세스 풀 + through 테이블 일괄 교체(대규모 카탈로그용).',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='blocked 엔진에서 블록 계산에 쓸 프로세스 수 (기본: 1)',
+        )
+        parser.add_argument(
+            '--block-size',
+            type=int,
+            default=0,
+            help='blocked 엔진에서 한 번에 점수를 계산할 행 수. 0이면 도서 수에 맞춰 자동.',
+        )
+        parser.add_argument(
+            '--embed-batch-size',
+            type=int,
+            default=64,
+            help='--create-embeddings 시 요청 1회에 담을 텍스트 수 (기본: 64)',
+        )
+        parser.add_argument(
+            '--embed-concurrency',
+            type=int,
+            default=4,
+            help='--create-embeddings 시 동시에 보낼 최대 요청 수 (기본: 4)',
+        )
+        parser.add_argument(
+            '--embed-rps',
+            type=float,
+            default=None,
+            help='--create-embeddings 시 초당 최대 요청 수 (기본: settings.UPSTAGE_EMBED_RPS, 0이면 무제한)',
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.NOTICE('유사 도서 업데이트 시작...'))
@@ -40,6 +84,24 @@ class Command(BaseCommand):
         create_embeddings = bool(options.get('create_embeddings'))
         limit = int(options.get('limit') or 0)
 
+        if create_embeddings:
+            rps = options.get('embed_rps')
+            self._create_missing_embeddings(
+                limit=limit,
+                batch_size=int(options.get('embed_batch_size') or 64),
+                concurrency=int(options.get('embed_concurrency') or 4),
+                rps=float(rps if rps is not None else getattr(settings, 'UPSTAGE_EMBED_RPS', 0)),
+            )
+
+        if options.get('engine') == 'blocked':
+            return self._handle_blocked(
+                k=k,
+                verbosity=int(options.get('verbosity') or 1),
+                limit=limit,
+                workers=max(1, int(options.get('workers') or 1)),
+                block_size=int(options.get('block_size') or 0) or None,
+            )
+
         # 모든 도서 로드
         qs = Book.objects.all()
         if limit and limit > 0:
@@ -49,28 +111,8 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('도서가 2권 미만이라 유사도 계산을 건너뜁니다.'))
             return
 
-        def _ensure_embedding(book: Book) -> list[float] | None:
-            if book.embedding:
-                return book.embedding
-            if not create_embeddings:
-                return None
-            text = f"{book.title} {book.description or ''}".strip()
-            if not text:
-                return None
-            try:
-                emb = get_upstage_embedding(text)
-            except Exception as e:
-                self.stderr.write(self.style.WARNING(f'  ! 임베딩 실패: "{book.title}" ({e})'))
-                return None
-            book.embedding = emb
-            book.save(update_fields=['embedding'])
-            self.stdout.write(f'  - [임베딩 생성] "{book.title}"')
-            return emb
-
-        # 1) 각 도서 임베딩 생성 또는 로드
-        embeddings: list[list[float] | None] = []
-        for book in books:
-            embeddings.append(_ensure_embedding(book))
+        # 1) 각 도서 임베딩 로드 (--create-embeddings 는 위에서 일괄 생성됨)
+        embeddings: list[list[float] | None] = [book.embedding or None for book in books]
 
         # 2) 각 도서에 대해 유사도 계산 및 similar_books 설정
         # - 임베딩이 없는 도서는 장르/카테고리 기반 fallback
@@ -139,4 +181,122 @@ class Command(BaseCommand):
                 book.similar_books.set(top_ids[:k])
             self.stdout.write(f'  - [추천 설정] "{book.title}": {top_ids[:k]}')
 
-        self.stdout.write(self.style.SUCCESS('유사 도서 업데이트 완료!'))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS('유사 도서 업데이트 완료!'))
+
+    def _create_missing_embeddings(self, limit, batch_size, concurrency, rps):
+        ids = None
+        if limit and limit > 0:
+            ids = list(Book.objects.order_by('id').values_list('id', flat=True)[:limit])
+        stats = EmbeddingStats()
+        cache_stats = CacheStats()
+        try:
+            embed_books(
+                iter_books_needing_embedding(ids),
+                batch_size=batch_size,
+                concurrency=concurrency,
+                rps=rps,
+                stats=stats,
+                cache_stats=cache_stats,
+            )
+        except Exception as e:
+            self.stderr.write(self.style.WARNING(f'  ! 임베딩 생성 불가: {e}'))
+            return
+        self.stdout.write(
+            f'  - [임베딩 생성] API {stats.embedded}건 '
+            f'(요청 {stats.requests}회, 재시도 {stats.retries}회, 실패 {stats.failed}건)'
+        )
+        self.stdout.write(
+            f'  - [임베딩 캐시] 적중 {cache_stats.hits}/{cache_stats.lookups} '
+            f'({cache_stats.hit_rate:.0%}), 절약한 API 호출 {stats.api_calls_saved}건'
+        )
+
+    # ────────────────────────────────────────────────────────────────────────
+    #                       blocked engine
+    # ────────────────────────────────────────────────────────────────────────
+    def _handle_blocked(self, k, verbosity, limit, workers, block_size):
+        qs = Book.objects.order_by('id')
+        if limit and limit > 0:
+            qs = qs[:limit]
+
+        # 1) id/genre/category는 전체, 임베딩은 디스크 staging 행렬로 스트리밍
+        book_ids: list[int] = []
+        genre_of: dict[int, int | None] = {}
+        cat_of: dict[int, int | None] = {}
+
+        def _rows():
+            for bid, gid, cid, emb in qs.values_list('id', 'genre_id', 'category_id', 'embedding').iterator(chunk_size=500):
+                book_ids.append(bid)
+                genre_of[bid] = gid
+                cat_of[bid] = cid
+                if isinstance(emb, list) and emb:
+                    yield bid, emb
+
+        with tempfile.TemporaryDirectory(prefix='similar_books_') as tmp:
+            vec_ids, staging = stage_vectors(_rows(), tmp)
+            if len(book_ids) < 2:
+                self.stdout.write(self.style.WARNING('도서가 2권 미만이라 유사도 계산을 건너뜁니다.'))
+                return
+            n_vec = int(vec_ids.shape[0])
+            if staging is not None:
+                staging.flush()
+                del staging
+            self.stdout.write(f'  - 도서 {len(book_ids)}권, 임베딩 {n_vec}개 로드 (workers={workers})')
+
+            # 2) 임베딩이 있는 도서: 블록 단위 top-k
+            top: dict[int, list[int]] = {}
+            if n_vec >= 2:
+                matrix_path = os.path.join(tmp, 'staging.npy')
+                for start, rows, scores in iter_topk(matrix_path, n_vec, k, block_size=block_size, workers=workers):
+                    for i in range(rows.shape[0]):
+                        top[int(vec_ids[start + i])] = [
+                            int(vec_ids[r]) for r, sc in zip(rows[i], scores[i]) if sc > 0
+                        ]
+
+        # 3) 부족분은 장르 → 카테고리 → 전체 순 fallback (풀은 한 번만 구성)
+        by_genre: dict[int, list[int]] = {}
+        by_cat: dict[int, list[int]] = {}
+        for bid in book_ids:
+            if genre_of[bid]:
+                by_genre.setdefault(genre_of[bid], []).append(bid)
+            if cat_of[bid]:
+                by_cat.setdefault(cat_of[bid], []).append(bid)
+
+        through = Book.similar_books.through
+        links = []
+        for bid in book_ids:
+            chosen = top.get(bid, [])[:k]
+            if len(chosen) < k:
+                taken = set(chosen)
+                taken.add(bid)
+                pools = (by_genre.get(genre_of[bid], ()), by_cat.get(cat_of[bid], ()), book_ids)
+                for pool in pools:
+                    for cand in pool:
+                        if cand not in taken:
+                            chosen.append(cand)
+                            taken.add(cand)
+                            if len(chosen) >= k:
+                                break
+                    if len(chosen) >= k:
+                        break
+            links.extend(through(from_book_id=bid, to_book_id=to_id) for to_id in chosen)
+            if verbosity > 1:
+                self.stdout.write(f'  - [추천 설정] {bid}: {chosen}')
+
+        # 4) through 테이블 일괄 교체 (단일 트랜잭션)
+        with transaction.atomic():
+            stale = through.objects.all()
+            if limit and limit > 0:
+                # --limit은 id 순 앞쪽 N권이므로 범위 조건으로 충분하다.
+                stale = stale.filter(from_book_id__lte=book_ids[-1])
+            before: dict[int, set[int]] = {}
+            for from_id, to_id in stale.values_list('from_book_id', 'to_book_id').iterator(chunk_size=10000):
+                before.setdefault(from_id, set()).add(to_id)
+            stale.delete()
+            through.objects.bulk_create(links, batch_size=2000)
+            # 목록이 바뀐 도서만 상세 응답 버전(updated_at) 갱신
+            after: dict[int, set[int]] = {}
+            for link in links:
+                after.setdefault(link.from_book_id, set()).add(link.to_book_id)
+            book_versions.touch(b for b in before.keys() | after.keys() if before.get(b) != after.get(b))
+
+        self.stdout.write(self.style.SUCCESS(f'유사 도서 업데이트 완료! (도서 {len(book_ids)}권, 링크 {len(links)}개)'))
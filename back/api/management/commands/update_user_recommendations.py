@@ -0,0 +1,52 @@
+# api/management/commands/update_user_recommendations.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services import user_recommendations
+
+
+class Command(BaseCommand):
+    help = '찜/읽음 도서 임베딩으로 사용자별 취향 벡터를 만들어 임베딩 추천 목록(top-N)을 미리 계산합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            nargs='+',
+            help='이 사용자 ID들만 다시 계산 (기본: 전체 사용자)',
+        )
+        parser.add_argument(
+            '--dirty',
+            action='store_true',
+            help='마지막 실행 이후 찜/읽음이 바뀐 사용자(UserRecommendationDirty)만 다시 계산 (cron용)',
+        )
+        parser.add_argument(
+            '--top-n',
+            type=int,
+            default=0,
+            help='사용자당 저장할 추천 도서 수. 0이면 RECOMMEND_TOP_N',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='한 번에 처리할 사용자 수 (기본: 200)',
+        )
+
+    def handle(self, *args, **opts):
+        started = time.monotonic()
+        top_n = opts.get('top_n') or None
+        def _progress(done, total):
+            self.stdout.write(f'  {done}/{total} users')
+
+        if opts.get('users'):
+            processed = len(set(opts['users']))
+            filled = user_recommendations.refresh_users(opts['users'], top_n=top_n)
+        else:
+            run = user_recommendations.refresh_dirty if opts.get('dirty') else user_recommendations.refresh_all
+            processed, filled = run(batch_size=max(1, opts['batch_size']), top_n=top_n, progress=_progress)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ 추천 목록 갱신: users={processed}, with_list={filled} ({time.monotonic() - started:.1f}s)'
+        ))
@@ -0,0 +1,48 @@
+# api/management/commands/warm_response_cache.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import resolve
+
+from api.services import response_cache
+
+# 홈 화면이 호출하는 캐시 대상 응답 (age-based는 나이대별 1개씩)
+WARM_URLS = (
+    '/api/books/best-sellers/',
+    '/api/books/top-recommended/',
+    '/api/books/age-based/?age=15',
+    '/api/books/age-based/?age=25',
+    '/api/books/age-based/?age=45',
+    '/api/categories/',
+    '/api/genres/',
+)
+
+
+class Command(BaseCommand):
+    help = '홈 화면 컬렉션 응답 캐시를 현재 카탈로그 버전으로 미리 채웁니다 (배포/동기화 직후 실행).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bump',
+            action='store_true',
+            help='채우기 전에 카탈로그 버전을 올려 기존 캐시를 무효화',
+        )
+
+    def handle(self, *args, **opts):
+        if not response_cache.is_shared():
+            # 프로세스별 캐시면 여기서 채운 내용을 서버가 읽지 못한다
+            raise CommandError('CACHES가 프로세스별 캐시(LocMem/Dummy)입니다. 파일 캐시나 REDIS_URL을 설정하세요.')
+        if opts.get('bump'):
+            response_cache.bump_catalog_version()
+        factory = RequestFactory()
+        for url in WARM_URLS:
+            started = time.monotonic()
+            request = factory.get(url)
+            match = resolve(request.path)
+            response = match.func(request, *match.args, **match.kwargs)
+            self.stdout.write(f'  {url} → {response.status_code} ({(time.monotonic() - started) * 1000:.0f}ms)')
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ 응답 캐시 준비 완료 (catalog version={response_cache.catalog_version()})'
+        ))
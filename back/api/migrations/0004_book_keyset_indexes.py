@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_delete_emotiontag'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['-global_recommend_count', 'id'], name='book_recommend_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['-pub_date', 'id'], name='book_pub_date_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:28
+
+import hashlib
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def adopt_existing_embeddings(apps, schema_editor):
+    """Treat vectors that already exist as made from the current text.
+
+    Frozen copy of api.services.embedding_cache key logic, so later changes to the
+    service do not alter this migration.
+    """
+    Book = apps.get_model('api', 'Book')
+    EmbeddingCache = apps.get_model('api', 'EmbeddingCache')
+    model = 'embedding-query'
+
+    ids = list(Book.objects.filter(embedding__isnull=False).values_list('id', flat=True))
+    for start in range(0, len(ids), 500):
+        books = list(Book.objects.filter(id__in=ids[start:start + 500]))
+        entries = {}
+        for book in books:
+            if not book.embedding:
+                continue
+            text = unicodedata.normalize('NFC', f"{book.title} {book.description or ''}")
+            text = re.sub(r'\s+', ' ', text).strip()
+            book.embedding_key = hashlib.sha256(f"{model}\0{text}".encode('utf-8')).hexdigest()
+            entries.setdefault(book.embedding_key, book.embedding)
+        Book.objects.bulk_update(books, ['embedding_key'])
+        EmbeddingCache.objects.bulk_create(
+            [EmbeddingCache(key=k, model=model, vector=v) for k, v in entries.items()],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_book_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmbeddingCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('model', models.CharField(max_length=100)),
+                ('vector', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='embedding_key',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.RunPython(adopt_existing_embeddings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:12
+
+import re
+import unicodedata
+
+from django.db import migrations
+
+FTS_TABLE = 'api_book_fts'
+
+
+def _ngram_text(text):
+    # Frozen copy of api.services.search_index.ngram_text.
+    tokens = []
+    for word in re.findall(r'\w+', unicodedata.normalize('NFKC', text or '').lower()):
+        if len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return ' '.join(tokens)
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Book = apps.get_model('api', 'Book')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            f"USING fts5(title, author, publisher, description, tokenize='unicode61')"
+        )
+        rows = [
+            (pk, _ngram_text(title), _ngram_text(author), _ngram_text(publisher), _ngram_text(description))
+            for pk, title, author, publisher, description in Book.objects.values_list(
+                'id', 'title', 'author__name', 'publisher', 'description',
+            ).iterator(chunk_size=2000)
+        ]
+        if rows:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, author, publisher, description) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_embedding_cache'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_alter_user_birthdate'),
+        ('api', '0007_llm_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRecommendation',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='embedding_recommendation', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('book_ids', models.JSONField(default=list)),
+                ('basis', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.9 on 2026-10-18 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_shelf_event'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['author', '-global_recommend_count', 'id'], name='book_author_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['category', '-global_recommend_count', 'id'], name='book_category_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['genre', '-global_recommend_count', 'id'], name='book_genre_keyset_idx'),
+        ),
+    ]
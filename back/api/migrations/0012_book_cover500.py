@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-18 04:11
+
+import re
+
+from django.db import migrations
+
+
+def store_upgraded_cover_urls(apps, schema_editor):
+    """Rewrite stored Aladin cover URLs to `cover500` (formerly done per read in the serializers).
+
+    Frozen copy of api.models.upgrade_cover_url.
+    """
+    Book = apps.get_model('api', 'Book')
+    rows = (Book.objects.filter(cover_url__contains='image.aladin.co.kr')
+            .exclude(cover_url__contains='/cover500/').values_list('id', 'cover_url'))
+    changed = []
+    for book_id, url in rows.iterator(chunk_size=2000):
+        upgraded = re.sub(r'/cover\d+/', '/cover500/', url).replace('/cover/', '/cover500/')
+        if upgraded != url:
+            changed.append(Book(id=book_id, cover_url=upgraded))
+    Book.objects.bulk_update(changed, ['cover_url'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_book_group_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(store_upgraded_cover_urls, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 04:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_alter_user_birthdate'),
+        ('api', '0013_book_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRecommendationDirty',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('marked_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:05
+
+import re
+import unicodedata
+
+from django.db import migrations
+
+FTS_TABLE = 'api_book_fts'
+
+
+def _ngram_text(text):
+    # Frozen copy of api.services.search_index.ngram_text (word-final unigrams added).
+    tokens = []
+    for word in re.findall(r'\w+', unicodedata.normalize('NFKC', text or '').lower()):
+        if len(word) > 1:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        tokens.append(word[-1])
+    return ' '.join(tokens)
+
+
+def reindex(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Book = apps.get_model('api', 'Book')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        rows = [
+            (pk, _ngram_text(title), _ngram_text(author), _ngram_text(publisher), _ngram_text(description))
+            for pk, title, author, publisher, description in Book.objects.values_list(
+                'id', 'title', 'author__name', 'publisher', 'description',
+            ).iterator(chunk_size=2000)
+        ]
+        if rows:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, author, publisher, description) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_user_recommendation_dirty'),
+    ]
+
+    operations = [
+        # 기존 색인에는 단어 끝 글자 토큰이 없으므로 다시 색인 (되돌릴 때는 그대로 둬도 검색 가능)
+        migrations.RunPython(reindex, migrations.RunPython.noop),
+    ]
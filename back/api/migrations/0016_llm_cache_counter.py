@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-18 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_book_fts_final_unigrams'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMCacheCounter',
+            fields=[
+                ('kind', models.CharField(max_length=30, primary_key=True, serialize=False)),
+                ('hits', models.PositiveBigIntegerField(default=0)),
+                ('misses', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
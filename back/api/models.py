@@ -1,8 +1,9 @@
+import re
+
 from django.db import models
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db.models import JSONField
-from api.utils import get_upstage_embedding
 User = get_user_model()
 
 class Category(models.Model):
@@ -20,6 +21,24 @@ class Author(models.Model):
     def __str__(self):
         return self.name
 
+def upgrade_cover_url(url: str | None) -> str | None:
+    """Return a higher-resolution cover URL when the source is Aladin.
+
+    Aladin's API hands out `cover200` URLs (low-res); it serves `cover500` at the
+    same path. Applied once when a book is stored (`api.signals`, the sync
+    command), so serializers return `cover_url` as is.
+    """
+    if not url:
+        return url
+    if 'image.aladin.co.kr' not in url:
+        return url
+    if '/cover500/' in url:
+        return url
+
+    upgraded = re.sub(r'/cover\d+/', '/cover500/', url)
+    upgraded = upgraded.replace('/cover/', '/cover500/')
+    return upgraded
+
 class Book(models.Model):
     isbn                     = models.CharField(max_length=20, unique=True)
     title                    = models.CharField(max_length=255)
@@ -34,6 +53,8 @@ class Book(models.Model):
     
      # --- 임베딩과 추천 도서 필드 ---
     embedding = JSONField(blank=True, null=True)
+    # embedding을 만든 (모델 + 정규화 텍스트)의 해시. 텍스트가 바뀌면 불일치로 재임베딩 대상이 된다.
+    embedding_key = models.CharField(max_length=64, blank=True, default='')
     similar_books = models.ManyToManyField(
         'self',
         related_name='recommended_for',
@@ -42,13 +63,105 @@ class Book(models.Model):
         help_text='상위 4권의 유사 도서'
     
     )
+    # 상세 응답(리뷰·유사 도서·이름 포함)이 바뀔 때마다 갱신 → ETag / Last-Modified (api.services.book_versions)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination orderings (see api.pagination.BookKeysetPagination)
+            models.Index(fields=['-global_recommend_count', 'id'], name='book_recommend_keyset_idx'),
+            models.Index(fields=['-pub_date', 'id'], name='book_pub_date_keyset_idx'),
+            # Author/category/genre detail pages (the same ordering within one group)
+            models.Index(fields=['author', '-global_recommend_count', 'id'], name='book_author_keyset_idx'),
+            models.Index(fields=['category', '-global_recommend_count', 'id'], name='book_category_keyset_idx'),
+            models.Index(fields=['genre', '-global_recommend_count', 'id'], name='book_genre_keyset_idx'),
+        ]
+
     def create_embedding(self):
-        if not self.embedding:
-            self.embedding = get_upstage_embedding(f"{self.title} {self.description}")
-            self.save()
+        from api.services.embedding_cache import book_embedding_key, book_embedding_text, get_or_embed
+
+        key = book_embedding_key(self)
+        if self.embedding and self.embedding_key == key:
+            return
+        self.embedding = get_or_embed(book_embedding_text(self))
+        self.embedding_key = key
+        self.save(update_fields=['embedding', 'embedding_key'])
     def __str__(self):
         return self.title
 
+class EmbeddingCache(models.Model):
+    """Content-addressed embedding store: sha256(model + normalized text) -> vector."""
+    key        = models.CharField(max_length=64, unique=True)
+    model      = models.CharField(max_length=100)
+    vector     = JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    def __str__(self):
+        return f"{self.model}:{self.key[:12]}"
+
+class LLMCache(models.Model):
+    """Parsed LLM answers (term/title lists, author info) keyed by sha256(kind + model + prompt)."""
+    key          = models.CharField(max_length=64, unique=True)
+    kind         = models.CharField(max_length=30)
+    model        = models.CharField(max_length=100)
+    value        = JSONField()
+    hits         = models.PositiveIntegerField(default=0)
+    created_at   = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    def __str__(self):
+        return f"{self.kind}:{self.key[:12]}"
+
+class LLMCacheCounter(models.Model):
+    """Lookup totals per kind across processes (the `llm_cache` command's hit rate)."""
+    kind   = models.CharField(max_length=30, primary_key=True)
+    hits   = models.PositiveBigIntegerField(default=0)
+    misses = models.PositiveBigIntegerField(default=0)
+    def __str__(self):
+        return f"{self.kind}: {self.hits}/{self.hits + self.misses}"
+
+class UserRecommendation(models.Model):
+    """Precomputed embedding recommendations: unseen books nearest to the user's taste vector."""
+    user       = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                      primary_key=True, related_name='embedding_recommendation')
+    book_ids   = JSONField(default=list)  # 유사도 내림차순
+    basis      = models.PositiveIntegerField(default=0)  # 취향 벡터에 쓰인 (임베딩 있는) 찜/읽음 도서 수
+    updated_at = models.DateTimeField(auto_now=True)
+    def __str__(self):
+        return f"Recommendations for {self.user_id} ({len(self.book_ids)})"
+
+class UserRecommendationDirty(models.Model):
+    """Users whose shelves changed since their list was last computed (`update_user_recommendations --dirty`)."""
+    user      = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                     primary_key=True, related_name='+')
+    marked_at = models.DateTimeField(auto_now_add=True)
+
+class AlsoRead(models.Model):
+    """Item-item CF neighbour: readers who favorited/read `book` also did `other` (update_also_read)."""
+    book   = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='also_read_links')
+    other  = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='+')
+    score  = models.FloatField()  # 코사인: 공동 독자 수 / sqrt(두 도서 독자 수의 곱)
+    common = models.PositiveIntegerField()  # 공동 독자 수
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['book', 'other'], name='also_read_book_other_uniq')]
+    def __str__(self):
+        return f"{self.book_id} -> {self.other_id} ({self.score:.3f})"
+
+class AlsoReadDirty(models.Model):
+    """Books whose readers changed since the last `update_also_read` run."""
+    book      = models.OneToOneField(Book, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    marked_at = models.DateTimeField(auto_now_add=True)
+
+class ShelfEvent(models.Model):
+    """Append-only log of favorites/read_books changes; the newest id is the user's shelf version."""
+    SHELF_CHOICES = [('favorites', '찜'), ('read_books', '읽음')]
+    user    = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    shelf   = models.CharField(max_length=10, choices=SHELF_CHOICES)
+    book_id = models.BigIntegerField()  # FK 아님: 삭제된 도서의 '제거' 이벤트도 전달해야 함
+    added   = models.BooleanField()     # False = 제거
+    class Meta:
+        indexes = [models.Index(fields=['user', 'id'], name='shelf_event_user_id_idx')]
+    def __str__(self):
+        return f"{self.user_id} {'+' if self.added else '-'}{self.shelf}:{self.book_id}"
+
 class Review(models.Model):
     book       = models.ForeignKey(Book, on_delete=models.CASCADE)
     user       = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -0,0 +1,195 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from datetime import date
+
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class BookKeysetPagination(BasePagination):
+    """Opaque-cursor keyset pagination over `(<sort field>, id)`.
+
+    Unlike offset pagination (and DRF's CursorPagination, which falls back to an
+    offset among rows sharing the same sort value), each page is fetched with a
+    `WHERE (field, id) > (last_field, last_id)` style predicate, so page N costs
+    the same as page 1 as long as the matching index exists.
+
+    Query params:
+    - `cursor`: opaque token taken from `next` / `previous`
+    - `ordering`: one of `ORDERINGS` (default: `-global_recommend_count`)
+    - `page_size`: 1..`max_page_size`
+    """
+
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # ordering key -> (field, descending, nullable). Ties are broken by ascending id.
+    ORDERINGS = {
+        '-global_recommend_count': ('global_recommend_count', True, False),
+        'global_recommend_count':  ('global_recommend_count', False, False),
+        '-pub_date':               ('pub_date', True, True),
+        'pub_date':                ('pub_date', False, True),
+    }
+    default_ordering = '-global_recommend_count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            self.ordering = cursor['o']
+        else:
+            self.ordering = self.get_ordering(request)
+
+        field, desc, nullable = self.ORDERINGS[self.ordering]
+        reverse = bool(cursor and cursor['r'])
+
+        queryset = queryset.order_by(*self._order_by(field, desc, reverse))
+        if cursor is not None:
+            queryset = queryset.filter(
+                self._seek(field, desc, nullable, cursor['v'], cursor['i'], reverse)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        if reverse:
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+        return results
+
+    def order_queryset(self, queryset, request):
+        """The whole result in page order (`?ordering=`), for unpaginated streaming."""
+        field, desc, _ = self.ORDERINGS[self.get_ordering(request)]
+        return queryset.order_by(*self._order_by(field, desc, reverse=False))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(self.max_page_size, size))
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param)
+        if ordering in self.ORDERINGS:
+            return ordering
+        return self.default_ordering
+
+    # ── links ──────────────────────────────────────────────────────────────
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    def _link(self, obj, reverse):
+        field = self.ORDERINGS[self.ordering][0]
+        if isinstance(obj, dict):  # values() rows (api.fast_serializers)
+            value, pk = obj[field], obj['id']
+        else:
+            value, pk = getattr(obj, field), obj.pk
+        if isinstance(value, date):
+            value = value.isoformat()
+        token = self.encode_cursor({'o': self.ordering, 'v': value, 'i': pk, 'r': int(reverse)})
+        url = remove_query_param(self.base_url, self.ordering_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    # ── cursor encoding ────────────────────────────────────────────────────
+    def encode_cursor(self, payload):
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            ordering = payload['o']
+            if ordering not in self.ORDERINGS:
+                raise ValueError(ordering)
+            value = payload['v']
+            if value is not None and self.ORDERINGS[ordering][0] == 'pub_date':
+                value = date.fromisoformat(value)
+            return {'o': ordering, 'v': value, 'i': int(payload['i']), 'r': bool(payload.get('r'))}
+        except (TypeError, ValueError, KeyError, binascii.Error, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    # ── keyset predicates ──────────────────────────────────────────────────
+    @staticmethod
+    def _order_by(field, desc, reverse):
+        # Forward order: field (desc/asc) with NULLs last, then id ascending.
+        if reverse:
+            primary = F(field).asc(nulls_first=True) if desc else F(field).desc(nulls_first=True)
+            return [primary, '-id']
+        primary = F(field).desc(nulls_last=True) if desc else F(field).asc(nulls_last=True)
+        return [primary, 'id']
+
+    @staticmethod
+    def _seek(field, desc, nullable, value, pk, reverse):
+        """Rows strictly after (forward) or before (reverse) `(value, pk)`."""
+        beyond = f'{field}__lt' if desc else f'{field}__gt'
+        behind = f'{field}__gt' if desc else f'{field}__lt'
+
+        if not reverse:
+            if value is None:
+                # Already inside the trailing NULL block.
+                return Q(**{f'{field}__isnull': True, 'id__gt': pk})
+            q = Q(**{beyond: value}) | Q(**{field: value, 'id__gt': pk})
+            if nullable:
+                q |= Q(**{f'{field}__isnull': True})
+            return q
+
+        if value is None:
+            return Q(**{f'{field}__isnull': False}) | Q(**{f'{field}__isnull': True, 'id__lt': pk})
+        return Q(**{behind: value}) | Q(**{field: value, 'id__lt': pk})
+
+
+class ShelfPagination(PageNumberPagination):
+    """`?page=` / `?page_size=` pages of a user's shelf (most recently added first)."""
+
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
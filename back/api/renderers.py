@@ -0,0 +1,50 @@
+"""JSON renderer that encodes with orjson when it is installed.
+
+Output matches `rest_framework.renderers.JSONRenderer` with the default
+settings (compact, `UNICODE_JSON`, U+2028/2029 escaped): dates and datetimes
+are handed to DRF's encoder (`OPT_PASSTHROUGH_DATETIME`) so they keep DRF's
+format, and anything orjson refuses (integers beyond 64 bits, non-string keys)
+falls back to the stdlib path. Floats in exponent form are the one difference
+(`1e-05` vs `0.00001`); they decode to the same number.
+"""
+
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+_ENCODER = encoders.JSONEncoder()
+
+
+def _escape_js_separators(ret: bytes) -> bytes:
+    # U+2028/2029 are valid JSON but not valid JavaScript (as JSONRenderer)
+    return ret.replace('\u2028'.encode('utf-8'), b'\\u2028').replace('\u2029'.encode('utf-8'), b'\\u2029')
+
+
+def dumps(data) -> bytes:
+    """Compact UTF-8 JSON bytes of `data`, identical to the default JSONRenderer body."""
+    if orjson is not None:
+        try:
+            ret = orjson.dumps(data, default=_ENCODER.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:  # orjson.JSONEncodeError included
+            pass
+        else:
+            return _escape_js_separators(ret)
+    ret = json.dumps(data, cls=encoders.JSONEncoder, ensure_ascii=False,
+                     allow_nan=False, separators=(',', ':'))
+    return _escape_js_separators(ret.encode('utf-8'))
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
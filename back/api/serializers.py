@@ -1,35 +1,15 @@
-import re
-
+from django.db.models import Count
 from rest_framework import serializers
 
 from .models import Author, Book, Category, Genre, Review
 
-
-def _upgrade_cover_url(url: str | None) -> str | None:
-    """Return a higher-resolution cover URL when the source is Aladin.
-
-    Our DB currently stores Aladin `cover200` URLs (low-res). Aladin serves `cover500`
-    at the same path for better quality.
-    """
-    if not url:
-        return url
-    if 'image.aladin.co.kr' not in url:
-        return url
-    if '/cover500/' in url:
-        return url
-
-    upgraded = re.sub(r'/cover\d+/', '/cover500/', url)
-    upgraded = upgraded.replace('/cover/', '/cover500/')
-    return upgraded
+# 표지 URL(cover500)은 저장 시점에 이미 변환되어 있다 (api.models.upgrade_cover_url).
+# 읽기 전용 응답의 빠른 경로는 api.fast_serializers — 필드를 바꾸면 그쪽도 함께 바꿀 것.
 
 class SimilarBookSerializer(serializers.ModelSerializer):
     """추천 도서 카드용 최소 필드."""
 
     author_name = serializers.CharField(source='author.name', read_only=True)
-    cover_url = serializers.SerializerMethodField()
-
-    def get_cover_url(self, obj):
-        return _upgrade_cover_url(getattr(obj, 'cover_url', None))
 
     class Meta:
         model = Book
@@ -54,11 +34,13 @@ class SimpleGenreSerializer(serializers.ModelSerializer):
 
 
 class AuthorSerializer(serializers.ModelSerializer):
-    """작가는 name-only 정책이므로 최소 필드만 반환."""
+    """작가는 name-only 정책이므로 최소 필드만 반환 (+ `Count('books')` annotation)."""
+
+    book_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Author
-        fields = ('id', 'name')
+        fields = ('id', 'name', 'book_count')
 
 # EmotionTagSerializer removed (emotion tags no longer used)
 # Music-related serializers removed
@@ -68,8 +50,6 @@ class BookSerializer(serializers.ModelSerializer):
 
     similar_books = SimilarBookSerializer(many=True, read_only=True)
 
-    cover_url = serializers.SerializerMethodField()
-
     author = SimpleAuthorSerializer(read_only=True)
     category = SimpleCategorySerializer(read_only=True)
     genre = SimpleGenreSerializer(read_only=True)
@@ -83,11 +63,12 @@ class BookSerializer(serializers.ModelSerializer):
         return ReviewSerializer(reviews, many=True, context=self.context).data
     
     def get_review_count(self, obj):
+        # Prefer the `review_count` annotation when the queryset provides one.
+        annotated = getattr(obj, 'review_count', None)
+        if annotated is not None:
+            return annotated
         return obj.review_set.count()
 
-    def get_cover_url(self, obj):
-        return _upgrade_cover_url(getattr(obj, 'cover_url', None))
-
     # Backward-compatible flat name fields (already used widely in Vue).
     author_name = serializers.CharField(source='author.name', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -106,26 +87,75 @@ class BookSerializer(serializers.ModelSerializer):
             'reviews', 'review_count',
         ]
 
+class BookListSerializer(serializers.ModelSerializer):
+    """목록/추천 카드용 경량 직렬화 (리뷰·유사 도서 미포함).
+
+    `review_count`는 queryset의 `Count('review')` annotation을 그대로 읽으므로
+    `book_card_queryset()`과 함께 쓰면 페이지당 쿼리 수가 도서 수와 무관하게 고정된다.
+    """
+
+    author = SimpleAuthorSerializer(read_only=True)
+    category = SimpleCategorySerializer(read_only=True)
+    genre = SimpleGenreSerializer(read_only=True)
+    review_count = serializers.SerializerMethodField()
+
+    author_name = serializers.CharField(source='author.name', read_only=True)
+    category_name = serializers.CharField(source='category.name', read_only=True)
+    genre_name = serializers.CharField(source='genre.name', read_only=True)
+
+    def get_review_count(self, obj):
+        annotated = getattr(obj, 'review_count', None)
+        if annotated is not None:
+            return annotated
+        return obj.review_set.count()
+
+    class Meta:
+        model = Book
+        fields = [
+            'id', 'isbn', 'title', 'publisher', 'cover_url', 'pub_date',
+            'category', 'category_name',
+            'genre', 'genre_name',
+            'author', 'author_name',
+            'global_recommend_count',
+            'review_count',
+        ]
+
+
+def book_card_queryset(queryset=None):
+    """Return a queryset shaped for `BookListSerializer` (joins + review count)."""
+    if queryset is None:
+        queryset = Book.objects.all()
+    return (
+        queryset.select_related('author', 'category', 'genre')
+        .defer('embedding', 'description')
+        .annotate(review_count=Count('review', distinct=True))
+    )
+
+
 class CategorySerializer(serializers.ModelSerializer):
-    books = BookSerializer(many=True, read_only=True)
+    """목록/상세 헤더. 도서는 싣지 않고 `Count('books')` annotation만 읽는다."""
+
+    book_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Category
-        fields = ('id', 'name', 'books')
+        fields = ('id', 'name', 'book_count')
 
 class GenreSerializer(serializers.ModelSerializer):
-    books = BookSerializer(many=True, read_only=True)
+    """목록/상세 헤더. 도서는 싣지 않고 `Count('books')` annotation만 읽는다."""
+
+    book_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Genre
-        fields = ('id', 'name', 'books')
+        fields = ('id', 'name', 'book_count')
 
 class ReviewSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)
     user_id = serializers.IntegerField(source='user.id', read_only=True)
     user_nickname = serializers.CharField(source='user.nickname', read_only=True)
     user_avatar = serializers.SerializerMethodField()
-    book_cover_url = serializers.SerializerMethodField()
+    book_cover_url = serializers.CharField(source='book.cover_url', read_only=True)
     book_id = serializers.IntegerField(source='book.id', read_only=True)
 
     book = serializers.PrimaryKeyRelatedField(queryset=Book.objects.all())
@@ -134,9 +164,6 @@ class ReviewSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         url = obj.user.get_avatar_url()
         return request.build_absolute_uri(url) if url else None
-    
-    def get_book_cover_url(self, obj):
-        return _upgrade_cover_url(getattr(obj.book, 'cover_url', None))
 
     class Meta:
         model  = Review
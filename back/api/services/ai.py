@@ -0,0 +1,178 @@
+"""LLM plumbing shared by the sync (DRF) and async AI endpoints.
+
+Prompt construction, answer parsing and caching live here once; the sync views
+call `search_terms()` / `recommend_titles()` and the async views in
+`api.async_views` call the `a*` twins, which use `AsyncOpenAI` and never block
+the event loop on the model round trip. Async calls are limited per process by
+`AI_MAX_CONCURRENCY`; callers beyond the limit wait for a slot. Clients come
+from `api.services.clients`, so completions reuse pooled connections.
+"""
+
+import asyncio
+import re
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from api.services import clients, llm_cache
+from api.services.clients import OpenAIConfig, openai_config  # noqa: F401 (views call ai.openai_config)
+
+SEARCH_MAX_TOKENS = 200
+RECOMMEND_MAX_TOKENS = 300
+
+
+# ── prompts / parsing ──────────────────────────────────────────────────────
+def search_terms_prompt(prompt_in: str) -> str:
+    # Ask model to output search keywords or titles only.
+    # NOTE: Per product decision, do not incorporate user profile/favorites/read history here.
+    # No nonce: the terms are cached per prompt, and "다시 검색" reshuffles the matches instead.
+    prompt = (
+        "You are a helpful assistant that maps a user's natural language book request to search keywords. "
+        "Return up to 10 short keywords or book titles, one per line, and nothing else.\n\n"
+    )
+    prompt += f"User request: {prompt_in}\n"
+    return prompt
+
+
+def recommend_prompt(profile: dict, fav_titles, read_titles, nonce=None) -> str:
+    prompt = (
+        "You are a helpful book recommender. Given a user's profile and lists of books they've favorited and read, "
+        "suggest up to 8 book titles that this user would enjoy. Return the recommendations as a numbered list of titles only.\n\n"
+    )
+    if nonce:
+        prompt += f"Nonce: {nonce}\n"
+    prompt += f"Occupation: {profile.get('occupation', '')}\n"
+    prompt += f"Gender: {profile.get('gender', '')}\n"
+    prompt += f"Interests: {profile.get('interests', '')}\n\n"
+    if fav_titles:
+        prompt += "Favorites:\n"
+        for t in fav_titles:
+            prompt += f"- {t}\n"
+    if read_titles:
+        prompt += "\nRead books:\n"
+        for t in read_titles:
+            prompt += f"- {t}\n"
+    return prompt
+
+
+def parse_list_lines(text, limit=None):
+    """Lines of a model answer with list markers ("1.", "-", ...) stripped."""
+    items = []
+    for line in (text or '').splitlines():
+        s = line.strip()
+        if not s:
+            continue
+        s = re.sub(r'^[\d\)\.\-\s]+', '', s).strip()
+        if len(s) < 2:
+            continue
+        items.append(s)
+        if limit is not None and len(items) >= limit:
+            break
+    return items
+
+
+# ── completions ────────────────────────────────────────────────────────────
+def complete(config: OpenAIConfig, prompt: str, max_tokens: int) -> str | None:
+    """Blocking chat completion; None if the SDK is missing or the call fails."""
+    client = clients.openai_client(config)
+    if client is None:
+        return None
+    try:
+        resp = client.chat.completions.create(
+            model=config.model,
+            messages=[{'role': 'user', 'content': prompt}],
+            temperature=0.9,
+            max_completion_tokens=max_tokens,
+        )
+        return (resp.choices[0].message.content or '').strip()
+    except Exception:
+        return None
+
+
+# asyncio primitives belong to one event loop; keep one semaphore per loop.
+_semaphores: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]' = weakref.WeakKeyDictionary()
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        sem = _semaphores[loop] = asyncio.Semaphore(max(1, int(getattr(settings, 'AI_MAX_CONCURRENCY', 200))))
+    return sem
+
+
+async def acomplete(config: OpenAIConfig, prompt: str, max_tokens: int) -> str | None:
+    """Non-blocking chat completion via `AsyncOpenAI`; None if unavailable or failed."""
+    client = clients.async_openai_client(config)
+    if client is None:
+        return None
+    async with _semaphore():
+        try:
+            resp = await client.chat.completions.create(
+                model=config.model,
+                messages=[{'role': 'user', 'content': prompt}],
+                temperature=0.9,
+                max_completion_tokens=max_tokens,
+            )
+            return (resp.choices[0].message.content or '').strip()
+        except Exception:
+            return None
+
+
+# ── cached, parsed answers ─────────────────────────────────────────────────
+def _search_key(config, prompt):
+    return llm_cache.prompt_key('ai_search', config.model, prompt)
+
+
+def _recommend_key(config, profile, fav_titles, read_titles, nonce):
+    return llm_cache.recommend_key(config.model, profile, fav_titles, read_titles, nonce)
+
+
+def search_terms(config: OpenAIConfig, prompt_in: str) -> list[str]:
+    """Up to 10 search terms for `prompt_in` (same model + prompt → cached, no round trip)."""
+    prompt = search_terms_prompt(prompt_in)
+    return llm_cache.get_or_set(
+        'ai_search', _search_key(config, prompt),
+        lambda: parse_list_lines(complete(config, prompt, SEARCH_MAX_TOKENS), limit=10),
+        model=config.model,
+    ) or []
+
+
+def recommend_titles(config: OpenAIConfig, profile: dict, fav_titles, read_titles, nonce=None) -> list[str]:
+    """Suggested titles (same profile + favorites + read titles + nonce → cached)."""
+    prompt = recommend_prompt(profile, fav_titles, read_titles, nonce)
+    return llm_cache.get_or_set(
+        'recommend', _recommend_key(config, profile, fav_titles, read_titles, nonce),
+        lambda: parse_list_lines(complete(config, prompt, RECOMMEND_MAX_TOKENS)),
+        model=config.model,
+    ) or []
+
+
+async def _acached(kind, key, model, produce):
+    cached = await sync_to_async(llm_cache.get)(key, kind)
+    if cached is not None:
+        return cached
+    value = await produce()
+    if value:
+        await sync_to_async(llm_cache.put)(key, value, kind=kind, model=model)
+    return value or []
+
+
+async def asearch_terms(config: OpenAIConfig, prompt_in: str) -> list[str]:
+    prompt = search_terms_prompt(prompt_in)
+
+    async def produce():
+        return parse_list_lines(await acomplete(config, prompt, SEARCH_MAX_TOKENS), limit=10)
+
+    return await _acached('ai_search', _search_key(config, prompt), config.model, produce)
+
+
+async def arecommend_titles(config: OpenAIConfig, profile: dict, fav_titles, read_titles, nonce=None) -> list[str]:
+    prompt = recommend_prompt(profile, fav_titles, read_titles, nonce)
+
+    async def produce():
+        return parse_list_lines(await acomplete(config, prompt, RECOMMEND_MAX_TOKENS))
+
+    return await _acached('recommend', _recommend_key(config, profile, fav_titles, read_titles, nonce),
+                          config.model, produce)
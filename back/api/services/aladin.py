@@ -1,6 +1,12 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from django.conf import settings
 
+from api.services import clients
+from api.services.aladin_cache import AladinReplayMiss, cache_key, get_cache
+
 
 def _clamp_max_results(value: int) -> int:
     """Aladin API MaxResults is typically capped at 50."""
@@ -42,7 +48,12 @@ def _resolve_aladin_base_url(query_type: str) -> str:
 
     return configured
 
-def fetch_aladin_books(query_type: str, max_results: int = 50, start: int = 1, **extra):
+def fetch_aladin_books(query_type: str, max_results: int = 50, start: int = 1, cache=None, **extra):
+    """Fetch one page of items, going through the on-disk response cache.
+
+    `cache` is an `AladinCache` (default: configured from settings); see
+    `api.services.aladin_cache` for the cache / replay / off modes.
+    """
     params = {
         'ttbkey':        settings.ALADIN_API_KEY,
         'QueryType':     query_type,
@@ -56,41 +67,131 @@ def fetch_aladin_books(query_type: str, max_results: int = 50, start: int = 1, *
     }
     params.update(extra)
     base_url = _resolve_aladin_base_url(query_type)
-    resp = requests.get(base_url, params=params, timeout=10)
+    cache = cache or get_cache()
+    if cache.mode == 'off':
+        return _request(base_url, params).json().get('item', [])
+
+    key = cache_key(base_url.rsplit('/', 1)[-1], params)
+    entry = cache.load(query_type, key)
+    if cache.mode == 'replay':
+        if entry is None:
+            raise AladinReplayMiss(f'no recorded Aladin response for {query_type} start={params["start"]} '
+                                   f'MaxResults={params["MaxResults"]} in {cache.directory}')
+        cache.count('hits')
+        return entry['body'].get('item', [])
+
+    if entry is not None and cache.is_fresh(query_type, entry):
+        cache.count('hits')
+        return entry['body'].get('item', [])
+
+    headers = {}
+    if entry is not None:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    resp = _request(base_url, params, headers=headers)
+    if resp.status_code == 304 and entry is not None:
+        cache.count('revalidated')
+        entry['fetched_at'] = time.time()
+        cache.store(query_type, key, entry)
+        return entry['body'].get('item', [])
+
+    cache.count('fetched')
+    data = resp.json()
+    cache.store(query_type, key, {
+        'query_type': query_type,
+        'params': {k: v for k, v in params.items() if k.lower() != 'ttbkey'},
+        'fetched_at': time.time(),
+        'etag': resp.headers.get('ETag'),
+        'last_modified': resp.headers.get('Last-Modified'),
+        'body': data,
+    })
+    return data.get('item', [])
+
+
+def _request(base_url: str, params: dict, headers: dict | None = None) -> requests.Response:
+    resp = clients.aladin_session().get(base_url, params=params, headers=headers,
+                                        timeout=clients.timeout('aladin'))
+    if resp.status_code == 304:
+        return resp
     resp.raise_for_status()
     data = resp.json()
     if data.get('errorCode') not in (None, '0'):
+        # Error payloads are never recorded.
         raise RuntimeError(f"Aladin API error {data['errorCode']}: {data.get('errorMessage')}")
-    return data.get('item', [])
+    return resp
 
 
-def _fetch_all(query_type: str, total: int = 50, per_page: int = 50, **extra):
-    """Fetch up to `total` items across pages."""
+def iter_source_pages(query_types, total: int = 50, per_page: int = 50, parallelism: int | None = None,
+                      cache=None, **extra):
+    """Fetch every page of every source concurrently; yield `(query_type, items)` per page.
+
+    Up to `parallelism` requests (default `settings.ALADIN_MAX_PARALLEL`) run at once
+    over the pooled session. Pages are yielded in (source, page) order as soon as
+    they and everything before them have arrived, so consumers can start upserting
+    early while keeping the same precedence as a sequential run.
+
+    Per source, items are de-duplicated by ISBN and trimmed to `total`, and pages
+    after the first empty one are dropped — the same rules as `_fetch_all`.
+    All pages share one `cache` (default: configured from settings). When a page
+    fails (or the consumer stops early) the pages not yet started are cancelled
+    before the error propagates.
+    """
     total = max(1, int(total))
     per_page = _clamp_max_results(per_page)
     pages = (total + per_page - 1) // per_page
-
+    if parallelism is None:
+        parallelism = int(getattr(settings, 'ALADIN_MAX_PARALLEL', 4))
+    parallelism = max(1, int(parallelism))
+    cache = cache or get_cache()
+
+    with ThreadPoolExecutor(max_workers=parallelism) as pool:
+        plan = [
+            (qt, pool.submit(fetch_aladin_books, qt, max_results=per_page, start=page, cache=cache, **extra))
+            for qt in query_types
+            for page in range(1, pages + 1)
+        ]
+
+        state = {qt: {'seen': set(), 'count': 0, 'done': False} for qt in query_types}
+        try:
+            for qt, fut in plan:
+                st = state[qt]
+                if st['done']:
+                    fut.cancel()
+                    continue
+                items = fut.result()
+                if not items:
+                    st['done'] = True
+                    continue
+
+                unique = []
+                for b in items:
+                    isbn = b.get('isbn')
+                    if not isbn or isbn in st['seen']:
+                        continue
+                    st['seen'].add(isbn)
+                    unique.append(b)
+                    st['count'] += 1
+                    if st['count'] >= total:
+                        st['done'] = True
+                        break
+                if unique:
+                    yield qt, unique
+        finally:
+            # Error or early close: don't fetch (or wait for) pages nobody will read.
+            for _, fut in plan:
+                fut.cancel()
+
+
+def _fetch_all(query_type: str, total: int = 50, per_page: int = 50, parallelism: int | None = None, **extra):
+    """Fetch up to `total` items across pages."""
     agg = []
-    for page in range(1, pages + 1):
-        items = fetch_aladin_books(query_type, max_results=per_page, start=page, **extra)
-        if not items:
-            break
+    for _, items in iter_source_pages([query_type], total=total, per_page=per_page,
+                                      parallelism=parallelism, **extra):
         agg.extend(items)
-
-    # De-duplicate by ISBN and trim to requested total.
-    seen = set()
-    unique = []
-    for b in agg:
-        isbn = b.get('isbn')
-        if not isbn:
-            continue
-        if isbn in seen:
-            continue
-        seen.add(isbn)
-        unique.append(b)
-        if len(unique) >= total:
-            break
-    return unique
+    return agg
 
 def fetch_best_sellers_all(total: int = 50, per_page: int = 50):
     return _fetch_all('Bestseller', total=total, per_page=per_page)
@@ -99,4 +200,8 @@ def fetch_new_items_all(total: int = 50, per_page: int = 50):
     return _fetch_all('ItemNewAll', total=total, per_page=per_page)
 
 def fetch_editor_picks_all(total: int = 50, per_page: int = 50):
-    return _fetch_all('BlogBest', total=total, per_page=per_page)
\ No newline at end of file
+    return _fetch_all('BlogBest', total=total, per_page=per_page)
+
+def fetch_best_sellers(total: int = 10, per_page: int = 10):
+    """Convenience wrapper returning the top `total` bestsellers (default 10)."""
+    return _fetch_all('Bestseller', total=total, per_page=per_page)
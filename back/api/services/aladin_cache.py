@@ -0,0 +1,107 @@
+"""On-disk cache / recorder for Aladin API responses.
+
+Entries live at `<dir>/<QueryType>/<key>.json` where `key` is a sha256 of the
+endpoint name and the sorted request parameters *without* `ttbkey`, so the same
+recording works for any API key and host. Each entry keeps the parsed response
+body plus `fetched_at` and any `ETag` / `Last-Modified` validators.
+
+Modes:
+- `cache`  (default): serve fresh entries (per-QueryType TTL); when stale,
+  revalidate with `If-None-Match` / `If-Modified-Since` if validators exist,
+  otherwise refetch. Successful responses are (re)recorded.
+- `replay`: serve only recorded entries, never touch the network; a missing
+  entry raises `AladinReplayMiss`. Staleness is ignored.
+- `off`: always fetch, never read or write the cache.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+
+MODES = ('cache', 'replay', 'off')
+
+DEFAULT_TTLS = {
+    'Bestseller': 6 * 3600,
+    'ItemNewAll': 12 * 3600,
+    'BlogBest':   24 * 3600,
+}
+
+
+class AladinReplayMiss(LookupError):
+    """Replay mode was asked for a response that was never recorded."""
+
+
+def cache_key(endpoint: str, params: dict) -> str:
+    public = {k: str(v) for k, v in params.items() if k.lower() != 'ttbkey'}
+    raw = json.dumps([endpoint, sorted(public.items())], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class CacheCounters:
+    hits: int = 0
+    revalidated: int = 0
+    fetched: int = 0
+
+    @property
+    def network_calls(self) -> int:
+        return self.revalidated + self.fetched
+
+
+class AladinCache:
+    def __init__(self, directory=None, mode: str | None = None, ttls: dict | None = None,
+                 default_ttl: float | None = None):
+        self.directory = Path(directory or getattr(settings, 'ALADIN_CACHE_DIR',
+                                                   Path(settings.BASE_DIR) / 'var' / 'aladin_cache'))
+        self.mode = mode or getattr(settings, 'ALADIN_CACHE_MODE', 'cache')
+        if self.mode not in MODES:
+            raise ValueError(f'unknown Aladin cache mode {self.mode!r} (expected one of {MODES})')
+        self.ttls = {**DEFAULT_TTLS, **(ttls if ttls is not None else getattr(settings, 'ALADIN_CACHE_TTL', {}))}
+        self.default_ttl = float(default_ttl if default_ttl is not None
+                                 else getattr(settings, 'ALADIN_CACHE_DEFAULT_TTL', 3600))
+        self.counters = CacheCounters()
+        self._lock = threading.Lock()
+
+    def ttl(self, query_type: str) -> float:
+        return float(self.ttls.get(query_type, self.default_ttl))
+
+    def path(self, query_type: str, key: str) -> Path:
+        return self.directory / (query_type or '_') / f'{key}.json'
+
+    def load(self, query_type: str, key: str) -> dict | None:
+        try:
+            with open(self.path(query_type, key), encoding='utf-8') as fh:
+                return json.load(fh)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def store(self, query_type: str, key: str, entry: dict) -> None:
+        target = self.path(query_type, key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=target.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+                json.dump(entry, fh, ensure_ascii=False)
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def is_fresh(self, query_type: str, entry: dict) -> bool:
+        return time.time() - float(entry.get('fetched_at', 0)) < self.ttl(query_type)
+
+    def count(self, field: str) -> None:
+        with self._lock:
+            setattr(self.counters, field, getattr(self.counters, field) + 1)
+
+
+def get_cache() -> AladinCache:
+    """Cache configured from settings (`ALADIN_CACHE_DIR`, `ALADIN_CACHE_MODE`, TTLs)."""
+    return AladinCache()
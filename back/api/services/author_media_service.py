@@ -1,6 +1,7 @@
-import os, json, re, requests
+import os, json, re
 from django.conf import settings
-from openai import OpenAI
+
+from api.services import clients, llm_cache
 
 
 def _strip_code_fences(text: str) -> str:
@@ -88,48 +89,15 @@ def _parse_author_info_payload(raw_text: str) -> dict:
     return {"author_info": "", "author_works": []}
 
 
-def _looks_like_openai_key(value: str | None) -> bool:
-    if not value:
-        return False
-    return value.startswith('sk-')
-
-
-def _get_openai_client() -> OpenAI | None:
-    model = getattr(settings, 'OPENAI_MODEL', None) or os.getenv('OPENAI_MODEL') or 'gpt-5-mini'
-    openai_api_key = getattr(settings, 'OPENAI_API_KEY', None) or os.getenv('OPENAI_API_KEY')
-    gms_key = getattr(settings, 'GMS_KEY', None) or os.getenv('GMS_KEY')
-    base_url = getattr(settings, 'OPENAI_BASE_URL', None) or os.getenv('OPENAI_BASE_URL')
-
-    DEFAULT_GMS_BASE_URL = 'https://gms.ssafy.io/gmsapi/api.openai.com/v1'
-
-    if not base_url:
-        if gms_key:
-            base_url = DEFAULT_GMS_BASE_URL
-        elif openai_api_key and not _looks_like_openai_key(openai_api_key):
-            base_url = DEFAULT_GMS_BASE_URL
-
-    if base_url == DEFAULT_GMS_BASE_URL:
-        api_key = gms_key or openai_api_key
-    else:
-        api_key = openai_api_key or gms_key
-
-    if not api_key:
-        return None
-
-    # Store model on the client instance for convenience.
-    client = OpenAI(api_key=api_key, base_url=base_url) if base_url else OpenAI(api_key=api_key)
-    client._livria_model = model  # type: ignore[attr-defined]
-    return client
-
 def get_wikipedia_author_image(full_name: str) -> str:
     name = re.sub(r'\s*\(.*?\)', '', full_name).strip()
-    url = "https://ko.wikipedia.org/w/api.php"
     params = {
         "action":"query","format":"json","prop":"pageimages",
         "titles":name,"piprop":"original","origin":"*",
     }
     try:
-        r = requests.get(url, params=params, timeout=5)
+        r = clients.wikipedia_session().get(clients.WIKIPEDIA_API_URL, params=params,
+                                            timeout=clients.timeout('wikipedia'))
         pages = r.json().get("query", {}).get("pages", {})
         for p in pages.values():
             if "original" in p:
@@ -140,11 +108,12 @@ def get_wikipedia_author_image(full_name: str) -> str:
 
 def get_author_info(full_name: str) -> dict:
     name = re.sub(r'\s*\(.*?\)', '', full_name).strip()
-    client = _get_openai_client()
+    config = clients.openai_config()
+    client = clients.openai_client(config)
     if client is None:
         return {"author_info": "", "author_works": []}
 
-    model = getattr(client, '_livria_model', 'gpt-5-mini')
+    model = config.model
     system  = (
         "너는 작가 정보를 생성하는 API다. 반드시 JSON 오브젝트만 출력한다. "
         "추가 설명, 마크다운, 코드펜스, 머리말/꼬리말 없이 JSON만 출력한다.\n"
@@ -157,21 +126,30 @@ def get_author_info(full_name: str) -> dict:
         {"role":"system", "content": system},
         {"role":"user",   "content": name},
     ]
-    # NOTE: On gpt-5-mini via GMS, chat.completions often returns empty message.content.
-    # Use the Responses API instead.
-    resp = client.responses.create(
-        model=model,
-        input=messages,
-        max_output_tokens=450,
-        reasoning={"effort": "minimal"},
-        text={"verbosity": "low"},
-    )
 
-    raw = (getattr(resp, "output_text", "") or "").strip()
-    parsed = _parse_author_info_payload(raw)
-
-    if bool(os.getenv("AUTHOR_ENRICH_DEBUG")) and not (parsed.get("author_info") or "").strip():
-        # Keep logs short to avoid leaking content/secrets.
-        print("[author_enrich] parse_empty; raw_preview=", raw[:200].replace("\n", " "))
-
-    return parsed
+    def _ask():
+        # NOTE: On gpt-5-mini via GMS, chat.completions often returns empty message.content.
+        # Use the Responses API instead.
+        resp = client.responses.create(
+            model=model,
+            input=messages,
+            max_output_tokens=450,
+            reasoning={"effort": "minimal"},
+            text={"verbosity": "low"},
+        )
+
+        raw = (getattr(resp, "output_text", "") or "").strip()
+        parsed = _parse_author_info_payload(raw)
+
+        if bool(os.getenv("AUTHOR_ENRICH_DEBUG")) and not (parsed.get("author_info") or "").strip():
+            # Keep logs short to avoid leaking content/secrets.
+            print("[author_enrich] parse_empty; raw_preview=", raw[:200].replace("\n", " "))
+
+        return parsed
+
+    # Empty summaries are returned as-is but never cached.
+    key = llm_cache.prompt_key("author_info", model, system + "\n" + name)
+    return llm_cache.get_or_set(
+        "author_info", key, _ask, model=model,
+        cacheable=lambda parsed: bool((parsed.get("author_info") or "").strip()),
+    )
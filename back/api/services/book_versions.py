@@ -0,0 +1,45 @@
+"""Per-book modification times for conditional GETs.
+
+`Book.updated_at` moves whenever the book's detail response would change:
+its own fields (`auto_now`), its reviews, its similar-book links, the names of
+its author/category/genre and the reviewers' nicknames/avatars (`api.signals`),
+popularity flushes and the sync commands (`touch`). A detail response also
+embeds its similar books' titles and covers, so its validator is the newest
+`updated_at` among the book and those books, plus how many there are, which
+ones (sum of their ids) and the book's `global_recommend_count` — so a count or
+similar list written without `updated_at` still changes it. One aggregate
+query, no serialization.
+"""
+
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+_ID_BATCH = 900
+
+
+def touch(book_ids) -> None:
+    """Mark `book_ids` as modified now (for writes that bypass `Book.save()`)."""
+    from api.models import Book
+
+    book_ids = list(book_ids)
+    now = timezone.now()
+    for s in range(0, len(book_ids), _ID_BATCH):
+        Book.objects.filter(id__in=book_ids[s:s + _ID_BATCH]).update(updated_at=now)
+
+
+def detail_version(book_id):
+    """`(last_modified, parts)` of the book and its similar books, or None if the book does not exist.
+
+    `parts` are the other ETag parts: `(n, id_sum, global_recommend_count)`.
+    """
+    from api.models import Book
+
+    similar = Book.similar_books.through.objects.filter(from_book_id=book_id).values('to_book_id')
+    row = Book.objects.filter(Q(id=book_id) | Q(id__in=similar)).aggregate(
+        modified=Max('updated_at'), n=Count('id'), ids=Sum('id'),
+        count=Max('global_recommend_count', filter=Q(id=book_id)),
+        exists=Count('id', filter=Q(id=book_id)),
+    )
+    if not row['exists']:
+        return None
+    return row['modified'], (row['n'], row['ids'], row['count'])
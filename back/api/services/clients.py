@@ -0,0 +1,225 @@
+"""Process-wide clients for the upstream APIs (OpenAI/GMS, Upstage, Aladin, Wikipedia).
+
+Call sites used to build a client per request — a new connection pool, a new
+TLS handshake and, for OpenAI, the base URL / key resolution every time. Here
+each upstream gets one keep-alive client per process, with its own timeout and
+pool size from settings (`OPENAI_TIMEOUT`, `UPSTAGE_POOL_SIZE`, ...).
+
+Clients are cached per configuration: the key includes the resolved
+credentials and the SDK class, so changed settings (or a patched SDK in tests)
+get a fresh client instead of a stale one. Sync clients are shared across
+threads (the OpenAI SDK and `requests.Session` GETs are thread-safe); async
+clients are kept per event loop, because an async connection pool is bound to
+the loop that opened it.
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_GMS_BASE_URL = 'https://gms.ssafy.io/gmsapi/api.openai.com/v1'
+DEFAULT_UPSTAGE_BASE_URL = 'https://api.upstage.ai/v1'
+WIKIPEDIA_API_URL = 'https://ko.wikipedia.org/w/api.php'
+
+_clients: dict[tuple, object] = {}
+_async_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]' = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _setting(name, default=None):
+    """`settings.<name>` when defined (None included), else the environment, else `default`."""
+    if hasattr(settings, name):
+        return getattr(settings, name)
+    return os.getenv(name, default)
+
+
+def timeout(upstream: str) -> float:
+    """Request timeout (seconds) for `upstream`: 'openai', 'upstage', 'aladin' or 'wikipedia'."""
+    defaults = {'openai': 60.0, 'upstage': 30.0, 'aladin': 10.0, 'wikipedia': 5.0}
+    return float(_setting(f'{upstream.upper()}_TIMEOUT', defaults[upstream]))
+
+
+def pool_size(upstream: str) -> int:
+    if upstream == 'aladin':
+        return max(1, int(getattr(settings, 'ALADIN_MAX_PARALLEL', 4)))
+    defaults = {'openai': 100, 'upstage': 16, 'wikipedia': 8}
+    return max(1, int(_setting(f'{upstream.upper()}_POOL_SIZE', defaults[upstream])))
+
+
+# ── OpenAI / GMS ───────────────────────────────────────────────────────────
+def looks_like_openai_key(value: str | None) -> bool:
+    if not value:
+        return False
+    # Common OpenAI key prefixes
+    return value.startswith('sk-')
+
+
+@dataclass(frozen=True)
+class OpenAIConfig:
+    model: str
+    api_key: str | None
+    base_url: str | None
+
+
+def openai_config() -> OpenAIConfig:
+    """Model, key and base URL for chat/responses calls (settings first, then the environment)."""
+    model = _setting('OPENAI_MODEL') or 'gpt-5-mini'
+    openai_api_key = _setting('OPENAI_API_KEY')
+    gms_key = _setting('GMS_KEY')
+    base_url = _setting('OPENAI_BASE_URL')
+
+    # Decide which base_url to use.
+    # - If OPENAI_BASE_URL is explicitly set, respect it.
+    # - Else if GMS_KEY is set, assume SSAFY GMS proxy.
+    # - Else if the provided OPENAI_API_KEY does NOT look like an OpenAI key, assume it's actually a GMS key.
+    if not base_url:
+        if gms_key:
+            base_url = DEFAULT_GMS_BASE_URL
+        elif openai_api_key and not looks_like_openai_key(openai_api_key):
+            base_url = DEFAULT_GMS_BASE_URL
+
+    # Decide which key to use for the chosen base_url.
+    if base_url == DEFAULT_GMS_BASE_URL:
+        api_key = gms_key or openai_api_key
+    else:
+        api_key = openai_api_key or gms_key
+    return OpenAIConfig(model=model, api_key=api_key, base_url=base_url)
+
+
+def _http_client(openai_module, upstream: str, is_async: bool = False):
+    """Keep-alive transport sized for `upstream`, or None to use the SDK's default pool."""
+    try:
+        import httpx
+    except ModuleNotFoundError:
+        return None
+    size = pool_size(upstream)
+    limits = httpx.Limits(max_connections=size, max_keepalive_connections=size)
+    cls = openai_module.DefaultAsyncHttpxClient if is_async else openai_module.DefaultHttpxClient
+    return cls(limits=limits, timeout=timeout(upstream))
+
+
+def _build(cls_name: str, upstream: str, api_key, base_url, **client_kwargs):
+    import openai
+
+    kwargs = {'api_key': api_key, 'timeout': timeout(upstream), **client_kwargs}
+    if base_url:
+        kwargs['base_url'] = base_url
+    http_client = _http_client(openai, upstream, is_async=cls_name == 'AsyncOpenAI')
+    if http_client is not None:
+        kwargs['http_client'] = http_client
+    return getattr(openai, cls_name)(**kwargs)
+
+
+def _cached(store: dict, key: tuple, factory):
+    with _lock:
+        client = store.get(key)
+        if client is None:
+            client = store[key] = factory()
+    return client
+
+
+def _sdk_class(cls_name: str):
+    try:
+        import openai
+    except ModuleNotFoundError:
+        return None
+    return getattr(openai, cls_name)
+
+
+def openai_client(config: OpenAIConfig | None = None):
+    """Shared sync client for `config` (default: `openai_config()`); None without a key or SDK."""
+    config = config or openai_config()
+    cls = _sdk_class('OpenAI')
+    if cls is None or not config.api_key:
+        return None
+    key = ('openai', cls, config.api_key, config.base_url)
+    return _cached(_clients, key, lambda: _build('OpenAI', 'openai', config.api_key, config.base_url))
+
+
+def _loop_clients() -> dict:
+    loop = asyncio.get_running_loop()
+    with _lock:
+        per_loop = _async_clients.get(loop)
+        if per_loop is None:
+            per_loop = _async_clients[loop] = {}
+    return per_loop
+
+
+def async_openai_client(config: OpenAIConfig | None = None):
+    """`AsyncOpenAI` shared by the coroutines of the running event loop."""
+    config = config or openai_config()
+    cls = _sdk_class('AsyncOpenAI')
+    if cls is None or not config.api_key:
+        return None
+    key = ('openai', cls, config.api_key, config.base_url)
+    return _cached(_loop_clients(), key, lambda: _build('AsyncOpenAI', 'openai', config.api_key, config.base_url))
+
+
+# ── Upstage (OpenAI-compatible embeddings) ─────────────────────────────────
+def upstage_client(**client_kwargs):
+    """Shared Upstage client; `client_kwargs` (e.g. `max_retries=0`) select a separate instance."""
+    cls = _sdk_class('OpenAI')
+    api_key, base_url = _upstage_credentials(cls)
+    key = ('upstage', cls, api_key, base_url, tuple(sorted(client_kwargs.items())))
+    return _cached(_clients, key, lambda: _build('OpenAI', 'upstage', api_key, base_url, **client_kwargs))
+
+
+def _upstage_credentials(cls):
+    if cls is None:
+        raise ModuleNotFoundError(
+            "Missing optional dependency 'openai'. Install it to enable embeddings: pip install openai"
+        )
+    api_key = os.getenv('UPSTAGE_API_KEY')
+    if not api_key:
+        raise RuntimeError("UPSTAGE_API_KEY is not set; cannot create Upstage embedding client")
+    return api_key, os.getenv('UPSTAGE_BASE_URL') or DEFAULT_UPSTAGE_BASE_URL
+
+
+def async_upstage_client():
+    """`AsyncOpenAI` for Upstage embeddings, shared by the coroutines of the running event loop."""
+    cls = _sdk_class('AsyncOpenAI')
+    api_key, base_url = _upstage_credentials(cls)
+    key = ('upstage', cls, api_key, base_url)
+    return _cached(_loop_clients(), key, lambda: _build('AsyncOpenAI', 'upstage', api_key, base_url))
+
+
+# ── plain HTTP (Aladin, Wikipedia) ─────────────────────────────────────────
+def _session(pool: int, retries: int) -> requests.Session:
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def aladin_session() -> requests.Session:
+    """Keep-alive session for Aladin; 5xx/connect/read failures are retried with backoff."""
+    pool = pool_size('aladin')
+    retries = int(getattr(settings, 'ALADIN_MAX_RETRIES', 3))
+    return _cached(_clients, ('aladin', pool, retries), lambda: _session(pool, retries))
+
+
+def wikipedia_session() -> requests.Session:
+    pool = pool_size('wikipedia')
+    return _cached(_clients, ('wikipedia', pool), lambda: _session(pool, retries=1))
+
+
+def reset() -> None:
+    """Drop every cached client (tests; after changing credentials at runtime)."""
+    with _lock:
+        _clients.clear()
+        _async_clients.clear()
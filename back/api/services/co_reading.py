@@ -0,0 +1,258 @@
+"""Item-item collaborative filtering over the favorites / read_books tables.
+
+A user "read" a book if it is on either shelf. Edges are streamed from the two
+m2m through tables into int64 arrays (16 bytes per edge), turned into a binary
+sparse user × book matrix `X`, and book-book co-occurrence is computed block by
+block as `X.T[rows] @ X`, so peak memory is the matrix plus one block of sparse
+co-occurrence rows, never the full book × book product. Similarity is cosine on
+the binary vectors::
+
+    score(a, b) = common(a, b) / sqrt(readers(a) * readers(b))
+
+and the top `ALSO_READ_TOP_K` neighbours per book are stored in `AlsoRead`.
+
+Shelf changes mark the touched books in `AlsoReadDirty` (see `api.signals`);
+`update_dirty()` rescores only the rows those edges can change — the dirty
+books, the books co-read with them, and the books that listed them before —
+from the edges of those books' readers only, with each column's reader count
+taken from one grouped query instead of the loaded edges.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from scipy import sparse
+
+EDGE_CHUNK = 50000
+WRITE_BATCH = 5000
+_ID_BATCH = 900  # SQLite's bound-variable limit, with room to spare
+
+
+@dataclass
+class CoReadStats:
+    edges: int = 0
+    users: int = 0
+    books: int = 0
+    rows: int = 0
+    links: int = 0
+
+
+def _top_k() -> int:
+    return max(1, int(getattr(settings, 'ALSO_READ_TOP_K', 20)))
+
+
+def _min_common() -> int:
+    return max(1, int(getattr(settings, 'ALSO_READ_MIN_COMMON', 1)))
+
+
+def _throughs():
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    return User.favorites.through, User.read_books.through
+
+
+def _batches(ids):
+    ids = sorted(ids)
+    return [ids[s:s + _ID_BATCH] for s in range(0, len(ids), _ID_BATCH)]
+
+
+def load_edges(chunk_size: int = EDGE_CHUNK, user_ids=None) -> tuple[np.ndarray, np.ndarray]:
+    """(user_ids, book_ids) of every favorite and read edge (or only `user_ids`' edges), streamed in chunks."""
+    parts = []
+    for through in _throughs():
+        querysets = ([through.objects.order_by()] if user_ids is None else
+                     [through.objects.order_by().filter(user_id__in=batch) for batch in _batches(user_ids)])
+        buf = []
+        for qs in querysets:
+            for row in qs.values_list('user_id', 'book_id').iterator(chunk_size=chunk_size):
+                buf.append(row)
+                if len(buf) >= chunk_size:
+                    parts.append(np.array(buf, dtype=np.int64))
+                    buf = []
+        if buf:
+            parts.append(np.array(buf, dtype=np.int64))
+    if not parts:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    edges = np.concatenate(parts)
+    return edges[:, 0], edges[:, 1]
+
+
+def reader_ids(book_ids) -> set[int]:
+    """Users with `book_ids` on either shelf."""
+    users = set()
+    for through in _throughs():
+        for batch in _batches(book_ids):
+            users.update(through.objects.filter(book_id__in=batch).values_list('user_id', flat=True))
+    return users
+
+
+def reader_counts(books: np.ndarray) -> np.ndarray:
+    """Distinct readers (either shelf) of each id in `books`, one grouped query per id batch."""
+    favorites, read = (t._meta.db_table for t in _throughs())
+    counts = {}
+    for batch in _batches(books.tolist()):
+        marks = ', '.join(['%s'] * len(batch))
+        sql = (f'SELECT book_id, COUNT(*) FROM ('
+               f'SELECT user_id, book_id FROM {favorites} WHERE book_id IN ({marks}) UNION '
+               f'SELECT user_id, book_id FROM {read} WHERE book_id IN ({marks})) GROUP BY book_id')
+        with connection.cursor() as cursor:
+            cursor.execute(sql, batch + batch)
+            counts.update(cursor.fetchall())
+    return np.array([counts.get(b, 0) for b in books.tolist()], dtype=np.float64)
+
+
+def build_matrix(user_ids: np.ndarray, book_ids: np.ndarray):
+    """Binary CSR user × book matrix and the Book.id of each column (sorted)."""
+    users, u_idx = np.unique(user_ids, return_inverse=True)
+    books, b_idx = np.unique(book_ids, return_inverse=True)
+    X = sparse.csr_matrix(
+        (np.ones(len(u_idx), dtype=np.float32), (u_idx, b_idx)),
+        shape=(len(users), len(books)),
+    )
+    X.sum_duplicates()
+    X.data[:] = 1.0  # favorite + read of the same book is still one reader
+    return X, books
+
+
+def iter_neighbours(X, rows, k: int, min_common: int = 1, block_size: int = 1024, readers=None):
+    """Yield `(row, cols, scores, common)` — top-k neighbours of each column index in `rows`.
+
+    `readers` is each column's reader count when `X` holds only some users' edges.
+    """
+    Xt = X.T.tocsr()
+    if readers is None:
+        readers = np.diff(Xt.indptr).astype(np.float64)
+    rows = np.asarray(rows, dtype=np.int64)
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        co = (Xt[block] @ X).tocsr()
+        for r, row in enumerate(block.tolist()):
+            lo, hi = co.indptr[r], co.indptr[r + 1]
+            cols = co.indices[lo:hi]
+            common = co.data[lo:hi]
+            keep = (cols != row) & (common >= min_common)
+            cols, common = cols[keep], common[keep]
+            if cols.size == 0:
+                yield row, cols, np.empty(0), common
+                continue
+            scores = common / np.sqrt(readers[row] * readers[cols])
+            if cols.size > k:
+                # keep everything tied with the k-th score so the cut below is deterministic
+                kth = np.partition(scores, cols.size - k)[cols.size - k]
+                keep = scores >= kth
+                cols, common, scores = cols[keep], common[keep], scores[keep]
+            # best first; ties broken by more co-readers, then by column (= Book.id order)
+            order = np.lexsort((cols, -common, -scores))[:k]
+            yield row, cols[order], scores[order], common[order]
+
+
+def _columns(books: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Column indices of `ids` in the sorted `books` array (ids without readers are dropped)."""
+    if not len(books):
+        return np.empty(0, dtype=np.int64)
+    pos = np.minimum(np.searchsorted(books, ids), len(books) - 1)
+    return pos[books[pos] == ids]
+
+
+def _links(X, books, rows, k, min_common, block_size, readers=None):
+    from api.models import AlsoRead
+
+    for row, cols, scores, common in iter_neighbours(X, rows, k, min_common, block_size, readers):
+        book_id = int(books[row])
+        for col, score, n in zip(cols.tolist(), scores.tolist(), common.tolist()):
+            yield AlsoRead(book_id=book_id, other_id=int(books[col]), score=score, common=int(n))
+
+
+def _write(links, stats: CoReadStats) -> None:
+    from api.models import AlsoRead
+
+    batch = []
+    for link in links:
+        batch.append(link)
+        if len(batch) >= WRITE_BATCH:
+            AlsoRead.objects.bulk_create(batch)
+            stats.links += len(batch)
+            batch = []
+    if batch:
+        AlsoRead.objects.bulk_create(batch)
+        stats.links += len(batch)
+
+
+def _clear_dirty(book_ids) -> None:
+    from api.models import AlsoReadDirty
+
+    book_ids = list(book_ids)
+    for s in range(0, len(book_ids), _ID_BATCH):
+        AlsoReadDirty.objects.filter(book_id__in=book_ids[s:s + _ID_BATCH]).delete()
+
+
+def rebuild(k: int | None = None, min_common: int | None = None, block_size: int = 1024,
+            chunk_size: int = EDGE_CHUNK) -> CoReadStats:
+    """Recompute every book's neighbours from all edges and replace `AlsoRead`."""
+    from api.models import AlsoRead, AlsoReadDirty
+
+    k, min_common = k or _top_k(), min_common or _min_common()
+    dirty = list(AlsoReadDirty.objects.values_list('book_id', flat=True))
+    users, books_col = load_edges(chunk_size)
+    X, books = build_matrix(users, books_col)
+    stats = CoReadStats(edges=len(users), users=X.shape[0], books=X.shape[1], rows=X.shape[1])
+    with transaction.atomic():
+        AlsoRead.objects.all().delete()
+        _write(_links(X, books, np.arange(X.shape[1]), k, min_common, block_size), stats)
+        _clear_dirty(dirty)
+    return stats
+
+
+def update_dirty(k: int | None = None, min_common: int | None = None, block_size: int = 1024,
+                 chunk_size: int = EDGE_CHUNK) -> CoReadStats:
+    """Rescore only the rows affected by shelf changes since the last run."""
+    from api.models import AlsoRead, AlsoReadDirty
+
+    k, min_common = k or _top_k(), min_common or _min_common()
+    dirty = np.array(sorted(AlsoReadDirty.objects.values_list('book_id', flat=True)), dtype=np.int64)
+    if dirty.size == 0:
+        return CoReadStats()
+
+    # Rows that can change: the dirty books, every book co-read with them now,
+    # and every book that listed them before (the co-reading may be gone).
+    dirty_list = dirty.tolist()
+    affected = set(dirty_list)
+    _, co_read = load_edges(chunk_size, user_ids=reader_ids(dirty_list))
+    affected.update(co_read.tolist())
+    for batch in _batches(dirty_list):
+        affected.update(AlsoRead.objects.filter(other_id__in=batch).values_list('book_id', flat=True))
+
+    # Rescoring a row needs every edge of its readers, and every column's reader count.
+    users, books_col = load_edges(chunk_size, user_ids=reader_ids(affected))
+    X, books = build_matrix(users, books_col)
+    stats = CoReadStats(edges=len(users), users=X.shape[0], books=X.shape[1])
+    affected_ids = np.array(sorted(affected), dtype=np.int64)
+    rows = _columns(books, affected_ids)
+    stats.rows = len(affected_ids)
+    readers = reader_counts(books)
+
+    with transaction.atomic():
+        for batch in _batches(affected):
+            AlsoRead.objects.filter(book_id__in=batch).delete()
+        _write(_links(X, books, rows, k, min_common, block_size, readers), stats)
+        _clear_dirty(dirty_list)
+    return stats
+
+
+def mark_dirty(book_ids) -> None:
+    from api.models import AlsoReadDirty
+
+    book_ids = set(book_ids)
+    if book_ids:
+        AlsoReadDirty.objects.bulk_create([AlsoReadDirty(book_id=b) for b in book_ids], ignore_conflicts=True)
+
+
+def neighbour_ids(book_id, limit: int = 10) -> list[int]:
+    from api.models import AlsoRead
+
+    return list(AlsoRead.objects.filter(book_id=book_id).order_by('-score', '-common', 'other_id')
+                .values_list('other_id', flat=True)[:limit])
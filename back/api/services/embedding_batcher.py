@@ -0,0 +1,214 @@
+"""Batched, concurrent Upstage embedding with rate limiting and retries.
+
+`embed_texts()` splits texts into batches (one HTTP request each), keeps at most
+`concurrency` requests in flight, spaces request starts to `rps` per second and
+retries transient failures (429 / 5xx / connection errors) with exponential
+backoff. `embed_books()` builds on it and writes vectors back with `bulk_update`
+one window of books at a time.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from api.services.embedding_cache import (
+    CacheStats,
+    book_embedding_key,
+    book_embedding_text,
+    embedding_key,
+    lookup_many,
+    store_many,
+)
+from api.utils import _get_upstage_client, get_upstage_embeddings
+
+
+class RateLimiter:
+    """Thread-safe spacing of request starts to at most `rps` per second (0 = unlimited)."""
+
+    def __init__(self, rps: float = 0):
+        self.interval = 1.0 / rps if rps and rps > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _is_retryable(exc: Exception) -> bool:
+    status = getattr(exc, 'status_code', None)
+    if status is None:
+        response = getattr(exc, 'response', None)
+        status = getattr(response, 'status_code', None)
+    if status is None:
+        # Connection errors / timeouts carry no status code.
+        return True
+    return status == 429 or status >= 500
+
+
+@dataclass
+class EmbeddingStats:
+    requested: int = 0
+    embedded: int = 0
+    failed: int = 0
+    requests: int = 0
+    retries: int = 0
+    cache_hits: int = 0
+    deduped: int = 0
+
+    @property
+    def api_calls_saved(self) -> int:
+        """Texts that did not need an embedding request (cache hits + identical texts)."""
+        return self.cache_hits + self.deduped
+
+
+def embed_texts(texts: list[str], *, batch_size: int = 64, concurrency: int = 4, rps: float = 0,
+                max_retries: int = 5, backoff: float = 1.0, max_backoff: float = 30.0,
+                client=None, on_batch=None, stats: EmbeddingStats | None = None):
+    """Embed `texts`, returning a list aligned with the input (None where a batch failed).
+
+    `on_batch(indices, vectors)` is called from the worker thread as each batch succeeds.
+    """
+    stats = stats if stats is not None else EmbeddingStats()
+    stats.requested += len(texts)
+    results: list[list[float] | None] = [None] * len(texts)
+    if not texts:
+        return results
+
+    # Our own loop owns retries; disable the SDK's so backoff/limits are not doubled.
+    client = client or _get_upstage_client(max_retries=0)
+    limiter = RateLimiter(rps)
+    stats_lock = threading.Lock()
+    batch_size = max(1, int(batch_size))
+    batches = [list(range(i, min(len(texts), i + batch_size))) for i in range(0, len(texts), batch_size)]
+
+    def _run(indices):
+        attempt = 0
+        while True:
+            limiter.wait()
+            with stats_lock:
+                stats.requests += 1
+            try:
+                vectors = get_upstage_embeddings([texts[i] for i in indices], client=client)
+            except Exception as exc:
+                if attempt >= max_retries or not _is_retryable(exc):
+                    raise
+                delay = min(max_backoff, backoff * (2 ** attempt)) * (0.5 + random.random() / 2)
+                attempt += 1
+                with stats_lock:
+                    stats.retries += 1
+                time.sleep(delay)
+                continue
+            if len(vectors) != len(indices):
+                raise RuntimeError(f'expected {len(indices)} embeddings, got {len(vectors)}')
+            return indices, vectors
+
+    with ThreadPoolExecutor(max_workers=max(1, int(concurrency))) as pool:
+        futures = {pool.submit(_run, b): b for b in batches}
+        for fut in as_completed(futures):
+            try:
+                indices, vectors = fut.result()
+            except Exception:
+                with stats_lock:
+                    stats.failed += len(futures[fut])
+                continue
+            for i, vec in zip(indices, vectors):
+                results[i] = vec
+            with stats_lock:
+                stats.embedded += len(indices)
+            if on_batch is not None:
+                on_batch(indices, vectors)
+    return results
+
+
+def embed_books(books, window: int = 1024, **kwargs) -> EmbeddingStats:
+    """Embed `books` (model instances, any iterable) and `bulk_update` their `embedding`.
+
+    Books are processed `window` at a time so at most one window of vectors is held
+    in memory. Each window first consults the embedding cache; only distinct,
+    uncached texts are sent, concurrently per `embed_texts`.
+    """
+    from api.models import Book
+
+    stats = kwargs.pop('stats', None) or EmbeddingStats()
+    cache_stats = kwargs.pop('cache_stats', None) or CacheStats()
+    pending = []
+
+    def _flush():
+        keys = [book_embedding_key(b) for b in pending]
+        vectors_by_key = lookup_many(keys, local_stats=cache_stats)
+        stats.cache_hits += sum(1 for k in keys if k in vectors_by_key)
+
+        texts_by_key = {}
+        for book, key in zip(pending, keys):
+            if key not in vectors_by_key:
+                texts_by_key.setdefault(key, book_embedding_text(book))
+        stats.deduped += sum(1 for k in keys if k not in vectors_by_key) - len(texts_by_key)
+
+        if texts_by_key:
+            if kwargs.get('client') is None:
+                kwargs['client'] = _get_upstage_client(max_retries=0)
+            miss_keys = list(texts_by_key)
+            fresh = embed_texts([texts_by_key[k] for k in miss_keys], stats=stats, **kwargs)
+            fresh = {k: v for k, v in zip(miss_keys, fresh) if v is not None}
+            store_many(fresh)
+            vectors_by_key.update(fresh)
+
+        updated = []
+        for book, key in zip(pending, keys):
+            vec = vectors_by_key.get(key)
+            if vec is not None:
+                book.embedding = vec
+                book.embedding_key = key
+                updated.append(book)
+        if updated:
+            Book.objects.bulk_update(updated, ['embedding', 'embedding_key'], batch_size=500)
+        pending.clear()
+
+    for book in books:
+        if not book_embedding_text(book):
+            continue
+        pending.append(book)
+        if len(pending) >= window:
+            _flush()
+    if pending:
+        _flush()
+    return stats
+
+
+def iter_books_needing_embedding(ids=None, chunk: int = 1024):
+    """Yield books whose vector is missing or stale (text changed since it was embedded).
+
+    Staleness is decided in Python from `(title, description, embedding_key)` rows so
+    the large `embedding` column is never loaded. The id list is materialised first
+    so rows updated mid-run (SQLite shares one connection) never shift the iteration.
+    """
+    from django.db.models import BooleanField, ExpressionWrapper, Q
+
+    from api.models import Book
+
+    qs = Book.objects.annotate(
+        has_vec=ExpressionWrapper(Q(embedding__isnull=False), output_field=BooleanField()),
+    )
+    if ids is not None:
+        qs = qs.filter(id__in=ids)
+    rows = qs.order_by('id').values_list('id', 'title', 'description', 'embedding_key', 'has_vec')
+
+    needed = []
+    for book_id, title, description, key, has_vec in rows.iterator(chunk_size=2000):
+        text = f"{title} {description or ''}"
+        if not has_vec or key != embedding_key(text):
+            needed.append(book_id)
+
+    for start in range(0, len(needed), chunk):
+        yield from Book.objects.filter(id__in=needed[start:start + chunk]).order_by('id') \
+            .only('id', 'title', 'description', 'embedding_key')
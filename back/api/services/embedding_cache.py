@@ -0,0 +1,121 @@
+"""Content-addressed embedding cache.
+
+Vectors are stored in `EmbeddingCache` under `sha256(model + "\\0" + normalized text)`.
+`Book.embedding_key` records the key its current vector was made from, so:
+
+- a changed title/description yields a new key → the book is re-embedded;
+- identical texts (re-imported or duplicated books) share one stored vector;
+- re-embedding a previously seen text is a cache hit, not an API call.
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+
+from api.utils import UPSTAGE_EMBEDDING_MODEL
+
+_WS_RE = re.compile(r'\s+')
+
+# SQLite's default bound-variable limit is generous, but keep IN lists modest.
+_LOOKUP_CHUNK = 500
+
+
+def normalize_embedding_text(text: str | None) -> str:
+    text = unicodedata.normalize('NFC', text or '')
+    return _WS_RE.sub(' ', text).strip()
+
+
+def embedding_key(text: str, model: str = UPSTAGE_EMBEDDING_MODEL) -> str:
+    raw = f"{model}\0{normalize_embedding_text(text)}".encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()
+
+
+def book_embedding_text(book) -> str:
+    return normalize_embedding_text(f"{book.title} {book.description or ''}")
+
+
+def book_embedding_key(book, model: str = UPSTAGE_EMBEDDING_MODEL) -> str:
+    return embedding_key(book_embedding_text(book), model=model)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+# Process-wide counters (cheap visibility for long-running workers).
+stats = CacheStats()
+_stats_lock = threading.Lock()
+
+
+def _count(hits: int, misses: int, local: CacheStats | None) -> None:
+    with _stats_lock:
+        stats.hits += hits
+        stats.misses += misses
+    if local is not None:
+        local.hits += hits
+        local.misses += misses
+
+
+def lookup_many(keys, local_stats: CacheStats | None = None) -> dict[str, list[float]]:
+    """Return `{key: vector}` for cached keys (one query per chunk of keys)."""
+    from api.models import EmbeddingCache
+
+    unique = list(dict.fromkeys(keys))
+    found: dict[str, list[float]] = {}
+    for start in range(0, len(unique), _LOOKUP_CHUNK):
+        chunk = unique[start:start + _LOOKUP_CHUNK]
+        found.update(EmbeddingCache.objects.filter(key__in=chunk).values_list('key', 'vector'))
+    _count(len(found), len(unique) - len(found), local_stats)
+    return found
+
+
+def store_many(vectors: dict[str, list[float]], model: str = UPSTAGE_EMBEDDING_MODEL) -> None:
+    from api.models import EmbeddingCache
+
+    EmbeddingCache.objects.bulk_create(
+        [EmbeddingCache(key=k, model=model, vector=v) for k, v in vectors.items()],
+        ignore_conflicts=True,
+        batch_size=500,
+    )
+
+
+def get_or_embed(text: str, embed=None) -> list[float]:
+    """Single-text path: cached vector, or embed once and remember it."""
+    from api.utils import get_upstage_embedding
+
+    text = normalize_embedding_text(text)
+    key = embedding_key(text)
+    cached = lookup_many([key])
+    if key in cached:
+        return cached[key]
+    vector = (embed or get_upstage_embedding)(text)
+    store_many({key: vector})
+    return vector
+
+
+async def aget_or_embed(text: str) -> list[float]:
+    """`get_or_embed` for async views: the embedding request is awaited, only the DB reads/writes use a thread."""
+    from asgiref.sync import sync_to_async
+
+    from api.utils import aget_upstage_embedding
+
+    text = normalize_embedding_text(text)
+    key = embedding_key(text)
+    cached = await sync_to_async(lookup_many)([key])
+    if key in cached:
+        return cached[key]
+    vector = await aget_upstage_embedding(text)
+    await sync_to_async(store_many)({key: vector})
+    return vector
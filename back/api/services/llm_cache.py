@@ -0,0 +1,250 @@
+"""Persistent cache for parsed LLM answers.
+
+Only the parsed result is stored (ai_search terms, recommended titles, author
+info), never raw completions. Keys are `sha256(kind, model, normalized prompt)`;
+callers whose prompt embeds user data build a structured key instead (see
+`recommend_key`). Entries expire after `LLM_CACHE_TTL` seconds and the table
+is trimmed to `LLM_CACHE_MAX_ENTRIES`, least recently used first.
+
+Every lookup is also counted per kind in `LLMCacheCounter`, so the hit rate
+across all workers survives restarts and evictions (`manage.py llm_cache`).
+Lookup counts and the entries' `hits` / `last_used_at` are kept in memory and
+written every `LLM_CACHE_COUNT_FLUSH` lookups (and at exit, and before an
+eviction or summary), and the size limit is checked every
+`LLM_CACHE_EVICT_EVERY` puts, so a hit costs a single SELECT.
+"""
+
+import atexit
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+_WS_RE = re.compile(r'\s+')
+
+
+def normalize_prompt(prompt: str | None) -> str:
+    prompt = unicodedata.normalize('NFC', prompt or '')
+    return _WS_RE.sub(' ', prompt).strip()
+
+
+def _digest(*parts) -> str:
+    raw = json.dumps(parts, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def prompt_key(kind: str, model: str, prompt: str) -> str:
+    return _digest(kind, model, normalize_prompt(prompt))
+
+
+def recommend_key(model: str, profile: dict, favorites, read, nonce=None) -> str:
+    """Key for profile-based recommendations: same profile + shelves + nonce → same answer."""
+    profile = {k: normalize_prompt(str(v or '')) for k, v in profile.items()}
+    return _digest(
+        'recommend', model, profile,
+        [normalize_prompt(t) for t in favorites],
+        [normalize_prompt(t) for t in read],
+        str(nonce or ''),
+    )
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+# Process-wide counters.
+stats = CacheStats()
+_stats_lock = threading.Lock()
+OTHER_KIND = 'other'
+
+# Not yet written: lookups per kind, and hits / last use per entry id.
+_pending_lookups: dict[str, CacheStats] = {}
+_pending_hits: dict[int, int] = {}
+_pending_used = None
+_pending_n = 0
+_puts = 0
+
+
+def _count(hit: bool, kind: str | None, row_id: int | None = None) -> None:
+    global _pending_used, _pending_n
+    with _stats_lock:
+        pending = _pending_lookups.setdefault(kind or OTHER_KIND, CacheStats())
+        if hit:
+            stats.hits += 1
+            pending.hits += 1
+            _pending_hits[row_id] = _pending_hits.get(row_id, 0) + 1
+            _pending_used = timezone.now()
+        else:
+            stats.misses += 1
+            pending.misses += 1
+        _pending_n += 1
+        due = _pending_n >= int(getattr(settings, 'LLM_CACHE_COUNT_FLUSH', 50))
+    if due:
+        flush_counts()
+
+
+def _take_counts():
+    global _pending_used, _pending_n
+    with _stats_lock:
+        taken = (dict(_pending_lookups), dict(_pending_hits), _pending_used)
+        _pending_lookups.clear()
+        _pending_hits.clear()
+        _pending_used, _pending_n = None, 0
+    return taken
+
+
+def flush_counts() -> None:
+    """Write the pending lookup counters and entry hits (one UPDATE per kind / hit count)."""
+    from api.models import LLMCache, LLMCacheCounter
+
+    lookups, hits, used = _take_counts()
+    if not lookups:
+        return
+    by_count = {}
+    for row_id, n in hits.items():
+        by_count.setdefault(n, []).append(row_id)
+    with transaction.atomic():
+        LLMCacheCounter.objects.bulk_create([LLMCacheCounter(kind=kind) for kind in lookups], ignore_conflicts=True)
+        for kind, s in lookups.items():
+            LLMCacheCounter.objects.filter(kind=kind).update(hits=F('hits') + s.hits, misses=F('misses') + s.misses)
+        for n, ids in by_count.items():
+            LLMCache.objects.filter(id__in=ids).update(last_used_at=used, hits=F('hits') + n)
+
+
+def _flush_at_exit() -> None:
+    try:
+        flush_counts()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
+
+
+def _ttl() -> timedelta:
+    return timedelta(seconds=float(getattr(settings, 'LLM_CACHE_TTL', 24 * 3600)))
+
+
+def get(key: str, kind: str | None = None):
+    """Cached value for `key`, or None on a miss / expired entry (counted under `kind`)."""
+    from api.models import LLMCache
+
+    now = timezone.now()
+    row = LLMCache.objects.filter(key=key).values_list('id', 'value', 'created_at').first()
+    if row is not None and row[2] < now - _ttl():
+        LLMCache.objects.filter(id=row[0]).delete()
+        row = None
+    if row is None:
+        _count(False, kind)
+        return None
+    _count(True, kind, row[0])
+    return row[1]
+
+
+def put(key: str, value, kind: str, model: str) -> None:
+    from api.models import LLMCache
+
+    now = timezone.now()
+    LLMCache.objects.update_or_create(
+        key=key,
+        defaults={'kind': kind, 'model': model, 'value': value, 'created_at': now, 'last_used_at': now},
+    )
+    global _puts
+    with _stats_lock:
+        _puts += 1
+        due = _puts % max(1, int(getattr(settings, 'LLM_CACHE_EVICT_EVERY', 100))) == 0
+    if due:
+        _evict()
+
+
+def get_or_set(kind: str, key: str, compute, model: str, cacheable=bool):
+    """Return the cached value for `key`, else `compute()` and cache it.
+
+    Results failing `cacheable` (default: falsy — failed call, nothing parsed)
+    are returned but not cached.
+    """
+    value = get(key, kind)
+    if value is not None:
+        return value
+    value = compute()
+    if cacheable(value):
+        put(key, value, kind=kind, model=model)
+    return value
+
+
+def _evict() -> None:
+    from api.models import LLMCache
+
+    flush_counts()  # the LRU order needs the pending last_used_at
+    max_entries = int(getattr(settings, 'LLM_CACHE_MAX_ENTRIES', 10000))
+    excess = LLMCache.objects.count() - max_entries
+    if excess > 0:
+        stale = list(LLMCache.objects.order_by('last_used_at', 'id').values_list('id', flat=True)[:excess])
+        LLMCache.objects.filter(id__in=stale).delete()
+
+
+def purge_expired() -> int:
+    from api.models import LLMCache
+
+    deleted, _ = LLMCache.objects.filter(created_at__lt=timezone.now() - _ttl()).delete()
+    return deleted
+
+
+def clear() -> int:
+    from api.models import LLMCache
+
+    deleted, _ = LLMCache.objects.all().delete()
+    return deleted
+
+
+def reset_pending() -> None:
+    """Drop unwritten lookup counts without writing them (tests)."""
+    _take_counts()
+
+
+def reset_counters() -> None:
+    from api.models import LLMCacheCounter
+
+    _take_counts()
+    LLMCacheCounter.objects.all().delete()
+
+
+def summary() -> dict:
+    """Size per kind, stored hit totals, and the persisted hit/miss counters (total and per kind)."""
+    from django.db.models import Count, Sum
+
+    from api.models import LLMCache, LLMCacheCounter
+
+    flush_counts()
+    rows = LLMCache.objects.values('kind').annotate(n=Count('id'), total_hits=Sum('hits')).order_by('kind')
+    by_kind = {r['kind']: r['n'] for r in rows}
+    lookups = {kind: CacheStats(hits, misses)
+               for kind, hits, misses in LLMCacheCounter.objects.order_by('kind').values_list('kind', 'hits', 'misses')}
+    total = CacheStats(sum(s.hits for s in lookups.values()), sum(s.misses for s in lookups.values()))
+    return {
+        'size': sum(by_kind.values()),
+        'by_kind': by_kind,
+        'stored_hits': sum(r['total_hits'] or 0 for r in rows),
+        'hits': total.hits,
+        'misses': total.misses,
+        'hit_rate': total.hit_rate,
+        'lookups_by_kind': lookups,
+    }
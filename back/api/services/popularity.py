@@ -0,0 +1,152 @@
+"""Write-behind popularity counters for `Book.global_recommend_count`.
+
+Favorites added, reviews created and detail views are recorded here instead of
+saving the book row per event: each process sums weighted increments in memory
+(`POPULARITY_WEIGHTS`) and flushes them as a few batched
+`UPDATE ... SET global_recommend_count = global_recommend_count + n` statements
+(one per distinct increment, so a hot book is one row write per flush, not one
+per event). A flush runs in the request that records an event once
+`POPULARITY_FLUSH_SECONDS` have passed or `POPULARITY_FLUSH_MAX_BOOKS` books are
+pending, and at process exit; increments that fail to write are kept for the
+next flush. Events are buffered only once their transaction commits.
+
+The count is part of the book's detail response, so every flushed book gets
+its `updated_at` (detail ETag / Last-Modified) moved in the same UPDATE. Only
+favorites and reviews bump the catalog version right away, though: views
+happen on every detail GET, so a view-only flush bumps it at most once per
+`POPULARITY_VIEW_BUMP_SECONDS`; otherwise any traffic would throw away the
+cached home collections and their ETags every flush.
+"""
+
+import atexit
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+EVENTS = ('favorite', 'review', 'view')
+DEFAULT_WEIGHTS = {'favorite': 3, 'review': 2, 'view': 1}
+# Events that are flushed as a visible change (see module docstring).
+VISIBLE_EVENTS = frozenset({'favorite', 'review'})
+_ID_BATCH = 900
+
+_pending: dict[int, int] = defaultdict(int)
+_visible: set[int] = set()
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_last_flush = time.monotonic()
+_last_view_bump = time.monotonic()
+_atexit_registered = False
+
+
+def weight(event: str) -> int:
+    weights = getattr(settings, 'POPULARITY_WEIGHTS', None) or DEFAULT_WEIGHTS
+    return int(weights.get(event, DEFAULT_WEIGHTS.get(event, 0)))
+
+
+def record(event: str, book_id, count: int = 1) -> None:
+    """Add `count` × the event's weight to `book_id` once the current transaction commits."""
+    delta = weight(event) * count
+    if not delta or book_id is None:
+        return
+    visible = event in VISIBLE_EVENTS
+    # A rolled-back favorite/review never counts (and tests' rolled-back events never leak).
+    transaction.on_commit(lambda: _add(int(book_id), delta, visible))
+
+
+def _add(book_id: int, delta: int, visible: bool = False) -> None:
+    global _atexit_registered
+    with _lock:
+        _pending[book_id] += delta
+        if visible:
+            _visible.add(book_id)
+        due = (time.monotonic() - _last_flush >= float(getattr(settings, 'POPULARITY_FLUSH_SECONDS', 10))
+               or len(_pending) >= int(getattr(settings, 'POPULARITY_FLUSH_MAX_BOOKS', 1000)))
+        if not _atexit_registered:
+            atexit.register(_flush_at_exit)
+            _atexit_registered = True
+    if due:
+        try:
+            flush()
+        except Exception:
+            pass  # kept in the buffer; never fail the request that triggered the flush
+
+
+def pending() -> dict[int, int]:
+    with _lock:
+        return dict(_pending)
+
+
+def _take() -> tuple[dict[int, int], set[int]]:
+    global _last_flush
+    with _lock:
+        taken, visible = dict(_pending), set(_visible)
+        _pending.clear()
+        _visible.clear()
+        _last_flush = time.monotonic()
+    return taken, visible
+
+
+def _restore(deltas: dict[int, int], visible: set[int]) -> None:
+    with _lock:
+        for book_id, delta in deltas.items():
+            _pending[book_id] += delta
+        _visible.update(visible)
+
+
+def _view_bump_due() -> bool:
+    global _last_view_bump
+    with _lock:
+        if time.monotonic() - _last_view_bump < float(getattr(settings, 'POPULARITY_VIEW_BUMP_SECONDS', 600)):
+            return False
+        _last_view_bump = time.monotonic()
+        return True
+
+
+def flush() -> int:
+    """Write all pending increments; returns how many books were updated."""
+    from api.models import Book
+    from api.services import response_cache
+
+    if not _flush_lock.acquire(blocking=False):
+        return 0  # another thread is flushing; our increments ride on the next one
+    try:
+        deltas, visible = _take()
+        if not deltas:
+            return 0
+        by_delta = defaultdict(list)
+        for book_id, delta in deltas.items():
+            by_delta[delta].append(book_id)
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                for delta, ids in by_delta.items():
+                    for s in range(0, len(ids), _ID_BATCH):
+                        Book.objects.filter(id__in=ids[s:s + _ID_BATCH]).update(
+                            global_recommend_count=F('global_recommend_count') + delta, updated_at=now,
+                        )
+        except Exception:
+            _restore(deltas, visible)
+            raise
+        # `.update()` bypasses model signals: refresh the cached popularity-ordered collections.
+        if visible or _view_bump_due():
+            response_cache.bump_catalog_version()
+        return len(deltas)
+    finally:
+        _flush_lock.release()
+
+
+def _flush_at_exit() -> None:
+    try:
+        flush()
+    except Exception:
+        pass
+
+
+def reset() -> None:
+    """Drop pending increments without writing them (tests)."""
+    _take()
@@ -0,0 +1,141 @@
+"""Versioned cache for catalog-wide, user-independent responses (home page collections).
+
+Entries are keyed by `(name, variant, catalog version)`. Nothing is deleted on
+writes: Book / Review / Category / Genre / Author signals and the sync commands
+bump the version, and every later lookup simply misses the old keys, which
+expire after `RESPONSE_CACHE_TTL`.
+
+On a miss one caller per key recomputes (a `cache.add` lock); the others are
+served the previous version's payload if there is one, else wait up to
+`RESPONSE_CACHE_LOCK_WAIT` seconds for the winner. Hot entries are also kept in
+a small per-process dict (for `RESPONSE_CACHE_TTL` as well), so a hit costs one
+version read from the cache backend and no unpickling.
+
+The version must live where every process sees it — the server workers and the
+cron commands that bump it or warm the cache. The default `CACHES` is a file
+cache under `var/`; `REDIS_URL` switches to Redis. A per-process backend
+(LocMem) only works for a single process that also does all the writes.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+PREFIX = 'respcache'
+VERSION_KEY = f'{PREFIX}:catalog_version'
+MODIFIED_KEY = f'{PREFIX}:catalog_modified'
+_LOCAL_MAX = 256
+
+_local: dict[str, tuple[float, object]] = {}  # key -> (expires at, payload)
+_local_version = None
+_local_lock = threading.Lock()
+
+
+def _cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _ttl() -> int:
+    return int(getattr(settings, 'RESPONSE_CACHE_TTL', 600))
+
+
+def is_shared() -> bool:
+    """Whether other processes (workers, cron commands) see this cache."""
+    return not isinstance(_cache(), (LocMemCache, DummyCache))
+
+
+def catalog_version() -> int:
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock, not 1: a version key evicted from a shared cache
+        # must not come back as a number whose entries may still be stored.
+        cache.add(VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version() -> int:
+    """Invalidate every cached response (call after writes that bypass model signals)."""
+    cache = _cache()
+    cache.set(MODIFIED_KEY, time.time(), timeout=None)
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        catalog_version()
+        return cache.incr(VERSION_KEY)
+
+
+def catalog_modified() -> float | None:
+    """POSIX time of the last bump (None until one happened), for `Last-Modified`."""
+    return _cache().get(MODIFIED_KEY)
+
+
+def _remember(version, key, data) -> None:
+    global _local_version
+    with _local_lock:
+        if version != _local_version or len(_local) >= _LOCAL_MAX:
+            _local.clear()
+            _local_version = version
+        _local[key] = (time.monotonic() + _ttl(), data)
+
+
+def get_or_compute(name: str, variant: str, compute):
+    """`(version, payload)` of `name`/`variant`: cached for the current catalog version, else `compute()`.
+
+    `version` is the catalog version the payload was built for; it is older than
+    `catalog_version()` when another caller holds the recompute lock and the
+    previous payload is served meanwhile (so callers must not label it current).
+    """
+    version = catalog_version()
+    key = f'{PREFIX}:{name}:{variant}:{version}'
+    with _local_lock:
+        if version == _local_version and key in _local:
+            expires, data = _local[key]
+            if time.monotonic() < expires:
+                return version, data
+            del _local[key]
+
+    cache = _cache()
+    data = cache.get(key)
+    if data is not None:
+        _remember(version, key, data)
+        return version, data
+
+    latest_key = f'{PREFIX}:{name}:{variant}:latest'
+    lock_key = f'{key}:lock'
+    wait = float(getattr(settings, 'RESPONSE_CACHE_LOCK_WAIT', 5))
+    if cache.add(lock_key, 1, timeout=max(1, int(wait * 2))):
+        try:
+            data = compute()
+            cache.set_many({key: data, latest_key: (version, data)}, timeout=_ttl())
+        finally:
+            cache.delete(lock_key)
+        _remember(version, key, data)
+        return version, data
+
+    # Someone else is recomputing: the previous version is good enough meanwhile.
+    stale = cache.get(latest_key)
+    if stale is not None:
+        return stale
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(0.02)
+        data = cache.get(key)
+        if data is not None:
+            _remember(version, key, data)
+            return version, data
+        if cache.get(lock_key) is None:
+            break
+    return version, compute()
+
+
+def reset_local() -> None:
+    global _local_version
+    with _local_lock:
+        _local.clear()
+        _local_version = None
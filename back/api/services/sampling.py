@@ -0,0 +1,86 @@
+"""Deterministic, constant-time random picks of book ids ("다시 추천" shuffles).
+
+The ids of all books are kept as a compact sorted `int64` array per process,
+rebuilt at most every `SAMPLE_POOL_REFRESH_SECONDS`. A pick draws random
+positions from a generator seeded by the caller's `(seed, nonce)` parts,
+skipping excluded ids by set lookup, so a request costs O(k + |exclude|) regardless of catalog size and the
+same seed yields the same books while the pool is unchanged.
+"""
+
+import hashlib
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+_pool: tuple[float, np.ndarray] | None = None  # (loaded at, ids)
+_lock = threading.Lock()
+
+
+def seed_from(*parts) -> int:
+    raw = ':'.join(str(p) for p in parts).encode('utf-8')
+    return int(hashlib.sha256(raw).hexdigest()[:16], 16)
+
+
+def pool() -> np.ndarray:
+    """Sorted ids of all books (cached per process)."""
+    from api.models import Book
+
+    global _pool
+    refresh = float(getattr(settings, 'SAMPLE_POOL_REFRESH_SECONDS', 300))
+    now = time.monotonic()
+    with _lock:
+        if _pool is not None and now - _pool[0] < refresh:
+            return _pool[1]
+
+    rows = Book.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=10000)
+    ids = np.fromiter(rows, dtype=np.int64)
+    with _lock:
+        _pool = (now, ids)
+    return ids
+
+
+def reset_pool() -> None:
+    global _pool
+    with _lock:
+        _pool = None
+
+
+def pick(ids, k: int, seed: int, exclude=()) -> list[int]:
+    """`k` distinct ids from `ids` in a seed-determined random order, skipping `exclude`."""
+    ids = np.asarray(ids, dtype=np.int64)
+    n = int(ids.shape[0])
+    if n == 0 or k <= 0:
+        return []
+    exclude = exclude if isinstance(exclude, (set, frozenset)) else set(exclude)
+    rng = np.random.default_rng(seed)
+
+    if n > 4 * (k + len(exclude)):
+        # Sparse draws: almost never collide, so a few rounds suffice.
+        out, taken = [], set()
+        budget = 4 * (k + len(exclude)) + 32
+        while len(out) < k and budget > 0:
+            size = min(budget, 2 * (k - len(out)) + 8)
+            budget -= size
+            for pos in rng.integers(0, n, size=size).tolist():
+                if pos in taken:
+                    continue
+                taken.add(pos)
+                book_id = int(ids[pos])
+                if book_id in exclude:
+                    continue
+                out.append(book_id)
+                if len(out) >= k:
+                    return out
+        if len(out) >= k:
+            return out
+
+    # Small pool (or mostly excluded): shuffle what is left.
+    remaining = [int(i) for i in ids.tolist() if i not in exclude]
+    order = rng.permutation(len(remaining))[:k]
+    return [remaining[i] for i in order.tolist()]
+
+
+def sample_book_ids(k: int, seed: int, exclude=()) -> list[int]:
+    return pick(pool(), k, seed, exclude=exclude)
@@ -0,0 +1,181 @@
+"""SQLite FTS5 full-text index over book title / author / publisher / description.
+
+Korean has no whitespace-delimited morphemes to tokenize on, so text is indexed
+as character bigrams (the usual CJK n-gram approach, as in Lucene's CJK
+analyzer): `"소설가"` is stored as the tokens `소설 설가` and a query term becomes
+the phrase of its own bigrams, which matches any substring of two or more
+characters. Each word's last character is also stored alone (`소설가` →
+`소설 설가 가`), so a one-character term, queried as the prefix `x*`, matches it
+anywhere in a word — like `icontains` — not only where a bigram starts. FTS5's built-in `trigram` tokenizer cannot match the two-syllable
+words that dominate Korean queries, hence bigrams generated here and a plain
+`unicode61` tokenizer.
+
+The index is a standalone FTS5 table (`api_book_fts`, rowid = `Book.id`) kept
+in sync by `api.signals` on save/delete and by the bulk sync command, and
+rebuilt in full by `manage.py rebuild_search_index`. Ranking blends BM25 with a saturating
+`global_recommend_count` boost. On other databases (or before the migration has
+run) `available()` is False and callers fall back to `icontains` queries.
+"""
+
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connection
+
+FTS_TABLE = 'api_book_fts'
+COLUMNS = ('title', 'author', 'publisher', 'description')
+# bm25() column weights, same order as COLUMNS
+BM25_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+# Fields whose change requires re-indexing a book.
+INDEXED_FIELDS = frozenset({'title', 'author', 'publisher', 'description'})
+
+_WORD_RE = re.compile(r'\w+')
+_INDEX_CHUNK = 500
+
+_available = None
+
+
+def available() -> bool:
+    global _available
+    if _available is None:
+        if connection.vendor != 'sqlite':
+            _available = False
+        else:
+            _available = FTS_TABLE in connection.introspection.table_names()
+    return _available
+
+
+def reset_available_cache() -> None:
+    global _available
+    _available = None
+
+
+def _words(text: str | None) -> list[str]:
+    return _WORD_RE.findall(unicodedata.normalize('NFKC', text or '').lower())
+
+
+def ngram_text(text: str | None) -> str:
+    """Index form of `text`: bigrams of every word, then its last character (1-char words kept whole)."""
+    tokens = []
+    for word in _words(text):
+        if len(word) > 1:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        tokens.append(word[-1])
+    return ' '.join(tokens)
+
+
+def _word_query(word: str) -> str:
+    if len(word) == 1:
+        # A lone character matches any bigram starting with it, or a word-final unigram.
+        return f'{word}*'
+    return '"' + ' '.join(word[i:i + 2] for i in range(len(word) - 1)) + '"'
+
+
+def match_expression(terms, columns=None) -> str | None:
+    """FTS5 MATCH expression: any term matches; a term's words must all appear.
+
+    Returns None when no term contains a searchable character.
+    """
+    clauses = []
+    for term in terms:
+        words = _words(term)
+        if words:
+            clauses.append('(' + ' AND '.join(_word_query(w) for w in words) + ')')
+    if not clauses:
+        return None
+    expr = ' OR '.join(dict.fromkeys(clauses))
+    if columns:
+        expr = '{' + ' '.join(columns) + '} : (' + expr + ')'
+    return expr
+
+
+# ── querying ───────────────────────────────────────────────────────────────
+def search_ids(terms, limit: int | None = 40, columns=None) -> list[int]:
+    """Book ids matching any of `terms`, best first (BM25 blended with popularity)."""
+    expr = match_expression(terms, columns=columns)
+    if expr is None:
+        return []
+    weight = float(getattr(settings, 'BOOK_SEARCH_POPULARITY_WEIGHT', 2.0))
+    half = float(getattr(settings, 'BOOK_SEARCH_POPULARITY_HALF', 10))
+    bm25 = f"bm25({FTS_TABLE}, {', '.join(str(w) for w in BM25_WEIGHTS)})"
+    # bm25() is negative (lower = better); popularity x/(x+half) lies in [0, 1).
+    sql = (
+        f"SELECT b.id FROM {FTS_TABLE} f JOIN api_book b ON b.id = f.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s "
+        f"ORDER BY {bm25} - %s * (b.global_recommend_count * 1.0 "
+        f"/ (MAX(b.global_recommend_count, 0) + %s)), b.id"
+    )
+    params = [expr, weight, half]
+    if limit is not None:
+        sql += ' LIMIT %s'
+        params.append(int(limit))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def matching_ids_sql(terms, columns=None):
+    """`(sql, params)` selecting every matching book id, for `id__in=RawSQL(...)`, or None."""
+    expr = match_expression(terms, columns=columns)
+    if expr is None:
+        return None
+    return f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expr]
+
+
+# ── maintenance ────────────────────────────────────────────────────────────
+def _rows(book_ids):
+    from api.models import Book
+
+    qs = Book.objects.filter(id__in=book_ids).values_list('id', 'title', 'author__name', 'publisher', 'description')
+    for book_id, title, author, publisher, description in qs:
+        yield (book_id, ngram_text(title), ngram_text(author), ngram_text(publisher), ngram_text(description))
+
+
+def index_books(book_ids) -> int:
+    """(Re)index the given books; ids that no longer exist are dropped from the index."""
+    if not available():
+        return 0
+    book_ids = list(dict.fromkeys(book_ids))
+    placeholders = ', '.join(['%s'] * len(COLUMNS))
+    count = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(book_ids), _INDEX_CHUNK):
+            chunk = book_ids[start:start + _INDEX_CHUNK]
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(chunk))})", chunk,
+            )
+            rows = list(_rows(chunk))
+            if rows:
+                cursor.executemany(
+                    f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(COLUMNS)}) VALUES (%s, {placeholders})", rows,
+                )
+            count += len(rows)
+    return count
+
+
+def remove_books(book_ids) -> None:
+    if not available():
+        return
+    book_ids = list(book_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(book_ids), _INDEX_CHUNK):
+            chunk = book_ids[start:start + _INDEX_CHUNK]
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(chunk))})", chunk,
+            )
+
+
+def rebuild() -> int:
+    """Re-index every book from scratch, then merge the index b-trees."""
+    from api.models import Book
+
+    if not available():
+        raise RuntimeError(f'{FTS_TABLE} is not available (SQLite with FTS5 and migrations applied required)')
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    ids = list(Book.objects.order_by('id').values_list('id', flat=True))
+    count = index_books(ids)
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return count
@@ -0,0 +1,96 @@
+"""Embedding-based book search: prompt → `embedding-query` vector → nearest books.
+
+One embedding request per distinct prompt (repeats are served by the
+content-addressed embedding cache) and no chat-model round trip. Neighbours
+come from the mmap IVF index when one has been built (`build_vector_index`);
+category/genre filters score just the filtered books' rows exactly. Without an
+index, stored `Book.embedding` vectors are scanned block-wise from the DB —
+correct but linear in catalog size, so only offline jobs (`scan=True`) do that;
+request paths check `index_ready()` and pass `scan=False`.
+"""
+
+import os
+
+import numpy as np
+
+from api.services.embedding_cache import get_or_embed
+from api.services.vector_index import _normalize, _normalize_rows, _topk, get_index
+
+_DB_CHUNK = 2000
+
+
+def available() -> bool:
+    """Whether prompts can be embedded (Upstage key configured)."""
+    return bool(os.getenv('UPSTAGE_API_KEY'))
+
+
+def index_ready() -> bool:
+    """Whether a non-empty vector index is built (request paths need one)."""
+    index = get_index()
+    return index is not None and len(index) > 0
+
+
+def search_book_ids(prompt: str, k: int = 40, category=None, genre=None, exclude=None, scan=True):
+    """Ids of the `k` books closest to `prompt` by cosine similarity, best first."""
+    return nearest_book_ids(get_or_embed(prompt), k=k, category=category, genre=genre, exclude=exclude, scan=scan)
+
+
+def nearest_book_ids(vector, k: int = 40, category=None, genre=None, exclude=None, scan=True):
+    """Ids of the `k` books closest to `vector` (index when built, else a DB scan).
+
+    With `scan=False` there is no DB scan: None when the index is missing or of
+    another dimension.
+    """
+    from api.models import Book
+
+    filters = {}
+    if category is not None:
+        filters['category_id'] = category
+    if genre is not None:
+        filters['genre_id'] = genre
+
+    index = get_index()
+    if index is not None and len(index) and index.dim == len(vector):
+        if filters:
+            ids = Book.objects.filter(**filters).values_list('id', flat=True)
+            hits = index.subset_search(vector, ids, k=k, exclude=exclude)
+        else:
+            hits = index.search(vector, k=k, exclude=exclude)
+        return [book_id for book_id, _ in hits]
+    if not scan:
+        return None
+    return _scan_db(vector, k, filters, exclude)
+
+
+def _scan_db(vector, k: int, filters: dict, exclude=None) -> list[int]:
+    from api.models import Book
+
+    q = _normalize(vector)
+    rows = Book.objects.filter(embedding__isnull=False, **filters).values_list('id', 'embedding')
+    best_ids = np.empty(0, np.int64)
+    best_scores = np.empty(0, np.float32)
+    ids, vecs = [], []
+
+    def _merge():
+        nonlocal best_ids, best_scores
+        if not ids:
+            return
+        scores = _normalize_rows(np.asarray(vecs, dtype=np.float32)) @ q
+        best_ids = np.concatenate([best_ids, np.asarray(ids, dtype=np.int64)])
+        best_scores = np.concatenate([best_scores, scores])
+        keep = _topk(best_scores, k)
+        best_ids, best_scores = best_ids[keep], best_scores[keep]
+        ids.clear()
+        vecs.clear()
+
+    for book_id, emb in rows.iterator(chunk_size=_DB_CHUNK):
+        if exclude and book_id in exclude:
+            continue
+        if not emb or len(emb) != q.shape[0]:
+            continue
+        ids.append(book_id)
+        vecs.append(emb)
+        if len(ids) >= _DB_CHUNK:
+            _merge()
+    _merge()
+    return [int(i) for i in best_ids]
@@ -0,0 +1,84 @@
+"""Favorites / read_books as ID lists plus a delta log for client sync.
+
+`GET /api/auth/users/me` no longer nests whole books: it carries the two shelves
+as ID lists read straight from the m2m through tables (oldest first), their
+counts and `shelf_version`. Every shelf change is appended to `ShelfEvent`
+(see `api.signals`) and the newest event id is the user's version, so a client
+that already holds version N asks `?since=N` and gets only what was added or
+removed after it. Book cards for a shelf are paged separately
+(`/api/auth/users/me/shelf/<shelf>`).
+"""
+
+from django.db.models import Max
+
+SHELVES = ('favorites', 'read_books')
+_ID_FIELDS = {'favorites': 'favorite_ids', 'read_books': 'read_book_ids'}
+
+
+def through(shelf: str):
+    from django.contrib.auth import get_user_model
+
+    return getattr(get_user_model(), shelf).through
+
+
+def version(user_id) -> int:
+    from api.models import ShelfEvent
+
+    return ShelfEvent.objects.filter(user_id=user_id).aggregate(v=Max('id'))['v'] or 0
+
+
+def book_ids(user_id, shelf: str) -> list[int]:
+    return list(through(shelf).objects.filter(user_id=user_id).order_by('id').values_list('book_id', flat=True))
+
+
+def summary(user_id) -> dict:
+    """`favorite_ids`, `read_book_ids`, their counts and `shelf_version` (3 queries)."""
+    # Version first: a change landing between the reads is then replayed by the
+    # next `since=` sync instead of being skipped (applying a delta is idempotent).
+    data = {'shelf_version': version(user_id)}
+    for shelf in SHELVES:
+        ids = book_ids(user_id, shelf)
+        data[_ID_FIELDS[shelf]] = ids
+        data[f'{shelf}_count'] = len(ids)
+    return data
+
+
+def changes(user_id, since: int) -> dict:
+    """Net shelf changes after version `since`, plus the current counts and version (3 queries)."""
+    from api.models import ShelfEvent
+
+    delta = {shelf: {} for shelf in SHELVES}
+    latest = since
+    events = (ShelfEvent.objects.filter(user_id=user_id, id__gt=since).order_by('id')
+              .values_list('id', 'shelf', 'book_id', 'added'))
+    for event_id, shelf, book_id, added in events:
+        delta[shelf][book_id] = added  # last event per book wins
+        latest = event_id
+    data = {'shelf_version': latest}
+    for shelf in SHELVES:
+        data[f'{shelf}_count'] = through(shelf).objects.filter(user_id=user_id).count()
+    data['shelf_changes'] = {
+        shelf: {
+            'added': sorted(b for b, added in books.items() if added),
+            'removed': sorted(b for b, added in books.items() if not added),
+        }
+        for shelf, books in delta.items()
+    }
+    return data
+
+
+def log(shelf: str, user_ids, book_ids, added: bool) -> None:
+    """Append one event per (user, book) pair."""
+    from api.models import ShelfEvent
+
+    events = [ShelfEvent(user_id=u, shelf=shelf, book_id=b, added=added)
+              for u in sorted(set(user_ids)) for b in sorted(set(book_ids))]
+    if events:
+        ShelfEvent.objects.bulk_create(events, batch_size=500)
+
+
+def log_book_removed(book_id) -> None:
+    """The book is being deleted: its m2m rows go without `m2m_changed`, so log them here."""
+    for shelf in SHELVES:
+        user_ids = through(shelf).objects.filter(book_id=book_id).values_list('user_id', flat=True)
+        log(shelf, user_ids, [book_id], added=False)
@@ -0,0 +1,83 @@
+"""Blocked top-k cosine similarity over an on-disk embedding matrix.
+
+Used by `update_similar_books --engine blocked`. The matrix is a float32 `.npy`
+file of L2-normalised rows; worker processes mmap it once (see `_init_worker`)
+and each task scores one block of rows against the whole matrix, so peak memory
+per worker is `block_size × N` floats regardless of catalog size.
+
+This module deliberately imports nothing from Django so it is cheap to load in
+spawned worker processes.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+_worker_matrix = None
+
+
+def default_block_size(n: int, budget_floats: int = 1 << 25) -> int:
+    """Rows per block so that one `block × N` score matrix stays around 128 MB."""
+    return max(1, min(2048, budget_floats // max(n, 1)))
+
+
+def _init_worker(matrix_path: str, n: int) -> None:
+    global _worker_matrix
+    _worker_matrix = np.load(matrix_path, mmap_mode='r')[:n]
+
+
+def topk_block(matrix, start: int, stop: int, k: int):
+    """Top-k neighbours (excluding self) for rows `start:stop`.
+
+    Returns `(rows, scores)`, both shaped `(stop - start, k')` with `k' = min(k, N - 1)`,
+    sorted best first.
+    """
+    n = matrix.shape[0]
+    kk = min(k, n - 1)
+    if kk <= 0:
+        empty = np.empty((stop - start, 0))
+        return empty.astype(np.int64), empty.astype(np.float32)
+
+    block = np.asarray(matrix[start:stop], dtype=np.float32)
+    sims = _chunked_scores(block, matrix)
+    local = np.arange(stop - start)
+    sims[local, local + start] = -np.inf
+
+    part = np.argpartition(-sims, kk - 1, axis=1)[:, :kk]
+    part_scores = np.take_along_axis(sims, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind='stable')
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+def _chunked_scores(block, matrix, chunk: int = 65536):
+    out = np.empty((block.shape[0], matrix.shape[0]), dtype=np.float32)
+    for s in range(0, matrix.shape[0], chunk):
+        out[:, s:s + chunk] = block @ np.asarray(matrix[s:s + chunk], dtype=np.float32).T
+    return out
+
+
+def _worker_task(args):
+    start, stop, k = args
+    rows, scores = topk_block(_worker_matrix, start, stop, k)
+    return start, rows, scores
+
+
+def iter_topk(matrix_path: str, n: int, k: int, block_size: int | None = None, workers: int = 1):
+    """Yield `(start, rows, scores)` for every block of the first `n` rows at `matrix_path`.
+
+    With `workers > 1` blocks are spread over a process pool; results are still
+    yielded in block order.
+    """
+    block_size = block_size or default_block_size(n)
+    tasks = [(s, min(n, s + block_size), k) for s in range(0, n, block_size)]
+    if workers <= 1:
+        matrix = np.load(matrix_path, mmap_mode='r')[:n]
+        for start, stop, kk in tasks:
+            rows, scores = topk_block(matrix, start, stop, kk)
+            yield start, rows, scores
+        return
+
+    workers = min(workers, os.cpu_count() or 1, len(tasks)) or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(matrix_path, n)) as pool:
+        yield from pool.map(_worker_task, tasks, chunksize=1)
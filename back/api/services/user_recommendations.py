@@ -0,0 +1,179 @@
+"""Precomputed per-user recommendations from book embeddings (no LLM round trip).
+
+A user's taste vector is the weighted mean of the normalised embeddings of
+their favorited and read books — favorites count `RECOMMEND_FAVORITE_WEIGHT`,
+reads `RECOMMEND_READ_WEIGHT`, a book on both shelves both. The
+`RECOMMEND_TOP_N` unseen books nearest to it (vector index, or a DB scan
+without one) are stored ranked in `UserRecommendation`, so serving is a single
+row read. Rows are rebuilt by `update_user_recommendations`; a shelf change
+only marks the user in `UserRecommendationDirty` (see `api.signals`), and
+`update_user_recommendations --dirty` (cron, every minute or so) recomputes
+just those users, so a favorite/read click never pays for the vector search.
+"""
+
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+
+from api.services import sampling, semantic_search
+from api.services.vector_index import _normalize
+
+SERVE_COUNT = 8
+_ID_BATCH = 900
+
+
+def _weights() -> tuple[float, float]:
+    return (float(getattr(settings, 'RECOMMEND_FAVORITE_WEIGHT', 2.0)),
+            float(getattr(settings, 'RECOMMEND_READ_WEIGHT', 1.0)))
+
+
+def _top_n() -> int:
+    return max(1, int(getattr(settings, 'RECOMMEND_TOP_N', 100)))
+
+
+def _shelves(user_ids) -> dict[int, dict[int, float]]:
+    """{user_id: {book_id: weight}} for `user_ids`, from the two m2m through tables."""
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    fav_weight, read_weight = _weights()
+    shelves = {uid: defaultdict(float) for uid in user_ids}
+    for through, weight in ((User.favorites.through, fav_weight), (User.read_books.through, read_weight)):
+        for uid, book_id in through.objects.filter(user_id__in=user_ids).values_list('user_id', 'book_id'):
+            shelves[uid][book_id] += weight
+    return shelves
+
+
+def taste_vector(weighted: dict[int, float], embeddings: dict[int, list]):
+    """Normalised weighted mean of the shelf books' embeddings, or None if none have one."""
+    total, used = None, 0
+    for book_id, weight in weighted.items():
+        emb = embeddings.get(book_id)
+        if not emb or weight <= 0:
+            continue
+        v = _normalize(emb) * weight
+        if total is None:
+            total = v
+        elif v.shape != total.shape:
+            continue
+        else:
+            total = total + v
+        used += 1
+    if total is None:
+        return None, 0
+    return _normalize(total), used
+
+
+def refresh_users(user_ids, top_n: int | None = None) -> int:
+    """Recompute and store the lists of `user_ids`; returns how many users got a non-empty list."""
+    from api.models import Book, UserRecommendation
+
+    user_ids = list(dict.fromkeys(int(u) for u in user_ids))
+    if not user_ids:
+        return 0
+    top_n = top_n or _top_n()
+    shelves = _shelves(user_ids)
+    book_ids = {b for weighted in shelves.values() for b in weighted}
+    embeddings = dict(
+        Book.objects.filter(id__in=book_ids, embedding__isnull=False).values_list('id', 'embedding')
+    )
+
+    rows, filled = [], 0
+    for uid in user_ids:
+        weighted = shelves[uid]
+        vector, used = taste_vector(weighted, embeddings)
+        ids = []
+        if vector is not None:
+            ids = semantic_search.nearest_book_ids(vector, k=top_n, exclude=set(weighted))
+            filled += bool(ids)
+        rows.append(UserRecommendation(user_id=uid, book_ids=ids, basis=used))
+    UserRecommendation.objects.bulk_create(
+        rows, batch_size=500,
+        update_conflicts=True, unique_fields=['user'], update_fields=['book_ids', 'basis', 'updated_at'],
+    )
+    return filled
+
+
+def mark_dirty(user_ids) -> None:
+    from api.models import UserRecommendationDirty
+
+    user_ids = set(user_ids)
+    if user_ids:
+        UserRecommendationDirty.objects.bulk_create(
+            [UserRecommendationDirty(user_id=u) for u in user_ids], ignore_conflicts=True,
+        )
+
+
+def _take_dirty(user_ids=None) -> list[int]:
+    """Unmark and return the dirty users (all, or those among `user_ids`)."""
+    from api.models import UserRecommendationDirty
+
+    dirty = UserRecommendationDirty.objects.all()
+    if user_ids is not None:
+        dirty = dirty.filter(user_id__in=user_ids)
+    ids = list(dirty.order_by('user_id').values_list('user_id', flat=True))
+    # Unmarked before computing: a shelf change made meanwhile marks the user again.
+    for s in range(0, len(ids), _ID_BATCH):
+        UserRecommendationDirty.objects.filter(user_id__in=ids[s:s + _ID_BATCH]).delete()
+    return ids
+
+
+def refresh_dirty(batch_size: int = 200, top_n: int | None = None, progress=None) -> tuple[int, int]:
+    """Rebuild the lists of users whose shelves changed; returns (users processed, users with a list)."""
+    return _refresh_batches(_take_dirty(), batch_size, top_n, progress)
+
+
+def refresh_all(batch_size: int = 200, top_n: int | None = None, progress=None) -> tuple[int, int]:
+    """Rebuild every user's list in batches; returns (users processed, users with a list)."""
+    from django.contrib.auth import get_user_model
+
+    _take_dirty()
+    ids = list(get_user_model().objects.order_by('id').values_list('id', flat=True))
+    return _refresh_batches(ids, batch_size, top_n, progress)
+
+
+def _refresh_batches(ids, batch_size, top_n, progress) -> tuple[int, int]:
+    processed = filled = 0
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        try:
+            filled += refresh_users(batch, top_n=top_n)
+        except Exception:
+            mark_dirty(ids[start:])  # retried by the next run
+            raise
+        processed += len(batch)
+        if progress:
+            progress(processed, len(ids))
+    return processed, filled
+
+
+def stored_ids(user_id) -> list[int]:
+    from api.models import UserRecommendation
+
+    return UserRecommendation.objects.filter(user_id=user_id).values_list('book_ids', flat=True).first() or []
+
+
+def shelf_ids(user_id) -> set[int]:
+    """Ids the user has favorited or read right now (one query over both through tables)."""
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    favorites = User.favorites.through.objects.filter(user_id=user_id).values_list('book_id', flat=True)
+    read = User.read_books.through.objects.filter(user_id=user_id).values_list('book_id', flat=True)
+    return set(favorites.union(read))
+
+
+def pick(user_id, nonce=None, k: int = SERVE_COUNT) -> list[int]:
+    """Best `k` stored ids, or with a nonce a seeded sample of the stored top-N ("다시 추천").
+
+    The stored row may predate the user's latest favorites/reads (it is rebuilt
+    by cron), so books now on a shelf are dropped before picking.
+    """
+    ids = stored_ids(user_id)
+    if ids:
+        shelf = shelf_ids(user_id)
+        ids = [i for i in ids if i not in shelf]
+    if not ids or not nonce:
+        return ids[:k]
+    return sampling.pick(np.asarray(ids, dtype=np.int64), k, sampling.seed_from(user_id, 'embedding', nonce))
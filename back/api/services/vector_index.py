@@ -0,0 +1,393 @@
+"""On-disk IVF vector index over `Book.embedding`.
+
+Layout (`settings.VECTOR_INDEX_DIR`)::
+
+    current -> builds/<build-name>      (symlink, swapped atomically)
+    builds/<build-name>/
+        vectors.npy        float32 (N, D), L2-normalised, grouped by IVF list
+        ids.npy            int64   (N,)    Book.id for each row of vectors.npy
+        centroids.npy      float32 (nlist, D)
+        list_offsets.npy   int64   (nlist + 1,) row range of each IVF list
+        meta.json
+
+Every worker opens the arrays with `np.load(mmap_mode='r')`, so the OS page cache
+is shared between processes and nothing is copied per worker. Because rows are
+stored grouped by list, probing a list is a contiguous slice of the mmap.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+VECTORS_FILE = 'vectors.npy'
+IDS_FILE = 'ids.npy'
+CENTROIDS_FILE = 'centroids.npy'
+OFFSETS_FILE = 'list_offsets.npy'
+META_FILE = 'meta.json'
+
+# Rows scored per matrix product when scanning without the IVF lists.
+_SCAN_BLOCK = 8192
+
+
+def _index_root() -> Path:
+    return Path(getattr(settings, 'VECTOR_INDEX_DIR'))
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _normalize(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32).reshape(-1)
+    n = float(np.linalg.norm(v))
+    return v / n if n else v
+
+
+def _topk(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` largest scores, best first."""
+    if k >= scores.shape[0]:
+        return np.argsort(-scores, kind='stable')
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind='stable')]
+
+
+class VectorIndex:
+    """Read-only view over one build directory."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / META_FILE).read_text(encoding='utf-8'))
+        self.vectors = np.load(self.path / VECTORS_FILE, mmap_mode='r')
+        self.ids = np.load(self.path / IDS_FILE, mmap_mode='r')
+        self.centroids = np.load(self.path / CENTROIDS_FILE)
+        self.offsets = np.load(self.path / OFFSETS_FILE)
+        self.nprobe = int(self.meta.get('nprobe') or 1)
+        self._id_order = None
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    @property
+    def dim(self) -> int:
+        return int(self.vectors.shape[1]) if self.vectors.ndim == 2 else 0
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    def search(self, vector, k: int = 10, nprobe: int | None = None, exclude=None) -> list[tuple[int, float]]:
+        """Approximate top-k by cosine similarity: [(book_id, score), ...]."""
+        if not len(self) or k < 1:
+            return []
+        q = _normalize(vector)
+        if q.shape[0] != self.dim:
+            raise ValueError(f'vector dim {q.shape[0]} != index dim {self.dim}')
+
+        nprobe = max(1, min(self.nlist, int(nprobe or self.nprobe)))
+        probe = _topk(self.centroids @ q, nprobe)
+        spans = [(int(self.offsets[c]), int(self.offsets[c + 1])) for c in probe]
+        rows = np.concatenate([np.arange(a, b) for a, b in spans if b > a]) if spans else np.empty(0, np.int64)
+        if rows.size == 0:
+            return []
+        scores = np.concatenate([np.asarray(self.vectors[a:b] @ q) for a, b in spans if b > a])
+        return self._pick(rows, scores, k, exclude)
+
+    def exact_search(self, vector, k: int = 10, exclude=None) -> list[tuple[int, float]]:
+        """Brute-force top-k over every row (block-wise, so memory stays bounded)."""
+        if not len(self) or k < 1:
+            return []
+        q = _normalize(vector)
+        want = k + (len(exclude) if exclude else 0)
+        best_rows = np.empty(0, np.int64)
+        best_scores = np.empty(0, np.float32)
+        for start in range(0, len(self), _SCAN_BLOCK):
+            block = np.asarray(self.vectors[start:start + _SCAN_BLOCK] @ q)
+            top = _topk(block, want)
+            best_rows = np.concatenate([best_rows, top + start])
+            best_scores = np.concatenate([best_scores, block[top]])
+            keep = _topk(best_scores, want)
+            best_rows, best_scores = best_rows[keep], best_scores[keep]
+        return self._pick(best_rows, best_scores, k, exclude)
+
+    def subset_search(self, vector, ids, k: int = 10, exclude=None) -> list[tuple[int, float]]:
+        """Exact top-k among the given book ids only (e.g. one category or genre).
+
+        Costs one pass over `len(ids)` rows, so it stays cheap for filtered queries
+        where probing the IVF lists would mostly return books outside the filter.
+        """
+        if not len(self) or k < 1:
+            return []
+        q = _normalize(vector)
+        if self._id_order is None:
+            self._id_order = np.argsort(self.ids, kind='stable')
+        sorted_ids = self.ids[self._id_order]
+        wanted = np.unique(np.asarray(list(ids), dtype=np.int64))
+        if wanted.size == 0:
+            return []
+        pos = np.clip(np.searchsorted(sorted_ids, wanted), 0, len(self) - 1)
+        rows = np.sort(self._id_order[pos[sorted_ids[pos] == wanted]])
+        if rows.size == 0:
+            return []
+        scores = np.concatenate([
+            np.asarray(self.vectors[rows[s:s + _SCAN_BLOCK]] @ q) for s in range(0, rows.size, _SCAN_BLOCK)
+        ])
+        return self._pick(rows, scores, k, exclude)
+
+    def _pick(self, rows, scores, k, exclude):
+        want = k + (len(exclude) if exclude else 0)
+        order = _topk(scores, min(want, scores.shape[0]))
+        out: list[tuple[int, float]] = []
+        for i in order:
+            book_id = int(self.ids[rows[i]])
+            if exclude and book_id in exclude:
+                continue
+            out.append((book_id, float(scores[i])))
+            if len(out) >= k:
+                break
+        return out
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+#                       build
+# ────────────────────────────────────────────────────────────────────────────────
+# k-means training rows: embeddings are wide (4096-d), so cap rows, not bytes.
+# Each list needs a distinct seed row, so this also caps nlist.
+MAX_TRAIN_ROWS = 32_768
+
+
+def _default_nlist(n: int) -> int:
+    # ~4·sqrt(N) lists; tiny catalogs degrade to a single (exact) list.
+    if n < 1024:
+        return 1
+    return int(min(4096, 4 * np.sqrt(n)))
+
+
+def _train_centroids(vectors: np.ndarray, nlist: int, iters: int = 12, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on a sample of the (normalised) vectors."""
+    n = vectors.shape[0]
+    rng = np.random.default_rng(seed)
+    sample_size = min(n, max(nlist * 32, 10_000), MAX_TRAIN_ROWS)
+    sample_rows = np.sort(rng.choice(n, size=sample_size, replace=False))
+    sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+
+    centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = _assign(sample, centroids)
+        order = np.argsort(assign, kind='stable')
+        counts = np.bincount(assign, minlength=nlist)
+        sums = np.zeros_like(centroids)
+        present = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)])[present]
+        sums[present] = np.add.reduceat(sample[order], starts, axis=0)
+        empty = np.flatnonzero(counts == 0)
+        if empty.size:
+            sums[empty] = sample[rng.choice(sample_size, size=empty.size, replace=False)]
+        centroids = _normalize_rows(sums).astype(np.float32)
+    return centroids
+
+
+def _assign(vectors, centroids) -> np.ndarray:
+    out = np.empty(vectors.shape[0], dtype=np.int64)
+    for start in range(0, vectors.shape[0], _SCAN_BLOCK):
+        block = np.asarray(vectors[start:start + _SCAN_BLOCK], dtype=np.float32)
+        out[start:start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def iter_book_embeddings(chunk_size: int = 1000):
+    """Yield `(book_id, embedding)` for books that have a vector, without model instances."""
+    from api.models import Book
+
+    qs = (
+        Book.objects.exclude(embedding__isnull=True)
+        .order_by('id')
+        .values_list('id', 'embedding')
+    )
+    for book_id, emb in qs.iterator(chunk_size=chunk_size):
+        if isinstance(emb, list) and emb:
+            yield book_id, emb
+
+
+def build_index(rows, nlist: int | None = None, nprobe: int | None = None,
+                root: Path | None = None, keep_builds: int = 2) -> Path:
+    """Build a new index from `(book_id, vector)` pairs and atomically make it current.
+
+    Returns the build directory. Rows whose dimension differs from the first row are skipped.
+    """
+    root = Path(root or _index_root())
+    builds = root / 'builds'
+    builds.mkdir(parents=True, exist_ok=True)
+    name = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    tmp_dir = builds / f'.{name}.tmp'
+    tmp_dir.mkdir()
+
+    try:
+        ids, staging = stage_vectors(rows, tmp_dir)
+        n = ids.shape[0]
+        if n == 0:
+            raise ValueError('no embeddings to index')
+        dim = staging.shape[1]
+
+        nlist = max(1, min(int(nlist or _default_nlist(n)), n, MAX_TRAIN_ROWS))
+        if nlist > 1:
+            centroids = _train_centroids(staging, nlist)
+            assign = _assign(staging, centroids)
+        else:
+            centroids = _normalize_rows(staging.sum(axis=0, keepdims=True, dtype=np.float32)).astype(np.float32)
+            assign = np.zeros(n, dtype=np.int64)
+
+        # Group rows by list so each list is one contiguous slice on disk.
+        order = np.argsort(assign, kind='stable')
+        counts = np.bincount(assign, minlength=nlist)
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        vectors = np.lib.format.open_memmap(tmp_dir / VECTORS_FILE, mode='w+', dtype=np.float32, shape=(n, dim))
+        for start in range(0, n, _SCAN_BLOCK):
+            vectors[start:start + _SCAN_BLOCK] = staging[order[start:start + _SCAN_BLOCK]]
+        vectors.flush()
+        del vectors, staging
+        os.remove(tmp_dir / 'staging.npy')
+
+        np.save(tmp_dir / IDS_FILE, ids[order])
+        np.save(tmp_dir / CENTROIDS_FILE, centroids)
+        np.save(tmp_dir / OFFSETS_FILE, offsets)
+
+        if nprobe is None:
+            nprobe = 1 if nlist == 1 else max(1, int(np.ceil(nlist * 0.1)))
+        meta = {
+            'count': int(n),
+            'dim': int(dim),
+            'nlist': int(nlist),
+            'nprobe': int(min(nprobe, nlist)),
+            'built_at': datetime.now(timezone.utc).isoformat(),
+        }
+        (tmp_dir / META_FILE).write_text(json.dumps(meta), encoding='utf-8')
+
+        final_dir = builds / name
+        os.rename(tmp_dir, final_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    _swap_current(root, final_dir)
+    _prune_builds(builds, keep=keep_builds)
+    return final_dir
+
+
+def stage_vectors(rows, tmp_dir: Path):
+    """Write normalised `(id, vector)` rows to `tmp_dir/staging.npy` without holding them in RAM.
+
+    The file grows by doubling, so it may hold more rows than returned; the
+    returned memmap view is trimmed to the rows actually written.
+    """
+    tmp_dir = Path(tmp_dir)
+    ids: list[int] = []
+    staging = None
+    capacity = 0
+    dim = None
+    for book_id, emb in rows:
+        vec = np.asarray(emb, dtype=np.float32).reshape(-1)
+        if dim is None:
+            dim = vec.shape[0]
+        if vec.shape[0] != dim:
+            continue
+        if len(ids) >= capacity:
+            capacity = max(1024, capacity * 2)
+            grown = np.lib.format.open_memmap(tmp_dir / 'staging.next.npy', mode='w+',
+                                              dtype=np.float32, shape=(capacity, dim))
+            if staging is not None:
+                grown[:len(ids)] = staging[:len(ids)]
+                del staging
+            grown.flush()
+            os.replace(tmp_dir / 'staging.next.npy', tmp_dir / 'staging.npy')
+            staging = grown
+        staging[len(ids)] = _normalize(vec)
+        ids.append(int(book_id))
+
+    if staging is None:
+        return np.empty(0, dtype=np.int64), None
+    return np.asarray(ids, dtype=np.int64), staging[:len(ids)]
+
+
+def _swap_current(root: Path, target: Path) -> None:
+    link = root / 'current'
+    tmp_link = root / f'.current.{os.getpid()}.{threading.get_ident()}'
+    if tmp_link.is_symlink() or tmp_link.exists():
+        tmp_link.unlink()
+    os.symlink(os.path.relpath(target, root), tmp_link)
+    os.replace(tmp_link, link)  # atomic on POSIX
+
+
+def _prune_builds(builds: Path, keep: int) -> None:
+    done = sorted(p for p in builds.iterdir() if p.is_dir() and not p.name.startswith('.'))
+    # Already-open mmaps in other workers stay valid after unlink on POSIX.
+    for old in done[:-keep] if keep > 0 else []:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def build_index_from_db(**kwargs) -> Path:
+    return build_index(iter_book_embeddings(), **kwargs)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+#                       per-process handle
+# ────────────────────────────────────────────────────────────────────────────────
+_lock = threading.Lock()
+_state = {'index': None, 'target': None, 'root': None, 'checked_at': 0.0}
+
+
+def get_index(root: Path | None = None) -> VectorIndex | None:
+    """Return the current index for this process, reopening it after a rebuild.
+
+    The `current` symlink is re-read at most every `VECTOR_INDEX_RELOAD_SECONDS`.
+    Returns None when no index has been built yet.
+    """
+    root = Path(root or _index_root())
+    interval = float(getattr(settings, 'VECTOR_INDEX_RELOAD_SECONDS', 30))
+    now = time.monotonic()
+    with _lock:
+        cached = _state['index']
+        if cached is not None and now - _state['checked_at'] < interval and _state['root'] == root:
+            return cached
+        _state['checked_at'], _state['root'] = now, root
+        try:
+            target = (root / 'current').resolve(strict=True)
+        except (FileNotFoundError, OSError):
+            _state['index'], _state['target'] = None, None
+            return None
+        if cached is None or target != _state['target']:
+            _state['index'], _state['target'] = VectorIndex(target), target
+        return _state['index']
+
+
+def reset_index_cache() -> None:
+    with _lock:
+        _state['index'], _state['target'], _state['root'], _state['checked_at'] = None, None, None, 0.0
+
+
+def recall_at_k(index: VectorIndex, k: int = 10, sample: int = 200, nprobe: int | None = None,
+                seed: int = 0) -> float:
+    """Mean recall@k of `search()` against `exact_search()`, using indexed rows as queries."""
+    n = len(index)
+    if n == 0:
+        return 1.0
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(n, size=min(sample, n), replace=False)
+    hits = 0
+    total = 0
+    for r in rows:
+        q = np.asarray(index.vectors[r])
+        truth = {bid for bid, _ in index.exact_search(q, k)}
+        got = {bid for bid, _ in index.search(q, k, nprobe=nprobe)}
+        hits += len(truth & got)
+        total += len(truth)
+    return hits / total if total else 1.0
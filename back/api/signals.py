@@ -0,0 +1,164 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from api.models import Author, Book, Category, Genre, Review, upgrade_cover_url
+from api.services import (
+    book_versions, co_reading, popularity, response_cache, search_index, shelves, user_recommendations,
+)
+
+User = get_user_model()
+
+# Book fields that never appear in cached collection responses.
+_UNCACHED_BOOK_FIELDS = frozenset({'embedding', 'embedding_key'})
+# User fields shown on their reviews inside a book's detail response.
+_REVIEWER_FIELDS = frozenset({'email', 'nickname', 'avatar', 'default_avatar'})
+
+
+@receiver(pre_save, sender=Book)
+def store_upgraded_cover_url(sender, instance, **kwargs):
+    # Also runs for loaddata (raw); bulk writes call upgrade_cover_url themselves.
+    instance.cover_url = upgrade_cover_url(instance.cover_url)
+
+
+@receiver(post_save, sender=Book)
+def index_saved_book(sender, instance, update_fields=None, **kwargs):
+    # e.g. create_embedding() saves only embedding fields: nothing to re-index.
+    if update_fields is not None and not search_index.INDEXED_FIELDS.intersection(update_fields):
+        return
+    search_index.index_books([instance.pk])
+
+
+@receiver(post_delete, sender=Book)
+def unindex_deleted_book(sender, instance, **kwargs):
+    search_index.remove_books([instance.pk])
+
+
+@receiver(post_save, sender=Author)
+def reindex_author_books(sender, instance, created=False, **kwargs):
+    if not created:
+        search_index.index_books(instance.books.values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=User.favorites.through)
+@receiver(m2m_changed, sender=User.read_books.through)
+def mark_user_recommendations_dirty(sender, instance, action, reverse, pk_set=None, **kwargs):
+    """Shelf changed → `update_user_recommendations --dirty` rebuilds the affected users' lists."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        user_recommendations.mark_dirty([instance.pk])
+    elif pk_set:
+        user_recommendations.mark_dirty(pk_set)  # book.favored_by.add(user, ...)
+
+
+@receiver(m2m_changed, sender=User.favorites.through)
+@receiver(m2m_changed, sender=User.read_books.through)
+def mark_co_reading_dirty(sender, instance, action, reverse, pk_set=None, **kwargs):
+    """Log books whose readers changed; `update_also_read --incremental` rescores them."""
+    if reverse:
+        # book.favored_by.add(...) / .clear(): the book's own readers changed
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            co_reading.mark_dirty([instance.pk])
+    elif action in ('post_add', 'post_remove') and pk_set:
+        co_reading.mark_dirty(pk_set)
+    elif action == 'pre_clear':
+        co_reading.mark_dirty(sender.objects.filter(user_id=instance.pk).values_list('book_id', flat=True))
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def bump_catalog_version_for_book(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= _UNCACHED_BOOK_FIELDS:
+        return
+    response_cache.bump_catalog_version()
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def bump_catalog_version(sender, **kwargs):
+    """Cached home collections embed review counts and category/genre/author names."""
+    response_cache.bump_catalog_version()
+
+
+@receiver(m2m_changed, sender=User.favorites.through)
+def count_favorite(sender, instance, action, reverse, pk_set=None, **kwargs):
+    # post_add's pk_set holds only the newly added rows
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        popularity.record('favorite', instance.pk, count=len(pk_set))
+    else:
+        for book_id in pk_set:
+            popularity.record('favorite', book_id)
+
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance, created=False, **kwargs):
+    if created:
+        popularity.record('review', instance.book_id)
+
+
+@receiver(m2m_changed, sender=User.favorites.through)
+@receiver(m2m_changed, sender=User.read_books.through)
+def log_shelf_event(sender, instance, action, reverse, pk_set=None, **kwargs):
+    """Append to the shelf log that `/api/auth/users/me?since=` reads."""
+    shelf = 'favorites' if sender is User.favorites.through else 'read_books'
+    if action in ('post_add', 'post_remove') and pk_set:
+        user_ids, book_ids = (pk_set, [instance.pk]) if reverse else ([instance.pk], pk_set)
+        shelves.log(shelf, user_ids, book_ids, added=action == 'post_add')
+    elif action == 'pre_clear':
+        if reverse:
+            user_ids = sender.objects.filter(book_id=instance.pk).values_list('user_id', flat=True)
+            shelves.log(shelf, user_ids, [instance.pk], added=False)
+        else:
+            book_ids = sender.objects.filter(user_id=instance.pk).values_list('book_id', flat=True)
+            shelves.log(shelf, [instance.pk], book_ids, added=False)
+
+
+@receiver(pre_delete, sender=Book)
+def log_deleted_book_shelves(sender, instance, **kwargs):
+    shelves.log_book_removed(instance.pk)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def touch_reviewed_book(sender, instance, **kwargs):
+    book_versions.touch([instance.book_id])
+
+
+@receiver(m2m_changed, sender=Book.similar_books.through)
+def touch_book_with_new_similar(sender, instance, action, reverse, pk_set=None, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        book_versions.touch([instance.pk])
+    elif pk_set:
+        book_versions.touch(pk_set)  # other.recommended_for.add(book, ...)
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Author)
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def touch_books_in_group(sender, instance, created=False, **kwargs):
+    """Detail responses embed author/category/genre names (and lose them on SET_NULL)."""
+    if not created:
+        field = sender.__name__.lower()
+        book_versions.touch(Book.objects.filter(**{field: instance}).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=User)
+def touch_books_reviewed_by(sender, instance, created=False, update_fields=None, **kwargs):
+    # e.g. login only saves last_login: nothing shown on reviews changed
+    if created or (update_fields is not None and not _REVIEWER_FIELDS.intersection(update_fields)):
+        return
+    book_versions.touch(Review.objects.filter(user=instance).values_list('book_id', flat=True).distinct())
@@ -0,0 +1,70 @@
+"""Opt-in streamed JSON for large collection responses (`?stream=1`).
+
+`JSONRenderer` serializes the whole result list and encodes it as one byte
+string before the first byte goes out. Here the queryset is read with
+`.iterator(chunk_size=STREAM_CHUNK_SIZE)` and each chunk is serialized, encoded
+and sent on its own, so a request holds one chunk of rows at a time whatever
+the result size. Chunks are encoded by `api.renderers.dumps`, so the bytes are
+the same as the non-streamed body.
+
+Under ASGI a synchronous generator would be drained into a list by Django
+before sending, so there the chunks are pulled one at a time through
+`sync_to_async` (in the request's own sync thread, which owns the DB cursor).
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from api.renderers import dumps as _dumps
+
+STREAM_QUERY_PARAM = 'stream'
+_TRUE = ('1', 'true', 'yes')
+
+
+def wants_stream(request) -> bool:
+    return str(request.query_params.get(STREAM_QUERY_PARAM, '')).lower() in _TRUE
+
+
+def chunk_size() -> int:
+    return max(1, int(getattr(settings, 'STREAM_CHUNK_SIZE', 500)))
+
+
+def iter_array(queryset, serialize, size: int | None = None):
+    """Yield a JSON array of `serialize(rows)` for `queryset`, one encoded chunk at a time."""
+    size = size or chunk_size()
+    yield b'['
+    first, batch = True, []
+    for obj in queryset.iterator(chunk_size=size):
+        batch.append(obj)
+        if len(batch) >= size:
+            yield (b'' if first else b',') + _dumps(serialize(batch))[1:-1]
+            first, batch = False, []
+    if batch:
+        yield (b'' if first else b',') + _dumps(serialize(batch))[1:-1]
+    yield b']'
+
+
+def iter_object(head: dict, key: str, array_chunks):
+    """Yield `{**head, key: <streamed array>}`."""
+    encoded = _dumps(head)
+    yield encoded[:-1] + (b',' if head else b'') + _dumps(key) + b':'
+    yield from array_chunks
+    yield b'}'
+
+
+async def _aiter(chunks):
+    step = sync_to_async(next, thread_sensitive=True)
+    it = iter(chunks)
+    while True:
+        chunk = await step(it, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def response(request, chunks) -> StreamingHttpResponse:
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        chunks = _aiter(chunks)
+    return StreamingHttpResponse(chunks, content_type='application/json')
@@ -1,8 +1,35 @@
 # backend/api/tests.py
 
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.models import Author, Book, Category, EmbeddingCache, Genre, Review
 from api.services.aladin import fetch_best_sellers
+from api.services import clients, embedding_batcher, embedding_cache, vector_index
+
+User = get_user_model()
+
+
+ALADIN_FIXTURES = Path(__file__).resolve().parent / 'fixtures' / 'aladin'
+
 
+# 녹화된 알라딘 응답(api/fixtures/aladin)으로 오프라인 실행
+@override_settings(ALADIN_CACHE_MODE='replay', ALADIN_CACHE_DIR=ALADIN_FIXTURES)
 class AladinServiceTest(TestCase):
     def test_fetch_best_sellers(self):
         books = fetch_best_sellers()
@@ -12,4 +39,2032 @@ class AladinServiceTest(TestCase):
         # 최소한 title 과 author 필드가 있어야 한다
         first = books[0]
         self.assertIn('title', first)
-        self.assertIn('author', first)
\ No newline at end of file
+        self.assertIn('author', first)
+
+
+def make_catalog(n_books=40, reviews_per_book=3):
+    """Create a small catalog with reviews for API tests."""
+    category = Category.objects.create(name='베스트셀러')
+    genre = Genre.objects.create(name='소설/시/희곡')
+    user = User.objects.create_user(username='reader', email='reader@example.com', password='pw')
+    books = []
+    for i in range(n_books):
+        author = Author.objects.create(name=f'작가{i}')
+        books.append(Book.objects.create(
+            isbn=f'978000000{i:04d}',
+            title=f'도서 {i}',
+            cover_url=f'https://image.aladin.co.kr/product/{i}/cover200/x.jpg',
+            description='설명',
+            global_recommend_count=i,
+            author=author,
+            category=category,
+            genre=genre,
+        ))
+    Review.objects.bulk_create([
+        Review(book=b, user=user, content=f'리뷰 {j}')
+        for b in books for j in range(reviews_per_book)
+    ])
+    return books
+
+
+@override_settings(OPENAI_API_KEY=None, GMS_KEY=None, OPENAI_BASE_URL=None)
+class BookListSerializationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.books = make_catalog()
+
+    def test_list_returns_cards_without_reviews(self):
+        resp = self.client.get('/api/books/')
+        self.assertEqual(resp.status_code, 200)
+        card = resp.json()['results'][0]
+        self.assertNotIn('reviews', card)
+        self.assertNotIn('similar_books', card)
+        self.assertEqual(card['review_count'], 3)
+        self.assertIn('/cover500/', card['cover_url'])
+
+    def test_collection_query_count_is_constant(self):
+        with self.assertNumQueries(1):
+            self.client.get('/api/books/')
+        with self.assertNumQueries(1):
+            self.client.get('/api/books/top-recommended/')
+        # ranked FTS ids + one card query
+        with self.assertNumQueries(2):
+            self.client.get('/api/books/ai-search/', {'prompt': '도서'})
+
+    def test_retrieve_keeps_reviews(self):
+        resp = self.client.get(f'/api/books/{self.books[0].id}/')
+        data = resp.json()
+        self.assertEqual(len(data['reviews']), 3)
+        self.assertEqual(data['review_count'], 3)
+
+
+class BookKeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.books = make_catalog(n_books=25, reviews_per_book=0)
+        # Ties and NULLs exercise the (field, id) tiebreak.
+        Book.objects.filter(id__in=[b.id for b in self.books[:10]]).update(global_recommend_count=5)
+        for i, b in enumerate(self.books):
+            b.pub_date = None if i % 4 == 0 else date(2020, 1, 1 + i % 3)
+            b.save(update_fields=['pub_date'])
+
+    def _walk(self, params):
+        ids, url, pages = [], '/api/books/', 0
+        while url:
+            resp = self.client.get(url, params if pages == 0 else None)
+            self.assertEqual(resp.status_code, 200)
+            body = resp.json()
+            ids.extend(b['id'] for b in body['results'])
+            url, pages = body['next'], pages + 1
+        return ids, pages
+
+    def test_walks_every_ordering_without_gaps(self):
+        expected = {
+            '-global_recommend_count': list(
+                Book.objects.order_by('-global_recommend_count', 'id').values_list('id', flat=True)),
+            '-pub_date': list(
+                Book.objects.order_by(F('pub_date').desc(nulls_last=True), 'id').values_list('id', flat=True)),
+            'pub_date': list(
+                Book.objects.order_by(F('pub_date').asc(nulls_last=True), 'id').values_list('id', flat=True)),
+        }
+        for ordering, ids in expected.items():
+            got, pages = self._walk({'ordering': ordering, 'page_size': 4})
+            self.assertEqual(got, ids, ordering)
+            self.assertEqual(pages, 7)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get('/api/books/', {'page_size': 5, 'ordering': '-pub_date'}).json()
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual([b['id'] for b in back['results']], [b['id'] for b in first['results']])
+        self.assertIsNone(first['previous'])
+
+    def test_combines_with_filters_and_search(self):
+        other = Genre.objects.create(name='과학')
+        Book.objects.filter(id__in=[b.id for b in self.books[:3]]).update(genre=other)
+        got, _ = self._walk({'genre': other.id, 'page_size': 2})
+        self.assertEqual(sorted(got), sorted(b.id for b in self.books[:3]))
+        got, _ = self._walk({'search': '작가1', 'page_size': 2})
+        self.assertEqual(sorted(got), sorted(
+            Book.objects.filter(author__name__icontains='작가1').values_list('id', flat=True)))
+
+    def test_invalid_cursor_is_404(self):
+        resp = self.client.get('/api/books/', {'cursor': 'garbage!'})
+        self.assertEqual(resp.status_code, 404)
+
+
+def clustered_vectors(n=3000, dim=32, clusters=40, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=n)
+    return (centers[labels] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+class VectorIndexTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        vector_index.reset_index_cache()
+
+    def tearDown(self):
+        vector_index.reset_index_cache()
+        self.tmp.cleanup()
+
+    def test_ivf_recall_against_exact_search(self):
+        vecs = clustered_vectors()
+        path = vector_index.build_index(((i + 1, v) for i, v in enumerate(vecs)), nlist=32, root=self.root)
+        index = vector_index.VectorIndex(path)
+        self.assertEqual(len(index), len(vecs))
+        self.assertIsInstance(index.vectors, np.memmap)
+        self.assertGreaterEqual(vector_index.recall_at_k(index, k=10, sample=100), 0.9)
+
+        # Exact search agrees with plain numpy cosine.
+        normed = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+        expected = list(np.argsort(-(normed @ normed[7]))[:5] + 1)
+        self.assertEqual([bid for bid, _ in index.exact_search(vecs[7], k=5)], expected)
+
+    def test_nlist_is_clamped_to_the_training_sample(self):
+        vecs = clustered_vectors(n=200)
+        with mock.patch.object(vector_index, 'MAX_TRAIN_ROWS', 50):
+            path = vector_index.build_index(((i + 1, v) for i, v in enumerate(vecs)), nlist=120, root=self.root)
+        index = vector_index.VectorIndex(path)
+        self.assertEqual(index.nlist, 50)
+        self.assertEqual(len(index), 200)
+
+    def test_search_excludes_ids(self):
+        vecs = clustered_vectors(n=200)
+        index = vector_index.VectorIndex(
+            vector_index.build_index(((i + 1, v) for i, v in enumerate(vecs)), root=self.root))
+        top = [bid for bid, _ in index.search(vecs[0], k=3, exclude={1})]
+        self.assertNotIn(1, top)
+        self.assertEqual(len(top), 3)
+
+    def test_rebuild_swaps_current_atomically(self):
+        vecs = clustered_vectors(n=100)
+        with override_settings(VECTOR_INDEX_DIR=self.root, VECTOR_INDEX_RELOAD_SECONDS=0):
+            first = vector_index.build_index(((i + 1, v) for i, v in enumerate(vecs)))
+            self.assertEqual(vector_index.get_index().path, first.resolve())
+            second = vector_index.build_index(((i + 1, v) for i, v in enumerate(vecs[:50])))
+            self.assertEqual(vector_index.get_index().path, second.resolve())
+            self.assertEqual(len(vector_index.get_index()), 50)
+        self.assertTrue((self.root / 'current').is_symlink())
+
+    def test_builds_from_stored_embeddings(self):
+        books = make_catalog(n_books=5, reviews_per_book=0)
+        for b, v in zip(books[:4], clustered_vectors(n=4, dim=8)):
+            b.embedding = v.tolist()
+            b.save(update_fields=['embedding'])
+        index = vector_index.VectorIndex(vector_index.build_index_from_db(root=self.root))
+        self.assertEqual(sorted(index.ids.tolist()), sorted(b.id for b in books[:4]))
+        self.assertEqual(index.search(books[0].embedding, k=1)[0][0], books[0].id)
+
+
+class UpdateSimilarBooksTest(TestCase):
+    def setUp(self):
+        self.books = make_catalog(n_books=30, reviews_per_book=0)
+        other = Genre.objects.create(name='과학')
+        Book.objects.filter(id__in=[b.id for b in self.books[20:]]).update(genre=other)
+        for b, v in zip(self.books[:20], clustered_vectors(n=20, dim=16, clusters=4)):
+            b.embedding = v.tolist()
+            b.save(update_fields=['embedding'])
+
+    def _snapshot(self):
+        return {b.id: set(b.similar_books.values_list('id', flat=True)) for b in Book.objects.all()}
+
+    def test_blocked_engine_matches_legacy(self):
+        call_command('update_similar_books', stdout=io.StringIO())
+        legacy = self._snapshot()
+        for workers in (1, 2):
+            Book.similar_books.through.objects.all().delete()
+            call_command('update_similar_books', engine='blocked', workers=workers, block_size=7,
+                         stdout=io.StringIO())
+            self.assertEqual(self._snapshot(), legacy)
+
+    def test_blocked_engine_writes_k_links_per_book(self):
+        call_command('update_similar_books', engine='blocked', k=3, stdout=io.StringIO())
+        through = Book.similar_books.through
+        self.assertEqual(through.objects.count(), 3 * len(self.books))
+        self.assertFalse(through.objects.filter(from_book_id=F('to_book_id')).exists())
+
+
+class FakeEmbeddingServer:
+    """Local OpenAI-compatible /v1/embeddings endpoint for tests.
+
+    Each vector is `[len(text), i]`; `fail_first` requests answer with HTTP 500.
+    """
+
+    def __init__(self, fail_first=0, delay=0.0):
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_first = fail_first
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with server.lock:
+                    server.requests.append(body)
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                    fail = len(server.requests) <= server.fail_first
+                time.sleep(delay)
+                with server.lock:
+                    server.in_flight -= 1
+                if fail:
+                    self.send_response(500)
+                    self.send_header('Content-Type', 'application/json')
+                    self.end_headers()
+                    self.wfile.write(b'{"error": {"message": "boom"}}')
+                    return
+                inputs = body['input'] if isinstance(body['input'], list) else [body['input']]
+                payload = {
+                    'object': 'list',
+                    'model': body['model'],
+                    'data': [
+                        {'object': 'embedding', 'index': i, 'embedding': [float(len(t)), float(i)]}
+                        for i, t in reversed(list(enumerate(inputs)))
+                    ],
+                    'usage': {'prompt_tokens': 0, 'total_tokens': 0},
+                }
+                raw = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}/v1'
+
+    def __enter__(self):
+        self.thread.start()
+        self.env = mock.patch.dict(os.environ, {'UPSTAGE_API_KEY': 'test', 'UPSTAGE_BASE_URL': self.base_url})
+        self.env.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.env.stop()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class EmbeddingBatcherTest(TestCase):
+    def test_batches_concurrency_and_order(self):
+        texts = [f'text-{"x" * i}' for i in range(50)]
+        with FakeEmbeddingServer(delay=0.05) as server:
+            vectors = embedding_batcher.embed_texts(texts, batch_size=8, concurrency=3)
+        self.assertEqual(len(server.requests), 7)
+        self.assertLessEqual(server.max_in_flight, 3)
+        self.assertGreater(server.max_in_flight, 1)
+        self.assertEqual([v[0] for v in vectors], [float(len(t)) for t in texts])
+
+    def test_retries_transient_errors_with_backoff(self):
+        stats = embedding_batcher.EmbeddingStats()
+        with FakeEmbeddingServer(fail_first=2):
+            vectors = embedding_batcher.embed_texts(['a', 'bb'], batch_size=2, backoff=0.01, stats=stats)
+        self.assertEqual(vectors, [[1.0, 0.0], [2.0, 1.0]])
+        self.assertEqual((stats.requests, stats.retries, stats.failed), (3, 2, 0))
+
+    def test_rate_limit_spaces_requests(self):
+        started = time.monotonic()
+        with FakeEmbeddingServer():
+            embedding_batcher.embed_texts(['a'] * 5, batch_size=1, concurrency=5, rps=20)
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+    def test_command_bulk_updates_missing_embeddings(self):
+        books = make_catalog(n_books=10, reviews_per_book=0)
+        with FakeEmbeddingServer() as server:
+            call_command('update_similar_books', create_embeddings=True, embed_batch_size=4,
+                         stdout=io.StringIO())
+        self.assertEqual(len(server.requests), 3)
+        self.assertFalse(Book.objects.filter(embedding__isnull=True).exists())
+        self.assertEqual(Book.objects.get(id=books[0].id).embedding[0], float(len('도서 0 설명')))
+
+
+class EmbeddingCacheTest(TestCase):
+    def setUp(self):
+        self.books = make_catalog(n_books=6, reviews_per_book=0)
+
+    def _embed_all(self, **kwargs):
+        stats = embedding_batcher.EmbeddingStats()
+        cache_stats = embedding_cache.CacheStats()
+        with FakeEmbeddingServer() as server:
+            embedding_batcher.embed_books(embedding_batcher.iter_books_needing_embedding(),
+                                          stats=stats, cache_stats=cache_stats, **kwargs)
+        return server, stats, cache_stats
+
+    def test_changed_text_invalidates_and_identical_text_shares(self):
+        Book.objects.filter(id=self.books[1].id).update(title='도서 0')  # same text as books[0]
+        server, stats, _ = self._embed_all()
+        self.assertEqual(sum(len(r['input']) for r in server.requests), 5)
+        self.assertEqual(stats.deduped, 1)
+        self.assertEqual(EmbeddingCache.objects.count(), 5)
+
+        # Nothing is stale now: no work, no requests.
+        self.assertEqual(list(embedding_batcher.iter_books_needing_embedding()), [])
+
+        book = Book.objects.get(id=self.books[2].id)
+        book.description = '새로운 설명'
+        book.save()
+        self.assertEqual([b.id for b in embedding_batcher.iter_books_needing_embedding()], [book.id])
+
+    def test_reimported_text_is_a_cache_hit(self):
+        self._embed_all()
+        first = Book.objects.get(id=self.books[0].id)
+        vector = first.embedding
+        first.delete()
+        Book.objects.create(isbn='9789999999999', title=first.title, description=first.description)
+
+        server, stats, cache_stats = self._embed_all()
+        self.assertEqual(server.requests, [])
+        self.assertEqual((cache_stats.hits, cache_stats.misses), (1, 0))
+        self.assertEqual(cache_stats.hit_rate, 1.0)
+        self.assertEqual(Book.objects.get(isbn='9789999999999').embedding, vector)
+
+    def test_model_create_embedding_uses_cache(self):
+        book = self.books[0]
+        with FakeEmbeddingServer() as server:
+            book.create_embedding()
+            Book.objects.get(id=book.id).create_embedding()  # key matches: no-op
+            other = Book.objects.create(isbn='9789999999998', title=book.title, description=book.description)
+            other.create_embedding()
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(Book.objects.get(id=other.id).embedding, Book.objects.get(id=book.id).embedding)
+
+
+def aladin_item(i, **overrides):
+    item = {
+        'title': f'책 제목 {i} - 부제 (개정판)',
+        'author': f'저자{i % 7} (지은이)',
+        'isbn13': f'979110000{i:04d}',
+        'isbn': f'110000{i:04d}',
+        'publisher': f'출판사{i % 3}',
+        'cover': f'https://image.aladin.co.kr/product/{i}/cover200/x.jpg',
+        'description': f'소개 {i}' if i % 5 else '',
+        'pubDate': f'2024-0{1 + i % 9}-1{i % 10}',
+        'categoryName': ['국내도서>소설/시/희곡', '국내도서>경제경영', '국내도서>과학'][i % 3],
+    }
+    item.update(overrides)
+    return item
+
+
+class FakeAladinPages:
+    """Stand-in for `fetch_aladin_books` serving fixed item lists page by page."""
+
+    def __init__(self, items_by_query_type, delay=0.0):
+        self.items = items_by_query_type
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, query_type, max_results=50, start=1, **extra):
+        with self.lock:
+            self.calls.append((query_type, start))
+        time.sleep(self.delay)
+        items = self.items.get(query_type, [])
+        return items[(start - 1) * max_results:start * max_results]
+
+
+class UpdateAladinBooksBulkTest(TestCase):
+    SOURCES = {
+        'Bestseller': [aladin_item(i) for i in range(0, 40)],
+        'ItemNewAll': [aladin_item(i) for i in range(30, 70)] + [aladin_item(99, isbn13='', isbn='')],
+        'BlogBest': [aladin_item(i) for i in range(60, 90)] + [aladin_item(60)],
+    }
+
+    def _sync(self, bulk, sources=None, **opts):
+        fake = FakeAladinPages(sources or self.SOURCES)
+        with mock.patch('api.services.aladin.fetch_aladin_books', fake):
+            call_command('update_aladin_books', bulk=bulk, per_page=10, stdout=io.StringIO(), **opts)
+        return fake
+
+    def _snapshot(self):
+        return sorted(Book.objects.values_list(
+            'isbn', 'title', 'author__name', 'publisher', 'cover_url', 'description', 'pub_date',
+            'genre__name', 'category__name', 'global_recommend_count'))
+
+    def _reset_with_existing_rows(self):
+        Book.objects.all().delete()
+        Author.objects.all().delete()
+        Category.objects.all().delete()
+        # A pre-existing book without category and with popularity must keep popularity.
+        Book.objects.create(isbn='9791100000005', title='old', global_recommend_count=7)
+
+    def test_bulk_mode_matches_row_by_row_sync(self):
+        changed = dict(self.SOURCES)
+        changed['Bestseller'] = [aladin_item(i, description='바뀐 소개') for i in range(0, 40)]
+
+        snapshots = {}
+        for bulk in (False, True):
+            self._reset_with_existing_rows()
+            self._sync(bulk)
+            self._sync(bulk, changed)  # second pass exercises the update path
+            snapshots[bulk] = self._snapshot()
+        self.assertEqual(snapshots[True], snapshots[False])
+        self.assertEqual(len(snapshots[True]), 90)
+        old = Book.objects.get(isbn='9791100000005')
+        self.assertEqual((old.global_recommend_count, old.category.name), (7, '베스트셀러'))
+
+    def test_bulk_resync_touches_only_changed_rows(self):
+        self._sync(True)
+        before = dict(Book.objects.values_list('isbn', 'updated_at'))
+        changed = dict(self.SOURCES)
+        changed['Bestseller'] = [aladin_item(i, description='바뀐 소개') if i < 5 else aladin_item(i)
+                                 for i in range(0, 40)]
+        with mock.patch('api.services.search_index.index_books') as index_books:
+            self._sync(True, changed)
+        after = dict(Book.objects.values_list('isbn', 'updated_at'))
+        moved = {isbn for isbn in before if after[isbn] != before[isbn]}
+        self.assertEqual(moved, {aladin_item(i)['isbn13'] for i in range(5)})
+        self.assertEqual(sum(len(list(c.args[0])) for c in index_books.call_args_list), 5)
+
+    def test_failed_page_cancels_the_rest_and_still_reports(self):
+        from api.services import response_cache
+
+        fake = FakeAladinPages(self.SOURCES, delay=0.02)
+
+        def failing(query_type, max_results=50, start=1, **extra):
+            if (query_type, start) == ('ItemNewAll', 2):
+                with fake.lock:
+                    fake.calls.append((query_type, start))
+                raise RuntimeError('Aladin API error 10: quota')
+            return fake(query_type, max_results=max_results, start=start, **extra)
+
+        version = response_cache.catalog_version()
+        out, err = io.StringIO(), io.StringIO()
+        with mock.patch('api.services.aladin.fetch_aladin_books', failing), self.assertRaises(RuntimeError):
+            call_command('update_aladin_books', bulk=True, per_page=10, parallel=1, stdout=out, stderr=err)
+        # the pages before the failure were stored; the ones after it were never requested
+        self.assertEqual(Book.objects.filter(category__name='베스트셀러').count(), 40)
+        self.assertLessEqual(len(fake.calls), 9)
+        self.assertNotIn(('BlogBest', 1), fake.calls)
+        self.assertIn("✓ '베스트셀러' 완료 (upserted=40", out.getvalue())
+        self.assertIn("✗ '신간' 중단", err.getvalue())
+        self.assertIn('Aladin cache[', out.getvalue())
+        self.assertNotEqual(response_cache.catalog_version(), version)
+
+    def test_bulk_mode_query_count_does_not_scale_with_items(self):
+        self._sync(True)
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            self._sync(True)
+        self.assertLess(len(ctx.captured_queries), 60)
+
+
+class AladinFetcherTest(TestCase):
+    def test_pages_fetched_concurrently_and_yielded_in_order(self):
+        from api.services.aladin import iter_source_pages
+
+        items = {qt: [aladin_item(i) for i in range(base, base + 100)]
+                 for qt, base in (('Bestseller', 0), ('ItemNewAll', 1000), ('BlogBest', 2000))}
+        fake = FakeAladinPages(items, delay=0.05)
+        started = time.monotonic()
+        with mock.patch('api.services.aladin.fetch_aladin_books', fake):
+            pages = list(iter_source_pages(list(items), total=100, per_page=10, parallelism=10))
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(len(fake.calls), 30)
+        self.assertLess(elapsed, 30 * 0.05 / 3)
+        flat = [(qt, it['isbn']) for qt, page in pages for it in page]
+        self.assertEqual(flat, [(qt, it['isbn']) for qt in items for it in items[qt]])
+
+    def test_retries_server_errors_over_pooled_session(self):
+        from api.services import aladin
+
+        hits = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                hits.append(self.path)
+                if len(hits) < 3:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                raw = json.dumps({'item': [aladin_item(1)]}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+        httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{httpd.server_address[1]}/ttb/api/ItemList.aspx'
+        try:
+            clients.reset()
+            with override_settings(ALADIN_BASE_URL=url, ALADIN_API_KEY='k', ALADIN_CACHE_MODE='off'), \
+                    mock.patch('urllib3.util.retry.Retry.DEFAULT_BACKOFF_MAX', 0):
+                items = aladin.fetch_aladin_books('Bestseller', max_results=10)
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+        self.assertEqual(len(hits), 3)
+        self.assertEqual(items[0]['title'], aladin_item(1)['title'])
+
+
+class AladinResponseCacheTest(TestCase):
+    def setUp(self):
+        from api.services import aladin
+
+        self.hits = []
+        self.etag = '"v1"'
+        test = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                test.hits.append((self.path, self.headers.get('If-None-Match')))
+                if self.headers.get('If-None-Match') == test.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                raw = json.dumps({'item': [aladin_item(1)]}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(raw)))
+                self.send_header('ETag', test.etag)
+                self.end_headers()
+                self.wfile.write(raw)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.tmp = tempfile.TemporaryDirectory()
+        url = f'http://127.0.0.1:{self.httpd.server_address[1]}/ttb/api/ItemList.aspx'
+        self.settings_override = override_settings(ALADIN_BASE_URL=url, ALADIN_API_KEY='key-a',
+                                                   ALADIN_CACHE_DIR=self.tmp.name)
+        self.settings_override.enable()
+        clients.reset()
+
+    def tearDown(self):
+        clients.reset()
+        self.settings_override.disable()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.tmp.cleanup()
+
+    def _fetch(self, mode='cache', **kwargs):
+        from api.services.aladin import fetch_aladin_books
+        from api.services.aladin_cache import AladinCache
+
+        cache = AladinCache(mode=mode, **kwargs)
+        return fetch_aladin_books('Bestseller', max_results=10, cache=cache), cache
+
+    def test_fresh_entry_served_without_network_regardless_of_ttbkey(self):
+        first, cache = self._fetch()
+        self.assertEqual((cache.counters.fetched, len(self.hits)), (1, 1))
+
+        with override_settings(ALADIN_API_KEY='key-b'):
+            again, cache = self._fetch()
+        self.assertEqual(again, first)
+        self.assertEqual((cache.counters.hits, len(self.hits)), (1, 1))
+
+        recorded = next(Path(self.tmp.name).rglob('*.json')).read_text(encoding='utf-8')
+        self.assertNotIn('key-a', recorded)
+
+    def test_stale_entry_is_revalidated_with_etag(self):
+        self._fetch()
+        items, cache = self._fetch(ttls={'Bestseller': 0})
+        self.assertEqual(cache.counters.revalidated, 1)
+        self.assertEqual(self.hits[-1][1], self.etag)
+        self.assertEqual(items[0]['title'], aladin_item(1)['title'])
+
+        self.etag = '"v2"'
+        _, cache = self._fetch(ttls={'Bestseller': 0})
+        self.assertEqual(cache.counters.fetched, 1)
+
+    def test_replay_never_touches_network(self):
+        from api.services.aladin_cache import AladinReplayMiss
+
+        with self.assertRaises(AladinReplayMiss):
+            self._fetch(mode='replay')
+        self._fetch()
+        items, cache = self._fetch(mode='replay', ttls={'Bestseller': 0})
+        self.assertEqual(len(self.hits), 1)
+        self.assertEqual(cache.counters.hits, 1)
+        self.assertEqual(len(items), 1)
+
+
+class BookSearchIndexTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.genre = Genre.objects.create(name='소설/시/희곡')
+        self.author = Author.objects.create(name='한강')
+        self.novel = self._book('1', '채식주의자', description='연작 소설', count=1)
+        self.essay = self._book('2', '흰', description='소설가의 산문', count=50)
+        self.other = self._book('3', '경제학 콘서트', description='경제 교양', count=100, author=Author.objects.create(name='팀 하포드'))
+
+    def _book(self, isbn, title, description='', count=0, author=None):
+        return Book.objects.create(isbn=isbn, title=title, description=description, publisher='문학동네',
+                                   author=author or self.author, genre=self.genre, global_recommend_count=count)
+
+    def test_two_syllable_korean_terms_match_substrings(self):
+        from api.services import search_index
+
+        self.assertCountEqual(search_index.search_ids(['소설']), [self.novel.id, self.essay.id])
+        self.assertEqual(search_index.search_ids(['채식']), [self.novel.id])
+        self.assertEqual(search_index.search_ids(['!!']), [])
+
+    def test_single_character_matches_anywhere_in_a_word(self):
+        from api.services import search_index
+
+        home = self._book('5', '엄마집 이야기', count=0)
+        self.assertEqual(search_index.ngram_text('엄마집'), '엄마 마집 집')
+        # word-final (집), word-initial (엄) and middle (마) characters, as icontains
+        for char in ('집', '엄', '마'):
+            self.assertEqual(search_index.search_ids([char], columns=('title',)), [home.id], char)
+        resp = self.client.get('/api/books/', {'search': '집'})
+        self.assertEqual([b['id'] for b in resp.json()['results']], [home.id])
+
+    def test_ranking_blends_bm25_with_popularity(self):
+        from api.services import search_index
+
+        title_hit = self._book('4', '소설의 이해', description='강의', count=0)
+        with override_settings(BOOK_SEARCH_POPULARITY_WEIGHT=0):
+            self.assertEqual(search_index.search_ids(['소설'])[0], title_hit.id)
+        with override_settings(BOOK_SEARCH_POPULARITY_WEIGHT=1000):
+            self.assertEqual(search_index.search_ids(['소설'])[0], self.essay.id)
+
+    def test_index_follows_save_delete_and_author_rename(self):
+        from api.services import search_index
+
+        self.novel.title = '소년이 온다'
+        self.novel.save()
+        self.assertEqual(search_index.search_ids(['소년']), [self.novel.id])
+        self.assertEqual(search_index.search_ids(['채식']), [])
+
+        self.author.name = '작가 한강'
+        self.author.save()
+        self.assertCountEqual(search_index.search_ids(['작가']), [self.novel.id, self.essay.id])
+
+        self.essay.delete()
+        self.assertEqual(search_index.search_ids(['작가']), [self.novel.id])
+
+    def test_list_search_param_uses_index(self):
+        resp = self.client.get('/api/books/', {'search': '한강'})
+        self.assertCountEqual([b['id'] for b in resp.json()['results']], [self.novel.id, self.essay.id])
+        resp = self.client.get('/api/books/', {'search': '한강 채식'})
+        self.assertEqual([b['id'] for b in resp.json()['results']], [self.novel.id])
+
+    def test_ai_search_fallback_ranks_and_adds_genre_matches(self):
+        with override_settings(OPENAI_API_KEY=None, GMS_KEY=None):
+            resp = self.client.get('/api/books/ai-search/', {'prompt': '희곡'})
+        # No text match: books of the matching genre, by popularity.
+        self.assertEqual([b['id'] for b in resp.json()], [self.other.id, self.essay.id, self.novel.id])
+
+    def test_ai_search_fallback_matches_names_with_whole_prompt_only(self):
+        from api.services import search_index
+
+        for fts in (True, False):
+            with override_settings(OPENAI_API_KEY=None, GMS_KEY=None), \
+                    mock.patch.object(search_index, 'available', return_value=fts):
+                # the '희곡' token alone does not pull in the whole genre; title/author tokens still match
+                resp = self.client.get('/api/books/ai-search/', {'prompt': '희곡 콘서트'})
+                self.assertEqual([b['id'] for b in resp.json()], [self.other.id], fts)
+                resp = self.client.get('/api/books/ai-search/', {'prompt': '소설/시/희곡'})
+                self.assertEqual([b['id'] for b in resp.json()], [self.other.id, self.essay.id, self.novel.id], fts)
+
+    def test_rebuild_command_restores_index(self):
+        from django.db import connection
+        from api.services import search_index
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search_index.FTS_TABLE}')
+        self.assertEqual(search_index.search_ids(['경제']), [])
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(search_index.search_ids(['경제']), [self.other.id])
+
+
+class FakeChatClient:
+    """Minimal OpenAI client double: chat completions / responses answer with `answer`."""
+
+    calls = 0
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.chat = mock.Mock()
+        self.chat.completions.create.side_effect = self._create
+        self.responses = mock.Mock()
+        self.responses.create.side_effect = self._respond
+
+    def _create(self, **kwargs):
+        FakeChatClient.calls += 1
+        message = mock.Mock(content=self.answer)
+        return mock.Mock(choices=[mock.Mock(message=message)])
+
+    def _respond(self, **kwargs):
+        FakeChatClient.calls += 1
+        return mock.Mock(output_text=self.answer)
+
+
+@override_settings(OPENAI_API_KEY='sk-test', GMS_KEY=None, OPENAI_BASE_URL=None, OPENAI_MODEL='test-model')
+class LLMCacheTest(TestCase):
+    def setUp(self):
+        from api.services import llm_cache
+
+        FakeChatClient.calls = 0
+        self.client = APIClient()
+        self.books = make_catalog(n_books=12, reviews_per_book=0)
+        self.user = User.objects.get(username='reader')
+        llm_cache.stats.hits = llm_cache.stats.misses = 0
+        llm_cache.reset_pending()
+
+    def _patch_openai(self, answer):
+        return mock.patch('openai.OpenAI', lambda **kw: FakeChatClient(answer))
+
+    def test_ai_search_repeat_prompt_is_served_from_cache(self):
+        from api.models import LLMCache
+        from api.services import llm_cache
+
+        with self._patch_openai('1. 도서 3\n2. 도서 5'):
+            first = self.client.get('/api/books/ai-search/', {'prompt': '재밌는  책'}).json()
+            again = self.client.get('/api/books/ai-search/', {'prompt': '재밌는 책'}).json()
+            # "다시 검색": same cached terms, the nonce only reshuffles the matches
+            reshuffled = self.client.get('/api/books/ai-search/', {'prompt': '재밌는 책', 'nonce': 'n2'}).json()
+        self.assertEqual(first, again)
+        self.assertEqual(FakeChatClient.calls, 1)
+        self.assertTrue({b['id'] for b in reshuffled} <= {b.id for b in self.books})
+        self.assertEqual(LLMCache.objects.get(key=llm_cache.prompt_key(
+            'ai_search', 'test-model',
+            "You are a helpful assistant that maps a user's natural language book request to search keywords. "
+            "Return up to 10 short keywords or book titles, one per line, and nothing else.\n\n"
+            "User request: 재밌는 책\n",
+        )).value, ['도서 3', '도서 5'])
+        info = llm_cache.summary()
+        self.assertEqual((info['size'], info['hits'], info['misses']), (1, 2, 1))
+
+    def test_recommend_key_covers_shelves_and_nonce(self):
+        self.client.force_authenticate(self.user)
+        with self._patch_openai('1. 도서 7'):
+            self.client.get('/api/recommendations/me/')
+            self.client.get('/api/recommendations/me/')
+            self.client.get('/api/recommendations/me/', {'nonce': 'x'})
+            self.user.favorites.add(self.books[0])
+            resp = self.client.get('/api/recommendations/me/')
+        self.assertEqual(FakeChatClient.calls, 3)
+        self.assertEqual([b['id'] for b in resp.json()][:1], [self.books[7].id])
+
+    def test_failed_answers_are_not_cached(self):
+        from api.models import LLMCache
+
+        with self._patch_openai(''):
+            self.client.get('/api/books/ai-search/', {'prompt': '아무거나'})
+            self.client.get('/api/books/ai-search/', {'prompt': '아무거나'})
+        self.assertEqual(FakeChatClient.calls, 2)
+        self.assertFalse(LLMCache.objects.exists())
+
+    def test_author_info_cached_and_ttl_expires(self):
+        from api.services.author_media_service import get_author_info
+
+        answer = json.dumps({'author_info': '소설가.', 'author_works': ['작품']}, ensure_ascii=False)
+        with self._patch_openai(answer):
+            self.assertEqual(get_author_info('한강 (지은이)')['author_works'], ['작품'])
+            get_author_info('한강')
+            self.assertEqual(FakeChatClient.calls, 1)
+            with override_settings(LLM_CACHE_TTL=0):
+                get_author_info('한강')
+            self.assertEqual(FakeChatClient.calls, 2)
+
+    def test_lru_eviction_keeps_recently_used(self):
+        from api.services import llm_cache
+
+        with override_settings(LLM_CACHE_MAX_ENTRIES=2, LLM_CACHE_EVICT_EVERY=1):
+            llm_cache.put('a', ['a'], kind='t', model='m')
+            llm_cache.put('b', ['b'], kind='t', model='m')
+            llm_cache.get('a')
+            llm_cache.put('c', ['c'], kind='t', model='m')
+        self.assertEqual(llm_cache.get('b'), None)
+        self.assertEqual((llm_cache.get('a'), llm_cache.get('c')), (['a'], ['c']))
+        out = io.StringIO()
+        call_command('llm_cache', stdout=out)
+        self.assertIn('size=2 (t=2)', out.getvalue())
+        # hit/miss totals are persisted (any process), overall and per kind
+        self.assertIn('lookups: hits=3, misses=1, hit_rate=75.0%', out.getvalue())
+        self.assertIn('other: hits=3, misses=1, hit_rate=75.0%', out.getvalue())
+
+    def test_lookup_counters_are_persisted_per_kind(self):
+        from api.services import llm_cache
+
+        with self._patch_openai('1. 도서 3'):
+            for prompt in ('소설', '소설', '시집'):
+                self.client.get('/api/books/ai-search/', {'prompt': prompt, 'mode': 'keyword'})
+        llm_cache.stats.hits = llm_cache.stats.misses = 0  # a fresh process still sees the totals
+        out = io.StringIO()
+        call_command('llm_cache', stdout=out)
+        self.assertIn('lookups: hits=1, misses=2, hit_rate=33.3%', out.getvalue())
+        self.assertIn('ai_search: hits=1, misses=2', out.getvalue())
+        out = io.StringIO()
+        call_command('llm_cache', reset_stats=True, stdout=out)
+        self.assertIn('lookups: hits=0, misses=0, hit_rate=0.0%', out.getvalue())
+
+    def test_hits_write_nothing_until_the_batch_flush(self):
+        from api.models import LLMCache, LLMCacheCounter
+        from api.services import llm_cache
+
+        llm_cache.put('a', ['a'], kind='t', model='m')
+        llm_cache.flush_counts()
+        with override_settings(LLM_CACHE_COUNT_FLUSH=3):
+            with self.assertNumQueries(2):  # the SELECTs only
+                llm_cache.get('a', 't')
+                llm_cache.get('a', 't')
+            self.assertFalse(LLMCacheCounter.objects.exists())
+            llm_cache.get('missing', 't')  # third lookup → one batched write
+        self.assertEqual(LLMCache.objects.get(key='a').hits, 2)
+        self.assertEqual(LLMCacheCounter.objects.get(kind='t').hits, 2)
+        self.assertEqual(LLMCacheCounter.objects.get(kind='t').misses, 1)
+
+
+class SemanticSearchTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        vector_index.reset_index_cache()
+        self.client = APIClient()
+        self.books = make_catalog(n_books=30, reviews_per_book=0)
+        self.other_genre = Genre.objects.create(name='과학')
+        vectors = clustered_vectors(n=30, dim=8, clusters=3, seed=1)
+        for book, vec in zip(self.books, vectors):
+            book.embedding = vec.tolist()
+        Book.objects.bulk_update(self.books, ['embedding'])
+        Book.objects.filter(id__in=[b.id for b in self.books[::2]]).update(genre=self.other_genre)
+        self.query = vectors[7] + 0.01
+        embedding_cache.store_many({embedding_cache.embedding_key('우주 이야기'): self.query.tolist()})
+        self.env = mock.patch.dict(os.environ, {'UPSTAGE_API_KEY': 'test'})
+        self.env.start()
+        self.index_dir = override_settings(VECTOR_INDEX_DIR=self.tmp.name)
+        self.index_dir.enable()
+        vector_index.build_index_from_db()
+        vector_index.reset_index_cache()
+
+    def tearDown(self):
+        self.index_dir.disable()
+        self.env.stop()
+        vector_index.reset_index_cache()
+        self.tmp.cleanup()
+
+    def _expected(self, books, k):
+        ranked = sorted(books, key=lambda b: -float(np.dot(b.embedding, self.query) / np.linalg.norm(b.embedding)))
+        return [b.id for b in ranked[:k]]
+
+    def _search(self, **params):
+        resp = self.client.get('/api/books/ai-search/', {'prompt': '우주 이야기', **params})
+        self.assertEqual(resp.status_code, 200)
+        return [b['id'] for b in resp.json()]
+
+    def test_index_agrees_with_exact_cosine(self):
+        self.assertEqual(self._search(page_size=5), self._expected(self.books, 5))
+        in_genre = [b for b in self.books[::2]]
+        self.assertEqual(self._search(page_size=4, genre=self.other_genre.id), self._expected(in_genre, 4))
+
+    def test_nonce_samples_within_the_top_pages_in_rank_order(self):
+        top = self._expected(self.books, 15)
+        picks = [self._search(page_size=3, nonce=n) for n in ('a', 'b', 'c', 'd')]
+        self.assertEqual(picks[0], self._search(page_size=3, nonce='a'))
+        self.assertGreater(len({tuple(p) for p in picks}), 1)
+        for ids in picks:
+            self.assertEqual(len(ids), 3)
+            self.assertEqual(ids, sorted(ids, key=top.index))  # subset of the top 15, best first
+
+    def test_without_an_index_uses_the_keyword_path_not_a_db_scan(self):
+        # e.g. embeddings not generated yet, so `build_vector_index` has not run
+        with override_settings(VECTOR_INDEX_DIR=os.path.join(self.tmp.name, 'missing')):
+            vector_index.reset_index_cache()
+            with mock.patch('api.services.semantic_search._scan_db', side_effect=AssertionError('scan')), \
+                    mock.patch('api.services.semantic_search.get_or_embed', side_effect=AssertionError('embed')), \
+                    override_settings(OPENAI_API_KEY=None, GMS_KEY=None):
+                ids = self._search(prompt='도서 3')
+        self.assertIn(self.books[3].id, ids)
+
+    def test_filters_and_keyword_mode(self):
+        category = self.books[0].category_id
+        self.assertEqual(self._search(page_size=3, category=category, genre=self.other_genre.id),
+                         self._expected(self.books[::2], 3))
+        self.assertEqual(self.client.get('/api/books/ai-search/', {'prompt': 'x', 'genre': 'abc'}).status_code, 400)
+        # keyword mode without an LLM key: FTS fallback over titles
+        with override_settings(OPENAI_API_KEY=None, GMS_KEY=None):
+            ids = self._search(mode='keyword')
+        self.assertEqual(ids, [])
+
+    async def test_async_view_awaits_the_query_embedding(self):
+        from django.test import AsyncClient
+
+        calls = []
+
+        class FakeAsyncEmbeddings:
+            def __init__(self, **kwargs):
+                self.embeddings = mock.Mock()
+                self.embeddings.create = self._create
+
+            async def _create(self, input, model):
+                calls.append(input)
+                return mock.Mock(data=[mock.Mock(embedding=query)])
+
+        query = self.query.tolist()
+        clients.reset()
+        params = {'prompt': '은하 여행', 'page_size': 5}
+        with mock.patch('openai.AsyncOpenAI', FakeAsyncEmbeddings), \
+                mock.patch('api.utils.get_upstage_embedding', side_effect=AssertionError('blocking call')):
+            resp = await AsyncClient().get('/api/books/ai-search/async/', params)
+            again = await AsyncClient().get('/api/books/ai-search/async/', params)
+            bad = await AsyncClient().get('/api/books/ai-search/async/', {**params, 'genre': 'abc'})
+            # the sync view now finds the vector in the embedding cache
+            sync = await sync_to_async_call(APIClient().get, '/api/books/ai-search/', params)
+        clients.reset()
+        self.assertEqual(calls, ['은하 여행'])
+        self.assertEqual([b['id'] for b in json.loads(resp.content)], self._expected(self.books, 5))
+        self.assertEqual(again.content, resp.content)
+        self.assertEqual(sync.content, resp.content)
+        self.assertEqual(bad.status_code, 400)
+
+
+
+@override_settings(OPENAI_API_KEY=None, GMS_KEY=None, RECOMMEND_TOP_N=12)
+class UserRecommendationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.books = make_catalog(n_books=30, reviews_per_book=0)
+        self.user = User.objects.get(username='reader')
+        for book, vec in zip(self.books, clustered_vectors(n=30, dim=8, clusters=3, seed=2)):
+            book.embedding = vec.tolist()
+        Book.objects.bulk_update(self.books, ['embedding'])
+        self.user.favorites.add(self.books[0])
+        self.user.read_books.add(self.books[1], self.books[2])
+        call_command('update_user_recommendations', dirty=True, stdout=io.StringIO())
+        self.client.force_authenticate(self.user)
+
+    def _expected(self, fav, read, k):
+        unit = lambda b: np.asarray(b.embedding) / np.linalg.norm(b.embedding)
+        taste = 2 * sum(unit(b) for b in fav) + sum(unit(b) for b in read)
+        seen = {b.id for b in fav + read}
+        ranked = sorted((b for b in self.books if b.id not in seen), key=lambda b: -float(unit(b) @ taste))
+        return [b.id for b in ranked[:k]]
+
+    def test_shelf_changes_mark_user_for_the_dirty_refresh(self):
+        from api.models import UserRecommendation, UserRecommendationDirty
+
+        row = UserRecommendation.objects.get(user=self.user)
+        self.assertEqual(row.basis, 3)
+        self.assertEqual(row.book_ids, self._expected([self.books[0]], self.books[1:3], 12))
+        self.assertFalse(UserRecommendationDirty.objects.exists())
+
+        # the shelf request only marks the user: no taste vector / nearest-neighbour work
+        with mock.patch('api.services.user_recommendations.refresh_users') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(self.client.delete(f'/api/auth/users/me/favorites/{self.books[0].id}').status_code,
+                                 204)
+                self.books[5].favored_by.add(self.user)
+        refresh.assert_not_called()
+        self.assertEqual(list(UserRecommendationDirty.objects.values_list('user_id', flat=True)), [self.user.id])
+        old = row.book_ids
+        row.refresh_from_db()
+        self.assertEqual(row.book_ids, old)
+
+        out = io.StringIO()
+        call_command('update_user_recommendations', dirty=True, stdout=out)
+        self.assertIn('users=1, with_list=1', out.getvalue())
+        self.assertFalse(UserRecommendationDirty.objects.exists())
+        row.refresh_from_db()
+        self.assertEqual(row.basis, 3)
+        self.assertEqual(row.book_ids, self._expected([self.books[5]], self.books[1:3], 12))
+
+    def test_failed_dirty_refresh_keeps_users_marked(self):
+        from api.models import UserRecommendationDirty
+        from api.services import user_recommendations
+
+        self.user.read_books.add(self.books[7])
+        with mock.patch('api.services.user_recommendations.refresh_users', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                user_recommendations.refresh_dirty()
+        self.assertTrue(UserRecommendationDirty.objects.filter(user=self.user).exists())
+
+    def test_endpoint_serves_stored_list_without_llm(self):
+        with self.assertNumQueries(3):  # user, stored row, current shelf ids
+            resp = self.client.get('/api/recommendations/me/')
+        self.assertEqual([b['id'] for b in resp.json()], self._expected([self.books[0]], self.books[1:3], 8))
+
+        stored = self._expected([self.books[0]], self.books[1:3], 12)
+        shuffled = [b['id'] for b in self.client.get('/api/recommendations/me/', {'nonce': 'n1'}).json()]
+        again = [b['id'] for b in self.client.get('/api/recommendations/me/', {'nonce': 'n1'}).json()]
+        self.assertEqual(shuffled, again)
+        self.assertEqual(len(shuffled), 8)
+        self.assertTrue(set(shuffled) <= set(stored))
+
+        # mode=llm (no key configured) → popularity fallback, as before
+        llm = [b['id'] for b in self.client.get('/api/recommendations/me/', {'mode': 'llm'}).json()]
+        self.assertEqual(llm, [b.id for b in self.books[29:21:-1]])
+
+    def test_books_shelved_since_the_refresh_are_not_served(self):
+        stored = self._expected([self.books[0]], self.books[1:3], 12)
+        top = Book.objects.get(id=stored[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.favorites.add(top)
+            self.user.read_books.add(Book.objects.get(id=stored[1]))
+        # the dirty refresh has not run yet: the stored row still lists both
+        ids = [b['id'] for b in self.client.get('/api/recommendations/me/').json()]
+        self.assertEqual(ids, stored[2:10])
+        for nonce in ('a', 'b', 'c'):
+            ids = [b['id'] for b in self.client.get('/api/recommendations/me/', {'nonce': nonce}).json()]
+            self.assertFalse({stored[0], stored[1]} & set(ids))
+
+    def test_command_rebuilds_all_users(self):
+        from api.models import UserRecommendation
+
+        other = User.objects.create_user(username='other', email='other@example.com', password='pw')
+        User.favorites.through.objects.create(user_id=other.id, book_id=self.books[9].id)  # bypasses signals
+        UserRecommendation.objects.all().delete()
+        out = io.StringIO()
+        call_command('update_user_recommendations', batch_size=1, stdout=out)
+        self.assertIn('users=2, with_list=2', out.getvalue())
+        self.assertEqual(UserRecommendation.objects.get(user=other).book_ids,
+                         self._expected([self.books[9]], [], 12))
+        Book.objects.update(embedding=None)
+        call_command('update_user_recommendations', users=[self.user.id], stdout=io.StringIO())
+        self.assertEqual(UserRecommendation.objects.get(user=self.user).book_ids, [])
+        # empty list → endpoint falls back to the LLM path
+        self.assertEqual(len(self.client.get('/api/recommendations/me/').json()), 8)
+
+
+class AlsoReadTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.books = make_catalog(n_books=25, reviews_per_book=0)
+        User.objects.bulk_create([User(username=f'u{i}', email=f'u{i}@example.com') for i in range(30)])
+        self.users = list(User.objects.order_by('id'))
+        rng = np.random.default_rng(3)
+        fav, read = [], []
+        for user in self.users:
+            # clustered tastes: each user mostly reads within one third of the catalog
+            group = rng.integers(0, 3)
+            pool = [b for b in self.books if b.id % 3 == group] + list(rng.choice(self.books, 2))
+            for book in rng.choice(pool, size=5, replace=False):
+                (fav if rng.random() < 0.4 else read).append((user.id, book.id))
+        User.favorites.through.objects.bulk_create(
+            [User.favorites.through(user_id=u, book_id=b) for u, b in fav])
+        User.read_books.through.objects.bulk_create(
+            [User.read_books.through(user_id=u, book_id=b) for u, b in read])
+
+    def _brute_force(self, k):
+        edges = set(User.favorites.through.objects.values_list('user_id', 'book_id'))
+        edges |= set(User.read_books.through.objects.values_list('user_id', 'book_id'))
+        readers = {}
+        for u, b in edges:
+            readers.setdefault(b, set()).add(u)
+        expected = {}
+        for a, ra in readers.items():
+            scored = []
+            for b, rb in readers.items():
+                common = len(ra & rb)
+                if b != a and common:
+                    scored.append((-common / np.sqrt(len(ra) * len(rb)), -common, b))
+            expected[a] = [b for _, _, b in sorted(scored)[:k]]
+        return expected
+
+    def _stored(self):
+        from api.services import co_reading
+
+        return {b.id: co_reading.neighbour_ids(b.id, limit=100) for b in self.books
+                if co_reading.neighbour_ids(b.id, limit=100)}
+
+    def test_rebuild_matches_brute_force_for_any_block_size(self):
+        from api.services import co_reading
+
+        expected = self._brute_force(k=4)
+        for block_size in (1024, 3):
+            stats = co_reading.rebuild(k=4, block_size=block_size, chunk_size=7)
+            self.assertEqual(self._stored(), expected)
+        self.assertEqual(stats.users, len(self.users))
+        self.assertEqual(stats.links, sum(len(v) for v in expected.values()))
+
+    def test_incremental_update_equals_full_rebuild(self):
+        from api.models import AlsoRead, AlsoReadDirty
+        from api.services import co_reading
+
+        co_reading.rebuild(k=4)
+        self.assertFalse(AlsoReadDirty.objects.exists())
+        reader, other = self.users[0], self.users[1]
+        reader.favorites.add(self.books[0], self.books[1])
+        reader.read_books.remove(*reader.read_books.all()[:2])
+        other.favorites.clear()
+        self.books[7].read_by.add(other, self.users[2])
+        self.assertTrue(AlsoReadDirty.objects.filter(book=self.books[7]).exists())
+
+        stats = co_reading.update_dirty(k=4)
+        self.assertLess(stats.rows, len(self.books) + 1)
+        self.assertFalse(AlsoReadDirty.objects.exists())
+        self.assertEqual(self._stored(), self._brute_force(k=4))
+        self.assertEqual(co_reading.update_dirty(k=4).links, 0)
+        self.assertEqual(AlsoRead.objects.count(), sum(len(v) for v in self._brute_force(k=4).values()))
+
+    def test_incremental_update_loads_only_the_affected_readers(self):
+        from api.services import co_reading
+
+        co_reading.rebuild(k=4)
+        fresh = Book.objects.create(isbn='9790000099999', title='새 책')
+        # two new users share a new book: only their edges are loaded, not the catalog's
+        a = User.objects.create(username='new1', email='new1@example.com')
+        b = User.objects.create(username='new2', email='new2@example.com')
+        with self.captureOnCommitCallbacks(execute=True):
+            fresh.read_by.add(a, b)
+        stats = co_reading.update_dirty(k=4)
+        self.assertEqual((stats.rows, stats.users, stats.edges), (1, 2, 2))
+        self.assertEqual(self._stored(), {b: v for b, v in self._brute_force(k=4).items() if b != fresh.id})
+        self.assertEqual(co_reading.neighbour_ids(fresh.id, limit=100), self._brute_force(k=4)[fresh.id])
+
+    def test_endpoint_and_command(self):
+        out = io.StringIO()
+        call_command('update_also_read', k=5, stdout=out)
+        self.assertIn(f'users={len(self.users)}', out.getvalue())
+        expected = self._brute_force(k=5)
+        book_id = next(iter(expected))
+        resp = self.client.get(f'/api/books/{book_id}/also-read/', {'limit': 3})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([b['id'] for b in resp.json()], expected[book_id][:3])
+        self.assertEqual(set(resp.json()[0]), {'id', 'title', 'cover_url', 'author_name'})
+        self.assertEqual(self.client.get('/api/books/999999/also-read/').status_code, 404)
+        with self.assertNumQueries(3):  # exists, neighbour ids, cards
+            self.client.get(f'/api/books/{book_id}/also-read/')
+        call_command('update_also_read', incremental=True, stdout=io.StringIO())
+
+
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        from api.services import response_cache
+
+        cache.clear()
+        response_cache.reset_local()
+        self.client = APIClient()
+        self.books = make_catalog(n_books=15, reviews_per_book=1)
+        self.user = User.objects.get(username='reader')
+
+    def test_collections_are_served_from_cache_until_catalog_changes(self):
+        urls = ['/api/books/best-sellers/', '/api/books/top-recommended/', '/api/books/age-based/?age=45',
+                '/api/categories/', '/api/genres/']
+        first = [self.client.get(u).json() for u in urls]
+        with self.assertNumQueries(0):
+            again = [self.client.get(u).json() for u in urls]
+        self.assertEqual(first, again)
+        # same age band → same entry
+        with self.assertNumQueries(0):
+            self.client.get('/api/books/age-based/', {'age': 50})
+
+        Review.objects.create(book=self.books[-1], user=self.user, content='또 읽음')
+        top = self.client.get('/api/books/top-recommended/').json()
+        self.assertEqual(top[0]['review_count'], 2)
+        Category.objects.create(name='신간')
+        self.assertIn('신간', [c['name'] for c in self.client.get('/api/categories/').json()])
+
+    def test_embedding_saves_do_not_invalidate(self):
+        from api.services import response_cache
+
+        version = response_cache.catalog_version()
+        book = self.books[0]
+        book.embedding = [1.0, 0.0]
+        book.save(update_fields=['embedding', 'embedding_key'])
+        self.assertEqual(response_cache.catalog_version(), version)
+        book.save(update_fields=['title'])
+        self.assertEqual(response_cache.catalog_version(), version + 1)
+
+    def test_concurrent_misses_compute_once(self):
+        from api.services import response_cache
+
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return ['fresh']
+
+        old_version, _ = response_cache.get_or_compute('demo', '', lambda: ['old'])
+        response_cache.bump_catalog_version()
+        response_cache.reset_local()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(response_cache.get_or_compute('demo', '', compute)))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        # losers get the previous payload (labelled with its own version) instead of piling onto the database
+        new_version = response_cache.catalog_version()
+        self.assertEqual(sorted((v, tuple(d)) for v, d in results),
+                         sorted([(new_version, ('fresh',))] + [(old_version, ('old',))] * 7))
+        self.assertEqual(response_cache.get_or_compute('demo', '', compute), (new_version, ['fresh']))
+        self.assertEqual(len(calls), 1)
+
+    def test_warm_command_and_sync_bump(self):
+        from api.services import response_cache
+
+        out = io.StringIO()
+        call_command('warm_response_cache', bump=True, stdout=out)
+        self.assertIn('/api/books/best-sellers/ → 200', out.getvalue())
+        response_cache.reset_local()
+        with self.assertNumQueries(0):
+            self.client.get('/api/books/top-recommended/')
+            self.client.get('/api/books/age-based/', {'age': 10})
+            self.client.get('/api/genres/')
+
+        version = response_cache.catalog_version()
+        with mock.patch('api.management.commands.update_aladin_books.iter_source_pages', return_value=iter([])):
+            call_command('update_aladin_books', bulk=True, stdout=io.StringIO())
+        self.assertGreater(response_cache.catalog_version(), version)
+
+    def test_warm_command_refuses_a_per_process_cache(self):
+        from django.core.management.base import CommandError
+
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            with self.assertRaises(CommandError):
+                call_command('warm_response_cache', stdout=io.StringIO())
+
+    def test_local_entries_expire_with_the_ttl(self):
+        from django.core.cache import cache
+
+        from api.services import response_cache
+
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return ['fresh']
+
+        version, _ = response_cache.get_or_compute('demo', '', compute)
+        cache.delete(f'{response_cache.PREFIX}:demo::{version}')  # only the local copy is left
+        response_cache.get_or_compute('demo', '', compute)
+        self.assertEqual(len(calls), 1)
+        later = time.monotonic() + response_cache._ttl() + 1
+        with mock.patch('api.services.response_cache.time.monotonic', return_value=later):
+            response_cache.get_or_compute('demo', '', compute)
+        self.assertEqual(len(calls), 2)
+
+
+@override_settings(POPULARITY_FLUSH_SECONDS=3600, POPULARITY_FLUSH_MAX_BOOKS=1000,
+                   POPULARITY_WEIGHTS={'favorite': 3, 'review': 2, 'view': 1})
+class PopularityCounterTest(TestCase):
+    def setUp(self):
+        from api.services import popularity
+        from rest_framework.authtoken.models import Token
+
+        popularity.reset()
+        self.client = APIClient()
+        self.books = make_catalog(n_books=6, reviews_per_book=0)
+        Book.objects.update(global_recommend_count=0)
+        self.user = User.objects.get(username='reader')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+
+    def tearDown(self):
+        from api.services import popularity
+
+        popularity.reset()
+
+    def test_events_are_buffered_then_flushed_in_batches(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from api.services import popularity
+
+        a, b, c = self.books[:3]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/auth/users/me/favorites/{a.id}')
+            self.client.post('/api/reviews/', {'book': b.id, 'content': '좋아요'})
+            for _ in range(3):
+                self.client.get(f'/api/books/{c.id}/')
+            self.client.get(f'/api/books/{b.id}/')
+        self.assertEqual(popularity.pending(), {a.id: 3, b.id: 3, c.id: 3})
+        self.assertEqual(Book.objects.get(id=a.id).global_recommend_count, 0)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(popularity.flush(), 3)
+        self.assertEqual(sum(q['sql'].startswith('UPDATE') for q in ctx.captured_queries), 1)
+        self.assertEqual(popularity.pending(), {})
+        counts = dict(Book.objects.filter(id__in=[a.id, b.id, c.id]).values_list('id', 'global_recommend_count'))
+        self.assertEqual(counts, {a.id: 3, b.id: 3, c.id: 3})
+        top = [x['id'] for x in self.client.get('/api/books/top-recommended/').json()[:3]]
+        self.assertEqual(top, [a.id, b.id, c.id])
+
+    def test_rolled_back_events_do_not_count_and_threshold_flushes(self):
+        from api.services import popularity
+
+        popularity.record('favorite', self.books[0].id)  # never committed in this TestCase
+        self.assertEqual(popularity.pending(), {})
+
+        with override_settings(POPULARITY_FLUSH_MAX_BOOKS=3, POPULARITY_WEIGHTS={'view': 5}):
+            with self.captureOnCommitCallbacks(execute=True):
+                for book in self.books[:3]:
+                    popularity.record('view', book.id)
+                    popularity.record('unknown', book.id)
+        self.assertEqual(popularity.pending(), {})
+        self.assertEqual(sorted(Book.objects.values_list('global_recommend_count', flat=True)), [0, 0, 0, 5, 5, 5])
+
+    def test_view_flushes_keep_collection_etag_but_move_detail_etag(self):
+        from api.services import popularity
+
+        book = self.books[0]
+        home = self.client.get('/api/books/top-recommended/')['ETag']
+        for _ in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                detail = self.client.get(f'/api/books/{book.id}/')
+            self.assertEqual(popularity.flush(), 1)
+            self.assertEqual(self.client.get('/api/books/top-recommended/')['ETag'], home)
+            # the detail body carries the count: the old tag must not revalidate
+            again = self.client.get(f'/api/books/{book.id}/', HTTP_IF_NONE_MATCH=detail['ETag'])
+            self.assertEqual(again.status_code, 200)
+            self.assertEqual(again.json()['global_recommend_count'],
+                             detail.json()['global_recommend_count'] + 1)
+        self.assertGreaterEqual(Book.objects.get(id=book.id).global_recommend_count, 3)
+
+        # a favorite is a visible change: the collections move on the next flush
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/auth/users/me/favorites/{book.id}')
+        popularity.flush()
+        self.assertNotEqual(self.client.get('/api/books/top-recommended/')['ETag'], home)
+
+        # view-only flushes still reach the collections, at most once per interval
+        with override_settings(POPULARITY_VIEW_BUMP_SECONDS=0):
+            home = self.client.get('/api/books/top-recommended/')['ETag']
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.get(f'/api/books/{book.id}/')
+            popularity.flush()
+            self.assertNotEqual(self.client.get('/api/books/top-recommended/')['ETag'], home)
+
+
+class ShelfSyncTest(TestCase):
+    def setUp(self):
+        from rest_framework.authtoken.models import Token
+
+        self.client = APIClient()
+        self.books = make_catalog(n_books=30, reviews_per_book=0)
+        self.user = User.objects.get(username='reader')
+        for book in self.books[:25]:
+            self.user.favorites.add(book)  # one at a time: the shelf order is the add order
+        self.user.read_books.add(*self.books[5:8])
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+
+    def test_me_is_slim_and_query_bounded(self):
+        with self.assertNumQueries(4):  # token + user, version, two shelves
+            res = self.client.get('/api/auth/users/me')
+        self.assertEqual(res.status_code, 200)
+        data = res.json()
+        self.assertNotIn('favorites', data)
+        self.assertEqual(data['favorite_ids'], [b.id for b in self.books[:25]])
+        self.assertCountEqual(data['read_book_ids'], [b.id for b in self.books[5:8]])
+        self.assertEqual((data['favorites_count'], data['read_books_count']), (25, 3))
+        self.assertLess(len(res.content), 2048)
+
+    def test_since_returns_only_net_changes(self):
+        version = self.client.get('/api/auth/users/me').json()['shelf_version']
+        self.assertEqual(self.client.get(f'/api/auth/users/me?since={version}').json()['shelf_changes'],
+                         {'favorites': {'added': [], 'removed': []}, 'read_books': {'added': [], 'removed': []}})
+
+        a, b, c = self.books[25:28]
+        self.client.post(f'/api/auth/users/me/favorites/{a.id}')
+        self.client.post(f'/api/auth/users/me/favorites/{b.id}')
+        self.client.delete(f'/api/auth/users/me/favorites/{b.id}')
+        self.client.delete(f'/api/auth/users/me/read_books/{self.books[5].id}')
+        c.read_by.add(self.user)
+        deleted_id = self.books[0].id
+        self.books[0].delete()
+
+        data = self.client.get(f'/api/auth/users/me?since={version}').json()
+        self.assertNotIn('favorite_ids', data)
+        self.assertEqual(data['shelf_changes'], {
+            'favorites': {'added': [a.id], 'removed': sorted([deleted_id, b.id])},
+            'read_books': {'added': [c.id], 'removed': [self.books[5].id]},
+        })
+        self.assertEqual((data['favorites_count'], data['read_books_count']), (25, 3))
+        self.assertGreater(data['shelf_version'], version)
+        full = self.client.get('/api/auth/users/me').json()
+        self.assertEqual(full['shelf_version'], data['shelf_version'])
+        self.assertEqual(self.client.get('/api/auth/users/me?since=x').status_code, 400)
+
+    def test_clear_is_logged(self):
+        version = self.client.get('/api/auth/users/me').json()['shelf_version']
+        self.user.read_books.clear()
+        changes = self.client.get(f'/api/auth/users/me?since={version}').json()['shelf_changes']
+        self.assertEqual(changes['read_books']['removed'], [b.id for b in self.books[5:8]])
+
+    def test_shelf_pages_newest_first(self):
+        res = self.client.get('/api/auth/users/me/shelf/favorites?page_size=10')
+        self.assertEqual(res.status_code, 200)
+        data = res.json()
+        self.assertEqual(data['count'], 25)
+        self.assertEqual([b['id'] for b in data['results']], [b.id for b in reversed(self.books[15:25])])
+        self.assertIn('review_count', data['results'][0])
+        last = self.client.get('/api/auth/users/me/shelf/favorites?page_size=10&page=3').json()
+        self.assertEqual([b['id'] for b in last['results']], [b.id for b in reversed(self.books[:5])])
+        self.assertIsNone(last['next'])
+        self.assertEqual(self.client.get('/api/auth/users/me/shelf/wishlist').status_code, 404)
+
+
+class BookGroupEndpointTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.books = make_catalog(n_books=30, reviews_per_book=1)
+        self.other = Genre.objects.create(name='에세이')
+        Book.objects.filter(id__in=[b.id for b in self.books[:5]]).update(genre=self.other)
+
+    def test_list_is_counted_without_loading_books(self):
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/genres/').json()
+        self.assertEqual({g['name']: g['book_count'] for g in data}, {'소설/시/희곡': 25, '에세이': 5})
+        self.assertNotIn('books', data[0])
+        author = self.client.get('/api/authors/').json()[0]
+        self.assertEqual(author['book_count'], 1)
+
+    def _detail_queries(self, genre_id):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(f'/api/genres/{genre_id}/?page_size=4')
+        return res.json(), len(ctx.captured_queries)
+
+    def test_detail_pages_lightweight_cards(self):
+        genre = Genre.objects.get(name='소설/시/희곡')
+        big, big_queries = self._detail_queries(genre.id)
+        small, small_queries = self._detail_queries(self.other.id)
+        self.assertEqual(big_queries, small_queries)
+        self.assertEqual((big['id'], big['name'], big['book_count']), (genre.id, genre.name, 25))
+        by_rank = sorted(self.books[5:], key=lambda b: -b.global_recommend_count)
+        self.assertEqual([b['id'] for b in big['results']], [b.id for b in by_rank[:4]])
+        self.assertNotIn('reviews', big['results'][0])
+        self.assertEqual(big['results'][0]['review_count'], 1)
+
+        seen = [b['id'] for b in big['results']]
+        url = big['next']
+        while url:
+            page = self.client.get(url).json()
+            seen += [b['id'] for b in page['results']]
+            url = page['next']
+        self.assertEqual(seen, [b.id for b in by_rank])
+        self.assertEqual(self.client.get('/api/categories/999999/').status_code, 404)
+
+
+class StreamingResponseTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.books = make_catalog(n_books=23, reviews_per_book=1)
+        Book.objects.filter(id=self.books[0].id).update(title='줄\u2028바꿈 "따옴표"')
+
+    def _all_pages(self, url):
+        results = []
+        while url:
+            page = self.client.get(url).json()
+            results += page['results']
+            url = page['next']
+        return results
+
+    def test_book_list_streams_in_chunks_and_matches_pages(self):
+        from rest_framework.renderers import JSONRenderer
+
+        with override_settings(STREAM_CHUNK_SIZE=5):
+            res = self.client.get('/api/books/?stream=1&ordering=-global_recommend_count')
+            self.assertTrue(res.streaming)
+            chunks = list(res.streaming_content)
+        self.assertEqual(len(chunks), 2 + 5)  # brackets + ceil(23 / 5) chunks
+        body = b''.join(chunks)
+        expected = self._all_pages('/api/books/?page_size=7&ordering=-global_recommend_count')
+        self.assertEqual(body, JSONRenderer().render(expected))
+        self.assertIn(b'\\u2028', body)
+
+    def test_group_detail_streams_header_and_cards(self):
+        genre = Genre.objects.get()
+        res = self.client.get(f'/api/genres/{genre.id}/?stream=1')
+        self.assertTrue(res.streaming)
+        data = json.loads(b''.join(res.streaming_content))
+        self.assertEqual((data['id'], data['book_count']), (genre.id, 23))
+        self.assertEqual(data['results'], self._all_pages(f'/api/genres/{genre.id}/?page_size=10'))
+
+    async def test_asgi_stream_is_pulled_chunk_by_chunk(self):
+        import warnings
+
+        from django.test import AsyncClient
+
+        with warnings.catch_warnings():
+            # Django warns when it has to drain a synchronous iterator into memory
+            warnings.simplefilter('error')
+            res = await AsyncClient().get('/api/books/?stream=1')
+            self.assertTrue(res.is_async)
+            body = b''.join([chunk async for chunk in res.streaming_content])
+        self.assertEqual(len(json.loads(body)), 23)
+
+    def test_empty_stream_is_valid_json(self):
+        empty = Genre.objects.create(name='빈 장르')
+        res = self.client.get(f'/api/books/?stream=1&genre={empty.id}')
+        self.assertEqual(json.loads(b''.join(res.streaming_content)), [])
+
+
+class FastSerializerTest(TestCase):
+    def setUp(self):
+        from django.test import RequestFactory
+
+        self.books = make_catalog(n_books=8, reviews_per_book=2)
+        Book.objects.filter(id=self.books[1].id).update(author=None, category=None, pub_date=None, cover_url='')
+        Book.objects.filter(id=self.books[2].id).update(title='줄\u2028바꿈 "따옴표" \\ 끝', genre=None)
+        Book.objects.filter(id__in=[b.id for b in self.books[3:]]).update(pub_date='2024-02-29')
+        self.books[0].similar_books.set(self.books[1:4])
+        reader = User.objects.get(username='reader')
+        User.objects.filter(id=reader.id).update(avatar='avatars/me.png')
+        other = User.objects.create_user(username='other', email='other@example.com', password='pw',
+                                         nickname='닉', default_avatar='default2')
+        Review.objects.create(book=self.books[0], user=other, content='두 번째 독자')
+        self.request = RequestFactory().get('/api/books/')
+
+    def _same(self, reference, fast):
+        from rest_framework.renderers import JSONRenderer
+
+        from api.renderers import FastJSONRenderer
+
+        self.assertEqual(JSONRenderer().render(reference), FastJSONRenderer().render(fast))
+
+    def test_cards_and_similar_match_drf_bytes(self):
+        from api import fast_serializers
+        from api.serializers import BookListSerializer, SimilarBookSerializer, book_card_queryset
+
+        qs = Book.objects.order_by('id')
+        self._same(BookListSerializer(book_card_queryset(qs), many=True).data,
+                   fast_serializers.cards(fast_serializers.card_values(qs)))
+        self._same(SimilarBookSerializer(qs, many=True).data, fast_serializers.similar(qs))
+        ids = [self.books[3].id, self.books[1].id, 999999]
+        self.assertEqual([c['id'] for c in fast_serializers.cards_by_ids(ids)], ids[:2])
+
+    def test_detail_matches_drf_bytes(self):
+        from api import fast_serializers
+        from api.serializers import BookSerializer
+
+        for book in Book.objects.prefetch_related('similar_books').order_by('id')[:3]:
+            self._same(BookSerializer(book, context={'request': self.request}).data,
+                       fast_serializers.book_detail(book.id, self.request))
+        self.assertIsNone(fast_serializers.book_detail(999999))
+        self.assertEqual(APIClient().get('/api/books/abc/').status_code, 404)
+
+    def test_renderer_matches_json_renderer(self):
+        from datetime import datetime, timezone
+        from decimal import Decimal
+
+        from rest_framework.renderers import JSONRenderer
+
+        from api.renderers import FastJSONRenderer
+
+        data = {'when': datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc), 'd': Decimal('1.50'),
+                'big': 2 ** 70, 'text': '한글\u2029', 'f': 0.125, 'nested': [None, True, {'k': []}]}
+        self.assertEqual(JSONRenderer().render(data), FastJSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_cover_url_is_upgraded_when_stored(self):
+        book = self.books[5]
+        book.cover_url = 'https://image.aladin.co.kr/product/5/cover/x.jpg'
+        book.save()
+        self.assertEqual(Book.objects.get(id=book.id).cover_url, 'https://image.aladin.co.kr/product/5/cover500/x.jpg')
+
+
+class CandidateTitleMatchTest(TestCase):
+    def setUp(self):
+        self.books = make_catalog(n_books=40, reviews_per_book=0)
+        harry = Author.objects.create(name='J.K. Rowling')
+        for i in range(5):
+            Book.objects.create(isbn=f'97900000{i:05d}', title=f'Harry Potter {i}', author=harry)
+
+    @staticmethod
+    def _legacy(candidates, exclude_ids):
+        # Previous per-candidate loop in recommend_by_profile.
+        found_ids, seen_ids = [], set(exclude_ids)
+        for title in candidates:
+            qs = Book.objects.filter(title__icontains=title)[:3]
+            if not qs.exists():
+                qs = Book.objects.filter(author__name__icontains=title)[:3]
+            for b in qs:
+                if b.id in seen_ids:
+                    continue
+                seen_ids.add(b.id)
+                found_ids.append(b.id)
+        return found_ids
+
+    def test_matches_legacy_loop_in_one_query(self):
+        from api.views import _match_candidate_titles
+
+        candidates = ['도서 1', 'harry potter', '작가3', 'rowling', '도서 2', '없는 책', '도서', '도서 1']
+        exclude = {self.books[1].id, self.books[12].id}
+        with self.assertNumQueries(1) as ctx:
+            found = _match_candidate_titles(candidates, exclude)
+        self.assertEqual(found, self._legacy(candidates, exclude))
+        # matches are bounded per candidate in SQL ('도서' alone would match 40 books)
+        self.assertIn('LIMIT 3', ctx.captured_queries[0]['sql'])
+        self.assertEqual(_match_candidate_titles([], exclude), [])
+
+    @override_settings(OPENAI_API_KEY='sk-test', GMS_KEY=None, OPENAI_BASE_URL=None)
+    def test_recommend_query_count_does_not_grow_with_candidates(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from api.services import llm_cache
+
+        llm_cache.reset_pending()  # no batched counter write in the middle of a measurement
+        client = APIClient()
+        client.force_authenticate(User.objects.get(username='reader'))
+        counts = []
+        for n, nonce in ((2, 'a'), (8, 'b')):
+            answer = '\n'.join(f'{i + 1}. 도서 {i + 3}' for i in range(n))
+            with mock.patch('openai.OpenAI', lambda **kw: FakeChatClient(answer)), \
+                    CaptureQueriesContext(connection) as ctx:
+                resp = client.get('/api/recommendations/me/', {'nonce': nonce})
+            self.assertGreaterEqual(len(resp.json()), n)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class SamplingTest(TestCase):
+    def setUp(self):
+        from api.services import sampling
+
+        sampling.reset_pool()
+        self.books = make_catalog(n_books=60, reviews_per_book=0)
+
+    def tearDown(self):
+        from api.services import sampling
+
+        sampling.reset_pool()
+
+    def test_picks_are_deterministic_distinct_and_respect_exclusion(self):
+        from api.services import sampling
+
+        exclude = {b.id for b in self.books[::3]}
+        first = sampling.sample_book_ids(8, sampling.seed_from(1, 'n'), exclude=exclude)
+        self.assertEqual(first, sampling.sample_book_ids(8, sampling.seed_from(1, 'n'), exclude=exclude))
+        self.assertNotEqual(first, sampling.sample_book_ids(8, sampling.seed_from(1, 'm'), exclude=exclude))
+        self.assertEqual(len(set(first)), 8)
+        self.assertFalse(set(first) & exclude)
+
+        self.assertCountEqual(sampling.sample_book_ids(80, 7), [b.id for b in self.books])
+        self.assertEqual(sampling.sample_book_ids(5, 7, exclude={b.id for b in self.books}), [])
+
+    def test_large_pool_draws_without_scanning(self):
+        from api.services import sampling
+
+        ids = np.arange(1, 2_000_001, dtype=np.int64)
+        started = time.perf_counter()
+        picked = sampling.pick(ids, 8, 42, exclude={1, 2, 3})
+        # A full pass over 2M ids in Python takes ~100 ms; a sparse draw well under 10 ms.
+        self.assertLess(time.perf_counter() - started, 0.02)
+        self.assertEqual(len(set(picked)), 8)
+
+    def test_pool_is_cached_between_requests(self):
+        from api.services import sampling
+
+        sampling.pool()
+        with self.assertNumQueries(0):
+            sampling.sample_book_ids(8, 1)
+        with override_settings(SAMPLE_POOL_REFRESH_SECONDS=0), self.assertNumQueries(1):
+            sampling.sample_book_ids(8, 1)
+
+    @override_settings(OPENAI_API_KEY=None, GMS_KEY=None)
+    def test_recommend_fallback_uses_pool(self):
+        client = APIClient()
+        user = User.objects.get(username='reader')
+        user.favorites.add(*self.books[:30])
+        client.force_authenticate(user)
+        first = [b['id'] for b in client.get('/api/recommendations/me/', {'nonce': 'x'}).json()]
+        again = [b['id'] for b in client.get('/api/recommendations/me/', {'nonce': 'x'}).json()]
+        self.assertEqual(first, again)
+        self.assertEqual(len(first), 8)
+        self.assertFalse(set(first) & {b.id for b in self.books[:30]})
+
+
+class FakeAsyncChatClient:
+    """AsyncOpenAI double; tracks concurrent in-flight completions."""
+
+    in_flight = 0
+    max_in_flight = 0
+    calls = 0
+    delay = 0.0
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.chat = mock.Mock()
+        self.chat.completions.create = self._create
+
+    async def _create(self, **kwargs):
+        import asyncio
+
+        cls = FakeAsyncChatClient
+        cls.calls += 1
+        cls.in_flight += 1
+        cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            await asyncio.sleep(cls.delay)
+        finally:
+            cls.in_flight -= 1
+        return mock.Mock(choices=[mock.Mock(message=mock.Mock(content=self.answer))])
+
+    async def close(self):
+        pass
+
+
+@override_settings(OPENAI_API_KEY='sk-test', GMS_KEY=None, OPENAI_BASE_URL=None, AI_SEARCH_DEFAULT_MODE='keyword')
+class AsyncAIEndpointTest(TestCase):
+    def setUp(self):
+        from rest_framework.authtoken.models import Token
+
+        self.books = make_catalog(n_books=20, reviews_per_book=0)
+        self.user = User.objects.get(username='reader')
+        self.user.favorites.add(self.books[3])
+        self.token = Token.objects.create(user=self.user)
+        FakeAsyncChatClient.calls = FakeAsyncChatClient.in_flight = FakeAsyncChatClient.max_in_flight = 0
+        FakeAsyncChatClient.delay = 0.0
+        self.answer = '1. 도서 3\n2. 도서 5\n3. 작가7'
+        self.patches = [
+            mock.patch('openai.AsyncOpenAI', lambda **kw: FakeAsyncChatClient(self.answer)),
+            mock.patch('openai.OpenAI', lambda **kw: FakeChatClient(self.answer)),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    async def test_async_endpoints_match_sync_responses(self):
+        from django.test import AsyncClient
+
+        aclient = AsyncClient()
+        auth = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+        for sync_url, async_url, params in (
+            ('/api/books/ai-search/', '/api/books/ai-search/async/', {'prompt': '추천', 'nonce': 'a'}),
+            ('/api/recommendations/me/', '/api/recommendations/me/async/', {'nonce': 'a'}),
+        ):
+            headers = {'Authorization': f'Token {self.token.key}'}
+            fresh = await aclient.get(async_url, params, headers=headers)
+            cached = await aclient.get(async_url, params, headers=headers)
+            sync = await sync_to_async_call(APIClient().get, sync_url, params, **auth)
+            self.assertEqual(fresh.status_code, 200)
+            self.assertEqual(fresh.content, sync.content)
+            self.assertEqual(cached.content, sync.content)
+        # one LLM round trip per endpoint; repeats come from the LLM cache
+        self.assertEqual(FakeAsyncChatClient.calls, 2)
+        rec = json.loads(fresh.content)
+        self.assertNotIn(self.books[3].id, [b['id'] for b in rec])
+
+        anon = await aclient.get('/api/recommendations/me/async/')
+        self.assertEqual(anon.status_code, 401)
+
+    async def test_many_in_flight_requests_share_one_loop_within_limit(self):
+        import asyncio
+        from django.test import AsyncClient
+
+        FakeAsyncChatClient.delay = 0.3
+        aclient = AsyncClient()
+        started = time.monotonic()
+        with override_settings(AI_MAX_CONCURRENCY=30):
+            responses = await asyncio.gather(*[
+                aclient.get('/api/books/ai-search/async/', {'prompt': f'질문 {i}'}) for i in range(60)
+            ])
+        elapsed = time.monotonic() - started
+        self.assertTrue(all(r.status_code == 200 for r in responses))
+        self.assertEqual(FakeAsyncChatClient.calls, 60)
+        self.assertEqual(FakeAsyncChatClient.max_in_flight, 30)
+        # 60 calls × 0.3 s sequentially would be 18 s; two waves of 30 take ~0.6 s.
+        self.assertLess(elapsed, 6)
+
+
+@override_settings(OPENAI_API_KEY='sk-test', GMS_KEY=None, OPENAI_BASE_URL=None, OPENAI_MODEL='test-model')
+class ClientRegistryTest(TestCase):
+    def setUp(self):
+        clients.reset()
+        self.built = []
+
+        def factory(cls):
+            def build(**kwargs):
+                client = cls('1. 도서 1')
+                self.built.append((client, kwargs))
+                return client
+            return build
+
+        self.patches = [
+            mock.patch('openai.OpenAI', factory(FakeChatClient)),
+            mock.patch('openai.AsyncOpenAI', factory(FakeAsyncChatClient)),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        clients.reset()
+
+    def test_sync_client_is_shared_across_calls_and_threads(self):
+        from api.services import ai
+
+        config = ai.openai_config()
+        seen = []
+        threads = [threading.Thread(target=lambda: seen.append(clients.openai_client(config))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        ai.complete(config, 'a', 10)
+        ai.complete(config, 'b', 10)
+        self.assertEqual(len(self.built), 1)
+        self.assertTrue(all(c is self.built[0][0] for c in seen))
+        self.assertEqual(self.built[0][1]['api_key'], 'sk-test')
+
+        with override_settings(GMS_KEY='gms-key', OPENAI_API_KEY=None):
+            config = clients.openai_config()
+            self.assertEqual(config.base_url, clients.DEFAULT_GMS_BASE_URL)
+            clients.openai_client(config)
+        self.assertEqual(len(self.built), 2)
+        self.assertEqual(self.built[1][1]['base_url'], clients.DEFAULT_GMS_BASE_URL)
+
+    def test_defined_settings_win_over_the_environment(self):
+        from django.conf import settings
+
+        env = {'OPENAI_API_KEY': 'sk-env', 'GMS_KEY': 'gms-env', 'OPENAI_BASE_URL': 'https://env.example'}
+        with mock.patch.dict(os.environ, env):
+            # None in settings means "not configured", not "ask the environment"
+            with override_settings(OPENAI_API_KEY=None, GMS_KEY=None, OPENAI_BASE_URL=None):
+                config = clients.openai_config()
+                self.assertEqual((config.api_key, config.base_url), (None, None))
+            # a setting that is not defined at all falls back to the environment
+            with override_settings():
+                del settings.OPENAI_BASE_URL
+                self.assertEqual(clients.openai_config().base_url, 'https://env.example')
+
+    def test_async_client_is_shared_within_a_loop_only(self):
+        import asyncio
+
+        from api.services import ai
+
+        config = ai.openai_config()
+
+        async def run():
+            await asyncio.gather(*[ai.acomplete(config, f'q{i}', 10) for i in range(5)])
+            return clients.async_openai_client(config)
+
+        first = asyncio.run(run())
+        second = asyncio.run(run())
+        self.assertIsNot(first, second)
+        self.assertEqual(len(self.built), 2)
+
+    def test_upstage_and_http_sessions_are_reused(self):
+        from api.utils import get_upstage_embeddings
+
+        self.patches[0].stop()
+        try:
+            with FakeEmbeddingServer() as server:
+                self.assertIs(clients.upstage_client(), clients.upstage_client())
+                self.assertIsNot(clients.upstage_client(max_retries=0), clients.upstage_client())
+                get_upstage_embeddings(['a'])
+                get_upstage_embeddings(['bb'])
+        finally:
+            self.patches[0].start()
+        self.assertEqual(len(server.requests), 2)
+        self.assertIs(clients.aladin_session(), clients.aladin_session())
+        self.assertIs(clients.wikipedia_session(), clients.wikipedia_session())
+        with override_settings(ALADIN_MAX_PARALLEL=9):
+            self.assertEqual(clients.aladin_session().get_adapter('https://x')._pool_maxsize, 9)
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        from api.services import response_cache
+
+        cache.clear()
+        response_cache.reset_local()
+        self.client = APIClient()
+        self.books = make_catalog(n_books=6, reviews_per_book=1)
+        self.book = self.books[0]
+        self.book.similar_books.set(self.books[1:3])
+        self.user = User.objects.get(username='reader')
+
+    def _etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+        return response['ETag']
+
+    def test_detail_revalidates_without_serializing(self):
+        url = f'/api/books/{self.book.id}/'
+        tag = self._etag(url)
+        with self.assertNumQueries(1):  # the version aggregate only
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=tag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], tag)
+        self.assertEqual(self.client.get('/api/books/999999/', HTTP_IF_NONE_MATCH=tag).status_code, 404)
+
+        similar_url = f'/api/books/{self.book.id}/similar/'
+        similar_tag = self._etag(similar_url)
+        self.assertEqual(self.client.get(similar_url, HTTP_IF_NONE_MATCH=similar_tag).status_code, 304)
+
+    def test_detail_etag_follows_embedded_data(self):
+        url = f'/api/books/{self.book.id}/'
+        seen = {self._etag(url)}
+
+        def changed():
+            tag = self._etag(url)
+            self.assertNotIn(tag, seen)
+            seen.add(tag)
+
+        Review.objects.create(book=self.book, user=self.user, content='새 리뷰')
+        changed()
+        similar = self.books[1]
+        similar.title = '바뀐 제목'
+        similar.save()
+        changed()
+        self.book.similar_books.add(self.books[3])
+        changed()
+        Author.objects.filter(id=self.book.author_id).get().save()
+        changed()
+        self.user.nickname = '새 닉네임'
+        self.user.save()
+        changed()
+        # unrelated books and fields that are not shown leave it alone
+        unrelated = self.books[5]
+        unrelated.title = '상관없음'
+        unrelated.save()
+        self.user.save(update_fields=['last_login'])
+        self.assertIn(self._etag(url), seen)
+
+    def test_detail_etag_follows_writes_that_skip_updated_at(self):
+        url = f'/api/books/{self.book.id}/'
+        seen = {self._etag(url)}
+        Book.objects.filter(id=self.book.id).update(global_recommend_count=F('global_recommend_count') + 1)
+        seen.add(self._etag(url))
+        self.assertEqual(len(seen), 2)
+        # a rebuilt similar list of the same size written through the table
+        through = Book.similar_books.through
+        through.objects.filter(from_book_id=self.book.id, to_book_id=self.books[2].id).update(
+            to_book_id=self.books[4].id)
+        seen.add(self._etag(url))
+        self.assertEqual(len(seen), 3)
+
+    def test_revalidation_is_not_a_view(self):
+        from api.services import popularity
+
+        url = f'/api/books/{self.book.id}/'
+        popularity.reset()
+        with self.captureOnCommitCallbacks(execute=True):
+            tag = self._etag(url)
+        self.assertEqual(popularity.pending(), {self.book.id: 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=tag).status_code, 304)
+        self.assertEqual(popularity.pending(), {self.book.id: 1})
+        popularity.reset()
+
+    def test_collections_revalidate_on_catalog_version(self):
+        from api.services import response_cache
+
+        urls = ['/api/books/best-sellers/', '/api/books/top-recommended/', '/api/books/age-based/?age=45',
+                '/api/categories/', '/api/genres/']
+        tags = [self._etag(u) for u in urls]
+        with self.assertNumQueries(0):
+            for url, tag in zip(urls, tags):
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=tag).status_code, 304)
+        response_cache.bump_catalog_version()
+        for url, tag in zip(urls, tags):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=tag).status_code, 200)
+
+    def test_stale_payload_is_not_tagged_as_current(self):
+        from django.core.cache import cache
+
+        from api.services import response_cache
+
+        url = '/api/books/top-recommended/'
+        old = self.client.get(url)
+        response_cache.bump_catalog_version()
+        response_cache.reset_local()
+        version = response_cache.catalog_version()
+        # another worker is recomputing the new version
+        cache.add(f'{response_cache.PREFIX}:top_recommended::{version}:lock', 1)
+        stale = self.client.get(url)
+        self.assertEqual(stale.json(), old.json())
+        self.assertEqual(stale['ETag'], old['ETag'])
+        self.assertNotIn('Last-Modified', stale)
+        cache.delete(f'{response_cache.PREFIX}:top_recommended::{version}:lock')
+        # once the lock is gone the client holding the old tag gets the new version
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=stale['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh['ETag'], stale['ETag'])
+        self.assertIn('Last-Modified', fresh)
+
+
+def sync_to_async_call(fn, *args, **kwargs):
+    from asgiref.sync import sync_to_async
+
+    return sync_to_async(fn)(*args, **kwargs)
@@ -8,6 +8,7 @@ from .views import (
     ReviewViewSet
 )
 from .views import recommend_by_profile
+from . import async_views
 # music react endpoint removed
 
 router = DefaultRouter()
@@ -18,6 +19,9 @@ router.register(r'genres',      GenreViewSet)
 router.register(r'reviews',     ReviewViewSet)
 
 urlpatterns = [
+    # ASGI 비동기 버전 (LLM 호출 동안 워커 스레드를 점유하지 않음)
+    path('books/ai-search/async/', async_views.ai_search, name='ai_search_async'),
     path('', include(router.urls)),
     path('recommendations/me/', recommend_by_profile, name='recommend_by_profile'),
+    path('recommendations/me/async/', async_views.recommend_by_profile, name='recommend_by_profile_async'),
 ]
\ No newline at end of file
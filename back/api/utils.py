@@ -1,22 +1,12 @@
-import os
+UPSTAGE_EMBEDDING_MODEL = "embedding-query"
 
 
-def _get_upstage_client():
-    try:
-        from openai import OpenAI
-    except ModuleNotFoundError as exc:
-        raise ModuleNotFoundError(
-            "Missing optional dependency 'openai'. Install it to enable embeddings: pip install openai"
-        ) from exc
+def _get_upstage_client(**client_kwargs):
+    # 프로세스 공용 클라이언트(커넥션 재사용) — api.services.clients 참고
+    from api.services.clients import upstage_client
 
-    api_key = os.getenv("UPSTAGE_API_KEY")
-    if not api_key:
-        raise RuntimeError("UPSTAGE_API_KEY is not set; cannot create Upstage embedding client")
+    return upstage_client(**client_kwargs)
 
-    return OpenAI(
-        api_key=api_key,
-        base_url="https://api.upstage.ai/v1",
-    )
 
 def get_upstage_embedding(text: str) -> list[float]:
     """
@@ -31,7 +21,42 @@ def get_upstage_embedding(text: str) -> list[float]:
     client = _get_upstage_client()
     response = client.embeddings.create(
         input=text,
-        model="embedding-query"
+        model=UPSTAGE_EMBEDDING_MODEL
     )
     # 응답 데이터 구조: {'data': [{'embedding': [...]}], ...}
     return response.data[0].embedding
+
+
+async def aget_upstage_embedding(text: str) -> list[float]:
+    """`get_upstage_embedding`의 비동기 버전 (`AsyncOpenAI`, 워커 스레드를 점유하지 않음)."""
+    from api.services.clients import async_upstage_client
+
+    response = await async_upstage_client().embeddings.create(
+        input=text,
+        model=UPSTAGE_EMBEDDING_MODEL
+    )
+    return response.data[0].embedding
+
+
+def get_upstage_embeddings(texts: list[str], client=None) -> list[list[float]]:
+    """
+    여러 텍스트를 한 번의 요청으로 임베딩합니다.
+
+    Args:
+        texts (list[str]): 임베딩할 문자열 목록.
+        client: 사용할 클라이언트 (없으면 프로세스 공용 클라이언트).
+
+    Returns:
+        list[list[float]]: 입력 순서와 같은 순서의 임베딩 벡터 목록.
+    """
+    if not texts:
+        return []
+    client = client or _get_upstage_client()
+    response = client.embeddings.create(
+        input=list(texts),
+        model=UPSTAGE_EMBEDDING_MODEL,
+        encoding_format="float",
+    )
+    # 응답의 data는 index로 입력 순서를 알려준다 (순서 보장 X).
+    ordered = sorted(response.data, key=lambda d: d.index)
+    return [d.embedding for d in ordered]
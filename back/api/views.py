@@ -1,34 +1,243 @@
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from rest_framework import viewsets, permissions, filters, status
+from rest_framework.exceptions import ValidationError
+from rest_framework import viewsets, permissions, status
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.db.models import Count, Q, Value
+from django.http import Http404
 
+from .filters import BookSearchFilter
 from .models import Book, Author, Category, Genre, Review
+from . import conditional, fast_serializers, streaming
+from .pagination import BookKeysetPagination
 from .serializers import (
     BookSerializer,
-    SimilarBookSerializer,
+    BookListSerializer,
+    book_card_queryset,
     AuthorSerializer,
     CategorySerializer,
-    SimpleCategorySerializer,
     GenreSerializer,
-    SimpleGenreSerializer,
     ReviewSerializer,
 )
 from django.conf import settings
+from api.services import (
+    ai, book_versions, co_reading, popularity, response_cache, sampling, search_index, semantic_search,
+    user_recommendations,
+)
 import re
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
-import hashlib
-import random
 
 
-def _looks_like_openai_key(value: str | None) -> bool:
-    if not value:
-        return False
-    # Common OpenAI key prefixes
-    return value.startswith('sk-')
+def _keyword_book_ids(terms, limit=40, name_terms=None):
+    """Ranked ids of books matching any of `terms`.
+
+    FTS5 hits over title/author/publisher/description come first (BM25 blended with
+    popularity), then books whose genre/category name contains one of `name_terms`
+    (default: `terms`), by popularity.
+    """
+    ids = search_index.search_ids(terms, limit=limit)
+    if limit is not None and len(ids) >= limit:
+        return ids
+
+    name_q = Q()
+    for t in (terms if name_terms is None else name_terms):
+        name_q |= Q(name__icontains=t)
+    genre_ids = list(Genre.objects.filter(name_q).values_list('id', flat=True))
+    category_ids = list(Category.objects.filter(name_q).values_list('id', flat=True))
+    if genre_ids or category_ids:
+        extra = Book.objects.filter(Q(genre_id__in=genre_ids) | Q(category_id__in=category_ids))\
+                            .exclude(id__in=ids)\
+                            .order_by('-global_recommend_count', 'id')\
+                            .values_list('id', flat=True)
+        if limit is not None:
+            extra = extra[:limit - len(ids)]
+        ids.extend(extra)
+    return ids
+
+
+def _match_candidate_titles(candidates, exclude_ids=()):
+    """Book ids for LLM-suggested titles, in suggestion order.
+
+    Per candidate: the first 3 books (by id) whose title contains it, or — when no
+    title matches — the first 3 whose author name does; already excluded or
+    picked ids are skipped. Both probes of every candidate are `LIMIT 3`
+    subqueries joined by one `UNION ALL` (SQLite allows no LIMIT directly in a
+    compound part), so the query returns at most 6 rows per candidate.
+    """
+    unique = list(dict.fromkeys(candidates))
+    if not unique:
+        return []
+    probes = [
+        Book.objects.filter(id__in=Book.objects.filter(**{lookup: cand}).order_by('id').values('id')[:3])
+            .order_by().annotate(cand=Value(i), by_title=Value(lookup == 'title__icontains'))
+            .values_list('cand', 'by_title', 'id')
+        for i, cand in enumerate(unique)
+        for lookup in ('title__icontains', 'author__name__icontains')
+    ]
+    matches = {}
+    for i, by_title, book_id in probes[0].union(*probes[1:], all=True):
+        matches.setdefault((unique[i], bool(by_title)), []).append(book_id)
+
+    found_ids = []
+    seen_ids = set(exclude_ids)
+    for cand in candidates:
+        picked = sorted(matches.get((cand, True)) or matches.get((cand, False)) or [])
+        for book_id in picked:
+            if book_id in seen_ids:
+                continue
+            seen_ids.add(book_id)
+            found_ids.append(book_id)
+    return found_ids
+
+
+def _int_param(params, name, default=None, lo=None, hi=None):
+    raw = params.get(name)
+    if raw in (None, ''):
+        return default
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        raise ValidationError({name: '정수여야 합니다.'})
+    if lo is not None:
+        value = max(lo, value)
+    if hi is not None:
+        value = min(hi, value)
+    return value
+
+
+def _keyword_q(terms, name_terms=None):
+    """`icontains` equivalent of `_keyword_book_ids` for databases without FTS5."""
+    q = Q()
+    for t in terms:
+        q |= Q(title__icontains=t) | Q(author__name__icontains=t)
+    for t in (terms if name_terms is None else name_terms):
+        q |= Q(genre__name__icontains=t) | Q(category__name__icontains=t)
+    return q
+
+
+# ── AI 검색 / 추천: DB 단계 (sync 뷰와 api.async_views가 함께 사용) ─────────────
+def _cards(ids):
+    return fast_serializers.cards_by_ids(ids)
+
+
+def _semantic_params(params):
+    """(page_size, category, genre) of a semantic search; ValidationError (400) on bad values."""
+    return (_int_param(params, 'page_size', default=40, lo=1, hi=100),
+            _int_param(params, 'category'), _int_param(params, 'genre'))
+
+
+def _semantic_search_data(params, prompt_in, nonce, vector=None):
+    """Semantic-mode result, or None when the keyword path should answer instead.
+
+    `vector` is the prompt's embedding when the caller already has it (async view).
+    Only the vector index is searched (no per-request scan of every embedding).
+    """
+    page_size, category, genre = _semantic_params(params)
+    # With a nonce, sample among the best 5 pages (at most 1000) and keep their rank order.
+    k = min(1000, page_size * 5) if nonce else page_size
+    try:
+        if vector is None:
+            ids = semantic_search.search_book_ids(prompt_in, k=k, category=category, genre=genre, scan=False)
+        else:
+            ids = semantic_search.nearest_book_ids(vector, k=k, category=category, genre=genre, scan=False)
+    except Exception:
+        # Embedding API down / misconfigured: keep answering via the keyword path.
+        return None
+    if ids is None:
+        return None  # no usable index
+    if nonce and len(ids) > page_size:
+        rank = {book_id: r for r, book_id in enumerate(ids)}
+        ids = sorted(sampling.pick(ids, page_size, sampling.seed_from('ai-semantic', prompt_in, nonce)),
+                     key=rank.__getitem__)
+    # No vectors at all (e.g. embeddings not generated yet) → keyword path too,
+    # unless a filter legitimately narrowed the result to nothing.
+    if ids or category is not None or genre is not None:
+        return _cards(ids)
+    return None
+
+
+def _ai_search_fallback_data(prompt_in, nonce):
+    """Plain keyword search over DB (FTS index, genre/category names)."""
+    tokens = [t for t in re.split(r"\s+", prompt_in) if t]
+    # the whole prompt, plus token queries to widen matches; only the whole
+    # prompt is matched against genre/category names (a lone "소설" token would
+    # otherwise pull in the whole genre)
+    terms = [prompt_in] + tokens[:6]
+
+    if search_index.available():
+        # With a nonce, shuffle among the best 1000 matches rather than all of them.
+        ids = _keyword_book_ids(terms, limit=1000 if nonce else 40, name_terms=[prompt_in])
+    else:
+        qs = book_card_queryset().filter(_keyword_q(terms, name_terms=[prompt_in])).distinct()
+        ids = list(qs.order_by('-global_recommend_count', 'id').values_list('id', flat=True)[:1000 if nonce else 40])
+    if not ids:
+        return []
+
+    if nonce:
+        # Deterministic shuffle per (prompt, nonce) without using user data.
+        ids = sampling.pick(ids, 40, sampling.seed_from('ai-search', prompt_in, nonce))
+    return _cards(ids)
+
+
+def _ai_search_terms_data(terms, prompt_in, nonce):
+    # Convert terms to DB query (relevance-ranked when the FTS index is available).
+    # The terms are cached per prompt; a nonce shuffles among the best 1000 matches.
+    limit = 1000 if nonce else 40
+    if search_index.available():
+        ids = _keyword_book_ids(terms, limit=limit)
+    else:
+        qs = Book.objects.filter(_keyword_q(terms)).distinct()
+        ids = list(qs.order_by('-global_recommend_count', 'id').values_list('id', flat=True)[:limit])
+    if nonce and ids:
+        ids = sampling.pick(ids, 40, sampling.seed_from('ai-search-terms', prompt_in, nonce))
+    return _cards(ids)
+
+
+def _recommend_inputs(user):
+    """Profile, shelf titles and ids to exclude for `user`."""
+    fav_qs = user.favorites.all()
+    read_qs = user.read_books.all()
+    return {
+        'exclude_ids': set(fav_qs.values_list('id', flat=True)) | set(read_qs.values_list('id', flat=True)),
+        'fav_titles': list(fav_qs.values_list('title', flat=True))[:10],
+        'read_titles': list(read_qs.values_list('title', flat=True))[:20],
+        'profile': {
+            'occupation': getattr(user, 'occupation', '') or '',
+            'gender': getattr(user, 'gender', '') or '',
+            'interests': getattr(user, 'interests', '') or '',
+        },
+    }
+
+
+def _recommend_fallback_data(user_id, exclude_ids, nonce):
+    """Safe list when OpenAI is unavailable or nothing matched."""
+    # If a nonce is provided, return a shuffled sample so "다시 추천" yields different results.
+    # Picks come from a cached id pool: no scan of the catalog per click.
+    if nonce:
+        picked_ids = sampling.sample_book_ids(8, sampling.seed_from(user_id, nonce), exclude=exclude_ids)
+        return _cards(picked_ids) if picked_ids else []
+
+    qs = fast_serializers.card_values(Book.objects.exclude(id__in=exclude_ids))
+    return fast_serializers.cards(qs.order_by('-global_recommend_count', 'id')[:8])
+
+
+def _stored_recommend_data(params, user_id, nonce):
+    """Precomputed embedding recommendations, or None when the LLM path should answer."""
+    mode = params.get('mode') or getattr(settings, 'RECOMMEND_DEFAULT_MODE', 'embedding')
+    if mode != 'embedding':
+        return None
+    ids = user_recommendations.pick(user_id, nonce)
+    return _cards(ids) if ids else None
+
+
+def _recommend_found_data(candidates, user_id, exclude_ids, nonce):
+    # Match candidates to books in DB (one query for all candidates).
+    # Start with excluded IDs so we never recommend already-favorited/read books.
+    found_ids = _match_candidate_titles(candidates, exclude_ids)
+    found = _cards(found_ids) if found_ids else []
+    return found or _recommend_fallback_data(user_id, exclude_ids, nonce)
 
 # ────────────────────────────────────────────────────────────────────────────────
 #                       도서 CRUD + 추천 도서 endpoint
@@ -38,26 +247,69 @@ class BookViewSet(viewsets.ModelViewSet):
     도서 CRUD (읽기: 모두, 쓰기/수정/삭제: 인증 사용자)
     retrieve 시에는 nested로 추천 도서(similar_books) 정보 포함
     추가로 /api/books/{pk}/similar/ 로 추천 도서 4권만 반환
+    목록/추천 계열 action은 리뷰 없는 카드(BookListSerializer)로 응답
     """
     queryset = Book.objects.select_related('author', 'category', 'genre')\
                            .prefetch_related('similar_books')\
                            .all()
     serializer_class = BookSerializer
+    pagination_class = BookKeysetPagination
 
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, BookSearchFilter]
     filterset_fields = ['category', 'genre']
     search_fields = ['title', 'author__name']
 
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return BookListSerializer
+        return BookSerializer
+
     def get_permissions(self):
-        if self.action in ['list', 'retrieve', 'similar', 'best_sellers', 'top_recommended', 'age_based', 'ai_search']:
+        if self.action in ['list', 'retrieve', 'similar', 'also_read', 'best_sellers', 'top_recommended', 'age_based', 'ai_search']:
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
 
+    def list(self, request, *args, **kwargs):
+        # Read-only cards straight from values() rows (api.fast_serializers)
+        rows = fast_serializers.card_values(self.filter_queryset(Book.objects.all()))
+        if streaming.wants_stream(request):
+            # ?stream=1: every matching card in page order, without pagination
+            return streaming.response(request, streaming.iter_array(
+                self.paginator.order_queryset(rows, request), fast_serializers.cards,
+            ))
+        page = self.paginate_queryset(rows)
+        return self.get_paginated_response(fast_serializers.cards(page))
+
+    def _detail_version(self):
+        pk = self.kwargs[self.lookup_field]
+        version = book_versions.detail_version(int(pk)) if str(pk).isdigit() else None
+        if version is None:
+            raise Http404
+        return int(pk), version
+
+    def retrieve(self, request, *args, **kwargs):
+        # 304 is decided from one aggregate query, before anything is serialized.
+        pk, (modified, parts) = self._detail_version()
+
+        def build():
+            data = fast_serializers.book_detail(pk, request)
+            if data is None:
+                raise Http404
+            return data
+
+        response = conditional.respond(request, conditional.etag('book', pk, modified, *parts), modified, build)
+        if response.status_code == status.HTTP_200_OK:
+            popularity.record('view', pk)  # a 304 revalidation is not a new view
+        return response
+
     @action(detail=False, methods=['get'], permission_classes=[AllowAny], url_path='ai-search')
     def ai_search(self, request):
         """AI prompt 기반으로 DB 책 검색.
 
-        GET /api/books/ai-search/?prompt=...&nonce=...
+        GET /api/books/ai-search/?prompt=...&nonce=...&mode=semantic|keyword
+        - semantic: 프롬프트 임베딩과 가장 가까운 도서 (category, genre, page_size 지원)
+        - keyword: LLM이 뽑은 키워드로 검색
+        mode 기본값은 settings.AI_SEARCH_DEFAULT_MODE. semantic을 쓸 수 없으면(임베딩 키나 벡터 인덱스 없음) keyword로 동작.
         Returns: list[Book]
         """
         prompt_in = str(request.query_params.get('prompt') or '').strip()
@@ -65,137 +317,54 @@ class BookViewSet(viewsets.ModelViewSet):
             return Response([], status=status.HTTP_200_OK)
 
         nonce = request.query_params.get('nonce')
-        base_qs = Book.objects.select_related('author', 'category', 'genre').all()
-
-        # Fallback: plain keyword search over DB (title/author/genre/category)
-        def _fallback_list():
-            tokens = [t for t in re.split(r"\s+", prompt_in) if t]
-            q = (
-                Q(title__icontains=prompt_in)
-                | Q(author__name__icontains=prompt_in)
-                | Q(genre__name__icontains=prompt_in)
-                | Q(category__name__icontains=prompt_in)
-            )
-            # also OR token queries to widen matches
-            for t in tokens[:6]:
-                q |= Q(title__icontains=t) | Q(author__name__icontains=t)
-
-            qs = base_qs.filter(q)
-            if nonce:
-                ids = list(qs.values_list('id', flat=True))
-                if not ids:
-                    return []
-                # Deterministic shuffle per (prompt, nonce) without using user data.
-                seed_src = f"ai-search:{prompt_in}:{nonce}".encode('utf-8')
-                seed = int(hashlib.sha256(seed_src).hexdigest()[:16], 16)
-                rng = random.Random(seed)
-                pick_count = min(40, len(ids))
-                picked_ids = rng.sample(ids, pick_count)
-                books_map = base_qs.in_bulk(picked_ids)
-                picked = [books_map.get(i) for i in picked_ids if books_map.get(i) is not None]
-                return BookSerializer(picked, many=True, context={'request': request}).data
-
-            qs = qs.order_by('-global_recommend_count', 'id')[:40]
-            return BookSerializer(qs, many=True, context={'request': request}).data
-
-        model = getattr(settings, 'OPENAI_MODEL', None) or 'gpt-5-mini'
-        openai_api_key = getattr(settings, 'OPENAI_API_KEY', None)
-        gms_key = getattr(settings, 'GMS_KEY', None)
-        base_url = getattr(settings, 'OPENAI_BASE_URL', None)
-
-        DEFAULT_GMS_BASE_URL = 'https://gms.ssafy.io/gmsapi/api.openai.com/v1'
-
-        if not base_url:
-            if gms_key:
-                base_url = DEFAULT_GMS_BASE_URL
-            elif openai_api_key and not _looks_like_openai_key(openai_api_key):
-                base_url = DEFAULT_GMS_BASE_URL
-
-        if base_url == DEFAULT_GMS_BASE_URL:
-            api_key = gms_key or openai_api_key
-        else:
-            api_key = openai_api_key or gms_key
-
-        if not api_key:
-            return Response(_fallback_list())
 
-        try:
-            from openai import OpenAI
-        except ModuleNotFoundError:
-            return Response(_fallback_list())
-
-        client = OpenAI(api_key=api_key, base_url=base_url) if base_url else OpenAI(api_key=api_key)
-
-        # Ask model to output search keywords or titles only.
-        # NOTE: Per product decision, do not incorporate user profile/favorites/read history here.
-        ai_prompt = (
-            "You are a helpful assistant that maps a user's natural language book request to search keywords. "
-            "Return up to 10 short keywords or book titles, one per line, and nothing else.\n\n"
-        )
-        if nonce:
-            ai_prompt += f"Nonce: {nonce}\n"
-        ai_prompt += f"User request: {prompt_in}\n"
-
-        try:
-            resp = client.chat.completions.create(
-                model=model,
-                messages=[{'role': 'user', 'content': ai_prompt}],
-                temperature=0.9,
-                max_completion_tokens=200,
-            )
-            text = (resp.choices[0].message.content or '').strip()
-        except Exception:
-            return Response(_fallback_list())
+        mode = request.query_params.get('mode') or getattr(settings, 'AI_SEARCH_DEFAULT_MODE', 'semantic')
+        if mode == 'semantic' and semantic_search.available() and semantic_search.index_ready():
+            data = _semantic_search_data(request.query_params, prompt_in, nonce)
+            if data is not None:
+                return Response(data)
 
-        terms = []
-        for line in text.splitlines():
-            s = line.strip()
-            if not s:
-                continue
-            s = re.sub(r'^[\d\)\.\-\s]+', '', s).strip()
-            if len(s) < 2:
-                continue
-            terms.append(s)
-            if len(terms) >= 10:
-                break
+        config = ai.openai_config()
+        if not config.api_key:
+            return Response(_ai_search_fallback_data(prompt_in, nonce))
 
+        terms = ai.search_terms(config, prompt_in)
         if not terms:
-            return Response(_fallback_list())
-
-        # Convert terms to DB query
-        q = Q()
-        for t in terms:
-            q |= Q(title__icontains=t) | Q(author__name__icontains=t) | Q(genre__name__icontains=t) | Q(category__name__icontains=t)
-
-        qs = base_qs.filter(q).distinct().order_by('-global_recommend_count', 'id')[:40]
-        data = BookSerializer(qs, many=True, context={'request': request}).data
-        return Response(data)
+            return Response(_ai_search_fallback_data(prompt_in, nonce))
+        return Response(_ai_search_terms_data(terms, prompt_in, nonce))
 
     @action(detail=True, methods=['get'], permission_classes=[AllowAny], url_path='similar')
     def similar(self, request, pk=None):
         """
         /api/books/{pk}/similar/ : 추천 도서 4권만 반환
         """
-        book = self.get_object()
-        sims = book.similar_books.all()[:4]
-        serializer = SimilarBookSerializer(sims, many=True, context={'request': request})
-        return Response(serializer.data)
+        pk, (modified, parts) = self._detail_version()
+        return conditional.respond(
+            request, conditional.etag('similar', pk, modified, *parts), modified,
+            lambda: fast_serializers.similar(Book.objects.filter(recommended_for=pk)[:4]),
+        )
+
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny], url_path='also-read')
+    def also_read(self, request, pk=None):
+        """
+        /api/books/{pk}/also-read/ : 이 책을 찜/읽은 사용자들이 함께 찜/읽은 도서 (update_also_read)
+        """
+        # only the 404 check: the viewset queryset carries the heavy card annotations
+        if not str(pk).isdigit() or not Book.objects.filter(pk=pk).exists():
+            raise Http404
+        limit = _int_param(request.query_params, 'limit', default=10, lo=1, hi=50)
+        ids = co_reading.neighbour_ids(int(pk), limit=limit)
+        return Response(fast_serializers.similar_by_ids(ids))
 
     @action(detail=False, methods=['get'], permission_classes=[AllowAny], url_path='best-sellers')
     def best_sellers(self, request):
         """Frontend expects: GET /api/books/best-sellers -> list[Book]."""
-        qs = Book.objects.select_related('author', 'category', 'genre').all()
-        # If category 1 exists, treat it as best-sellers.
-        if qs.filter(category_id=1).exists():
-            qs = qs.filter(category_id=1)
-        qs = qs.order_by('id')[:10]
-        return Response(BookSerializer(qs, many=True, context={'request': request}).data)
+        return _cached_collection(request, 'best_sellers', '', _best_sellers_data)
 
     @action(detail=False, methods=['get'], permission_classes=[AllowAny], url_path='top-recommended')
     def top_recommended(self, request):
         """Frontend expects: GET /api/books/top-recommended -> list[Book]."""
-        qs = Book.objects.select_related('author', 'category', 'genre').order_by('-global_recommend_count', 'id')[:10]
-        return Response(BookSerializer(qs, many=True, context={'request': request}).data)
+        return _cached_collection(request, 'top_recommended', '', _top_recommended_data)
 
     @action(detail=False, methods=['get'], permission_classes=[AllowAny], url_path='age-based')
     def age_based(self, request):
@@ -204,51 +373,111 @@ class BookViewSet(viewsets.ModelViewSet):
             age = int(request.query_params.get('age', '20'))
         except ValueError:
             age = 20
+        # The response depends only on the age band, so cache per band.
+        band = 'young' if age < 20 else 'senior' if age >= 40 else 'adult'
+        return _cached_collection(request, 'age_based', band, lambda: _age_based_data(band))
+
+
+# ── 홈 화면 컬렉션 (사용자와 무관 → api.services.response_cache로 캐시) ──────────
+def _cached_collection(request, name, variant, compute):
+    """Catalog-versioned payload with ETag / Last-Modified (304 from one cache read)."""
+    version, modified = response_cache.catalog_version(), response_cache.catalog_modified()
+    response = conditional.not_modified(request, conditional.etag(name, variant or 'all', version), modified)
+    if response is not None:
+        return response
+    served, data = response_cache.get_or_compute(name, variant, compute)
+    # A previous version's payload (recompute in progress) is tagged as what it is,
+    # without the current Last-Modified, so it is never revalidated as current.
+    return conditional.validated(data, conditional.etag(name, variant or 'all', served),
+                                 modified if served == version else None)
+
+
+def _best_sellers_data():
+    qs = fast_serializers.card_values(Book.objects.all())
+    # If category 1 exists, treat it as best-sellers.
+    if qs.filter(category_id=1).exists():
+        qs = qs.filter(category_id=1)
+    qs = qs.order_by('id')[:10]
+    return fast_serializers.cards(qs)
+
+
+def _top_recommended_data():
+    qs = fast_serializers.card_values(Book.objects.all()).order_by('-global_recommend_count', 'id')[:10]
+    return fast_serializers.cards(qs)
+
+
+def _age_based_data(band):
+    qs = fast_serializers.card_values(Book.objects.all())
+    # Very simple heuristic: younger -> category 2 if present; else fallback to top.
+    if band == 'young' and qs.filter(category_id=2).exists():
+        qs = qs.filter(category_id=2).order_by('id')
+    elif band == 'senior' and qs.filter(category_id=3).exists():
+        qs = qs.filter(category_id=3).order_by('id')
+    else:
+        qs = qs.order_by('-global_recommend_count', 'id')
 
-        qs = Book.objects.select_related('author', 'category', 'genre').all()
-        # Very simple heuristic: younger -> category 2 if present; else fallback to top.
-        if age < 20 and qs.filter(category_id=2).exists():
-            qs = qs.filter(category_id=2).order_by('id')
-        elif age >= 40 and qs.filter(category_id=3).exists():
-            qs = qs.filter(category_id=3).order_by('id')
-        else:
-            qs = qs.order_by('-global_recommend_count', 'id')
-
-        qs = qs[:10]
-        return Response(BookSerializer(qs, many=True, context={'request': request}).data)
+    qs = qs[:10]
+    return fast_serializers.cards(qs)
 
 
 # ────────────────────────────────────────────────────────────────────────────────
 #                       기타 읽기 전용 ViewSet
 # ────────────────────────────────────────────────────────────────────────────────
-class AuthorViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Author.objects.prefetch_related('books').all()
+class BookGroupDetailMixin:
+    """작가/카테고리/장르 상세: 헤더(id, name, book_count) + 도서 카드 keyset 페이지.
+
+    `?cursor=` / `?ordering=` / `?page_size=` 는 `/api/books/` 목록과 같고, 페이지 비용은
+    그룹의 도서 수와 무관하다 (`book_<group>_keyset_idx`).
+    """
+
+    book_field = None  # Book 쪽 FK 이름
+
+    def retrieve(self, request, *args, **kwargs):
+        group = self.get_object()
+        paginator = BookKeysetPagination()
+        rows = fast_serializers.card_values(Book.objects.filter(**{self.book_field: group}))
+        if streaming.wants_stream(request):
+            # ?stream=1: the header and every card of the group, streamed in chunks
+            return streaming.response(request, streaming.iter_object(
+                self.get_serializer(group).data, 'results', streaming.iter_array(
+                    paginator.order_queryset(rows, request), fast_serializers.cards,
+                ),
+            ))
+        page = paginator.get_paginated_response(
+            fast_serializers.cards(paginator.paginate_queryset(rows, request, view=self))
+        ).data
+        data = self.get_serializer(group).data
+        data.update(page)
+        return Response(data)
+
+
+class AuthorViewSet(BookGroupDetailMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Author.objects.annotate(book_count=Count('books')).order_by('id')
     serializer_class = AuthorSerializer
     permission_classes = [AllowAny]
+    book_field = 'author'
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Category.objects.prefetch_related('books').all()
+class CategoryViewSet(BookGroupDetailMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Category.objects.annotate(book_count=Count('books')).order_by('id')
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
+    book_field = 'category'
 
-    def get_serializer_class(self):
-        # List is frequently used by the frontend; keep it lightweight.
-        if self.action == 'list':
-            return SimpleCategorySerializer
-        return CategorySerializer
+    def list(self, request, *args, **kwargs):
+        return _cached_collection(request, 'categories', '', lambda: super(CategoryViewSet, self).list(
+            request, *args, **kwargs).data)
 
 
-class GenreViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Genre.objects.prefetch_related('books').all()
+class GenreViewSet(BookGroupDetailMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Genre.objects.annotate(book_count=Count('books')).order_by('id')
     serializer_class = GenreSerializer
     permission_classes = [AllowAny]
+    book_field = 'genre'
 
-    def get_serializer_class(self):
-        # List is frequently used by the frontend; keep it lightweight.
-        if self.action == 'list':
-            return SimpleGenreSerializer
-        return GenreSerializer
+    def list(self, request, *args, **kwargs):
+        return _cached_collection(request, 'genres', '', lambda: super(GenreViewSet, self).list(
+            request, *args, **kwargs).data)
 
 
 # EmotionTagViewSet removed — emotion tags are no longer used
@@ -337,134 +566,25 @@ def perform_destroy(self, instance):
 @permission_classes([IsAuthenticated])
 def recommend_by_profile(request):
     """
-    Recommend books for the authenticated user using OpenAI.
+    Recommend books for the authenticated user: the precomputed embedding list
+    when one exists (mode=embedding, default), otherwise via OpenAI.
     Returns a list of serialized Book objects found in DB.
     """
     user = request.user
-    # Gather profile info
-    fav_qs = user.favorites.all()
-    read_qs = user.read_books.all()
-    exclude_ids = set(fav_qs.values_list('id', flat=True)) | set(read_qs.values_list('id', flat=True))
-
-    fav_titles = list(fav_qs.values_list('title', flat=True))[:10]
-    read_titles = list(read_qs.values_list('title', flat=True))[:20]
-    occupation = getattr(user, 'occupation', '') or ''
-    gender = getattr(user, 'gender', '') or ''
-    interests = getattr(user, 'interests', '') or ''
-
-    # Build prompt for OpenAI
     nonce = request.query_params.get('nonce')
-    prompt = (
-        "You are a helpful book recommender. Given a user's profile and lists of books they've favorited and read, "
-        "suggest up to 8 book titles that this user would enjoy. Return the recommendations as a numbered list of titles only.\n\n"
-    )
-    if nonce:
-        prompt += f"Nonce: {nonce}\n"
-    prompt += f"Occupation: {occupation}\n"
-    prompt += f"Gender: {gender}\n"
-    prompt += f"Interests: {interests}\n\n"
-    if fav_titles:
-        prompt += "Favorites:\n"
-        for t in fav_titles:
-            prompt += f"- {t}\n"
-    if read_titles:
-        prompt += "\nRead books:\n"
-        for t in read_titles:
-            prompt += f"- {t}\n"
-
-    model = getattr(settings, 'OPENAI_MODEL', None) or 'gpt-5-mini'
-    openai_api_key = getattr(settings, 'OPENAI_API_KEY', None)
-    gms_key = getattr(settings, 'GMS_KEY', None)
-    base_url = getattr(settings, 'OPENAI_BASE_URL', None)
-
-    DEFAULT_GMS_BASE_URL = 'https://gms.ssafy.io/gmsapi/api.openai.com/v1'
-
-    # Decide which base_url to use.
-    # - If OPENAI_BASE_URL is explicitly set, respect it.
-    # - Else if GMS_KEY is set, assume SSAFY GMS proxy.
-    # - Else if the provided OPENAI_API_KEY does NOT look like an OpenAI key, assume it's actually a GMS key.
-    if not base_url:
-        if gms_key:
-            base_url = DEFAULT_GMS_BASE_URL
-        elif openai_api_key and not _looks_like_openai_key(openai_api_key):
-            base_url = DEFAULT_GMS_BASE_URL
-
-    # Decide which key to use for the chosen base_url.
-    if base_url == DEFAULT_GMS_BASE_URL:
-        api_key = gms_key or openai_api_key
-    else:
-        api_key = openai_api_key or gms_key
+    stored = _stored_recommend_data(request.query_params, user.id, nonce)
+    if stored is not None:
+        return Response(stored)
+
+    inputs = _recommend_inputs(user)
 
     # If OpenAI is not configured (common in local/dev), return a safe fallback list
     # so the frontend can keep functioning.
-    def _fallback_list():
-        qs = Book.objects.exclude(id__in=exclude_ids)
-        # If a nonce is provided, return a shuffled sample so "다시 추천" yields different results.
-        if nonce:
-            candidate_ids = list(qs.values_list('id', flat=True))
-            if not candidate_ids:
-                return []
-            seed_src = f"{user.id}:{nonce}".encode('utf-8')
-            seed = int(hashlib.sha256(seed_src).hexdigest()[:16], 16)
-            rng = random.Random(seed)
-            pick_count = min(8, len(candidate_ids))
-            picked_ids = rng.sample(candidate_ids, pick_count)
-            books_map = Book.objects.select_related('author', 'category', 'genre').in_bulk(picked_ids)
-            picked = [books_map.get(i) for i in picked_ids if books_map.get(i) is not None]
-            return BookSerializer(picked, many=True, context={'request': request}).data
-
-        qs = qs.order_by('-global_recommend_count', 'id')[:8]
-        return BookSerializer(qs, many=True, context={'request': request}).data
-
-    if not api_key:
-        return Response(_fallback_list())
-
-    try:
-        from openai import OpenAI
-    except ModuleNotFoundError:
-        return Response(_fallback_list())
-
-    client = OpenAI(api_key=api_key, base_url=base_url) if base_url else OpenAI(api_key=api_key)
-
-    try:
-        resp = client.chat.completions.create(
-            model=model,
-            messages=[{'role': 'user', 'content': prompt}],
-            temperature=0.9,
-            max_completion_tokens=300,
-        )
-        text = (resp.choices[0].message.content or '').strip()
-    except Exception:
-        return Response(_fallback_list())
-
-    # Parse titles from response
-    candidates = []
-    for line in text.splitlines():
-        s = line.strip()
-        if not s:
-            continue
-        s = re.sub(r'^[\d\)\.\-\s]+', '', s).strip()
-        if len(s) < 2:
-            continue
-        candidates.append(s)
-
-    # Match candidates to books in DB
-    found = []
-    # Start with excluded IDs so we never recommend already-favorited/read books.
-    seen_ids = set(exclude_ids)
-    for title in candidates:
-        qs = Book.objects.filter(title__icontains=title)[:3]
-        if not qs.exists():
-            qs = Book.objects.filter(author__name__icontains=title)[:3]
-        for b in qs:
-            if b.id in seen_ids:
-                continue
-            seen_ids.add(b.id)
-            found.append(BookSerializer(b, context={'request': request}).data)
+    config = ai.openai_config()
+    if not config.api_key:
+        return Response(_recommend_fallback_data(user.id, inputs['exclude_ids'], nonce))
 
-    if not found:
-        found = _fallback_list()
+    candidates = ai.recommend_titles(config, inputs['profile'], inputs['fav_titles'], inputs['read_titles'], nonce)
 
     # Frontend expects a plain list response.
-    return Response(found)
-
+    return Response(_recommend_found_data(candidates, user.id, inputs['exclude_ids'], nonce))
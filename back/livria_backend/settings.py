@@ -26,11 +26,88 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 ALADIN_API_KEY    = os.getenv('ALADIN_API_KEY')
 ALADIN_BASE_URL   = os.getenv('ALADIN_BASE_URL')
+# 알라딘 동기화: 동시 요청 수(=커넥션 풀 크기), 요청 타임아웃(초), 5xx/타임아웃 재시도 횟수
+ALADIN_MAX_PARALLEL = int(os.getenv('ALADIN_MAX_PARALLEL', '4'))
+ALADIN_TIMEOUT      = float(os.getenv('ALADIN_TIMEOUT', '10'))
+ALADIN_MAX_RETRIES  = int(os.getenv('ALADIN_MAX_RETRIES', '3'))
+# 알라딘 응답 디스크 캐시: cache(기본, TTL 내 재요청 없음) / replay(녹화된 응답만, 오프라인) / off
+ALADIN_CACHE_MODE = os.getenv('ALADIN_CACHE_MODE', 'cache')
+ALADIN_CACHE_DIR  = Path(os.getenv('ALADIN_CACHE_DIR', BASE_DIR / 'var' / 'aladin_cache'))
+# QueryType별 TTL(초). 목록에 없는 QueryType은 ALADIN_CACHE_DEFAULT_TTL
+ALADIN_CACHE_TTL = {
+    'Bestseller': int(os.getenv('ALADIN_CACHE_TTL_BESTSELLER', str(6 * 3600))),
+    'ItemNewAll': int(os.getenv('ALADIN_CACHE_TTL_NEW', str(12 * 3600))),
+    'BlogBest':   int(os.getenv('ALADIN_CACHE_TTL_BLOGBEST', str(24 * 3600))),
+}
+ALADIN_CACHE_DEFAULT_TTL = int(os.getenv('ALADIN_CACHE_DEFAULT_TTL', '3600'))
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-5-mini')
 OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')
 GMS_KEY = os.getenv('GMS_KEY')
 UPSTAGE_API_KEY = os.getenv('UPSTAGE_API_KEY')
+# 외부 API 공용 클라이언트(api.services.clients): 요청 타임아웃(초)과 keep-alive 커넥션 풀 크기
+OPENAI_TIMEOUT      = float(os.getenv('OPENAI_TIMEOUT', '60'))
+OPENAI_POOL_SIZE    = int(os.getenv('OPENAI_POOL_SIZE', '100'))
+UPSTAGE_TIMEOUT     = float(os.getenv('UPSTAGE_TIMEOUT', '30'))
+UPSTAGE_POOL_SIZE   = int(os.getenv('UPSTAGE_POOL_SIZE', '16'))
+WIKIPEDIA_TIMEOUT   = float(os.getenv('WIKIPEDIA_TIMEOUT', '5'))
+WIKIPEDIA_POOL_SIZE = int(os.getenv('WIKIPEDIA_POOL_SIZE', '8'))
+# 임베딩 일괄 생성 시 초당 최대 요청 수 (0이면 무제한)
+UPSTAGE_EMBED_RPS = float(os.getenv('UPSTAGE_EMBED_RPS', '0'))
+
+# 도서 임베딩 ANN 인덱스 (build_vector_index 로 생성, 워커들이 mmap으로 공유)
+VECTOR_INDEX_DIR = Path(os.getenv('VECTOR_INDEX_DIR', BASE_DIR / 'var' / 'vector_index'))
+VECTOR_INDEX_RELOAD_SECONDS = float(os.getenv('VECTOR_INDEX_RELOAD_SECONDS', '30'))
+
+# 도서 검색(FTS5) 순위: bm25 - WEIGHT * count / (count + HALF)
+BOOK_SEARCH_POPULARITY_WEIGHT = float(os.getenv('BOOK_SEARCH_POPULARITY_WEIGHT', '2.0'))
+BOOK_SEARCH_POPULARITY_HALF   = float(os.getenv('BOOK_SEARCH_POPULARITY_HALF', '10'))
+
+# ai_search 기본 모드: semantic(프롬프트 임베딩 최근접 도서) / keyword(LLM 키워드 + 검색)
+AI_SEARCH_DEFAULT_MODE = os.getenv('AI_SEARCH_DEFAULT_MODE', 'semantic')
+# 비동기 AI 엔드포인트의 프로세스당 동시 LLM 호출 상한 (초과 요청은 대기)
+AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', '200'))
+
+# 개인화 추천 기본 모드: embedding(미리 계산된 취향 벡터 추천, 없으면 LLM) / llm
+RECOMMEND_DEFAULT_MODE = os.getenv('RECOMMEND_DEFAULT_MODE', 'embedding')
+# 취향 벡터 가중치(찜 > 읽음)와 사용자당 저장할 추천 도서 수 (update_user_recommendations)
+RECOMMEND_FAVORITE_WEIGHT = float(os.getenv('RECOMMEND_FAVORITE_WEIGHT', '2.0'))
+RECOMMEND_READ_WEIGHT     = float(os.getenv('RECOMMEND_READ_WEIGHT', '1.0'))
+RECOMMEND_TOP_N           = int(os.getenv('RECOMMEND_TOP_N', '100'))
+
+# "이 책을 읽은 사람들이 함께 읽은 책"(update_also_read): 도서별 저장 이웃 수, 최소 공동 독자 수
+ALSO_READ_TOP_K      = int(os.getenv('ALSO_READ_TOP_K', '20'))
+ALSO_READ_MIN_COMMON = int(os.getenv('ALSO_READ_MIN_COMMON', '1'))
+
+# 홈 화면 컬렉션(best-sellers/top-recommended/age-based, 카테고리·장르 목록) 응답 캐시:
+# 유효 시간(초), 다른 요청이 다시 계산 중일 때 최대 대기 시간(초)
+RESPONSE_CACHE_TTL       = int(os.getenv('RESPONSE_CACHE_TTL', '600'))
+RESPONSE_CACHE_LOCK_WAIT = float(os.getenv('RESPONSE_CACHE_LOCK_WAIT', '5'))
+
+# 인기도(global_recommend_count) 가중치: 찜 추가 / 리뷰 작성 / 상세 조회 1회당 증가량
+POPULARITY_WEIGHTS = {
+    'favorite': int(os.getenv('POPULARITY_WEIGHT_FAVORITE', '3')),
+    'review':   int(os.getenv('POPULARITY_WEIGHT_REVIEW', '2')),
+    'view':     int(os.getenv('POPULARITY_WEIGHT_VIEW', '1')),
+}
+# 프로세스 메모리에 모은 증가분을 DB에 일괄 반영하는 주기(초)와 대기 도서 수 상한
+POPULARITY_FLUSH_SECONDS   = float(os.getenv('POPULARITY_FLUSH_SECONDS', '10'))
+POPULARITY_FLUSH_MAX_BOOKS = int(os.getenv('POPULARITY_FLUSH_MAX_BOOKS', '1000'))
+# 조회수만 반영된 flush가 홈 컬렉션 캐시(카탈로그 버전)를 무효화하는 최소 간격(초)
+POPULARITY_VIEW_BUMP_SECONDS = float(os.getenv('POPULARITY_VIEW_BUMP_SECONDS', '600'))
+
+# ?stream=1 목록 응답(도서 목록, 작가/카테고리/장르 상세): 한 번에 읽고 직렬화하는 행 수
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '500'))
+
+# "다시 추천" 무작위 추출용 전체 도서 ID 풀을 다시 읽는 주기(초)
+SAMPLE_POOL_REFRESH_SECONDS = float(os.getenv('SAMPLE_POOL_REFRESH_SECONDS', '300'))
+
+# LLM 응답 캐시 (파싱된 검색어/도서 제목/작가 정보만 저장): 유효 시간(초), 최대 항목 수(LRU로 정리)
+LLM_CACHE_TTL         = int(os.getenv('LLM_CACHE_TTL', str(24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '10000'))
+# 적중/미스 횟수는 이 조회 수마다 모아서 기록, 최대 항목 수 정리는 이 저장 횟수마다 실행
+LLM_CACHE_COUNT_FLUSH = int(os.getenv('LLM_CACHE_COUNT_FLUSH', '50'))
+LLM_CACHE_EVICT_EVERY = int(os.getenv('LLM_CACHE_EVICT_EVERY', '100'))
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
 
@@ -97,6 +174,23 @@ WSGI_APPLICATION = 'livria_backend.wsgi.application'
 # ASGI application for Channels
 ASGI_APPLICATION = 'livria_backend.asgi.application'
 
+# Django cache: 기본은 var/ 아래 파일 캐시 (같은 서버의 워커·cron 명령이 공유).
+# 서버가 여러 대면 REDIS_URL을 설정해야 응답 캐시 무효화(카탈로그 버전)가 모든 워커에 전달된다.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_DIR', str(BASE_DIR / 'var' / 'cache')),
+        }
+    }
+
 # Channel layers: use in-memory layer by default for development. For production,
 # configure Redis and set CHANNEL_LAYERS accordingly.
 CHANNEL_LAYERS = {
@@ -170,7 +264,8 @@ REST_FRAMEWORK = {
     ],
     # API 서버는 화면(HTML) 렌더링이 아니라 JSON만 반환
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # JSONRenderer와 같은 바이트, orjson이 설치돼 있으면 orjson으로 인코딩
+        'api.renderers.FastJSONRenderer',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
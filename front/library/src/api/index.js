@@ -38,13 +38,15 @@ api.interceptors.response.use(
 export const authAPI = {
   signup: (userData) => api.post('/auth/signup', userData),
   login: (credentials) => api.post('/auth/login', credentials),
-  getMe: () => api.get('/auth/users/me'),
+  getMe: (params) => api.get('/auth/users/me', { params }),
   updateMe: (userData) => api.patch('/auth/users/me', userData)
 }
 
 // 도서 API
 export const bookAPI = {
   getBooks: (params) => api.get('/books/', { params }),
+  // 커서 페이지의 next URL (절대 경로)
+  getPage: (url) => api.get(url),
   getBook: (id) => api.get(`/books/${id}/`),
   getBestSellers: () => api.get('/books/best-sellers/'),
   getTopRecommended: () => api.get('/books/top-recommended/'),
@@ -66,6 +68,7 @@ export const userBookAPI = {
   addFavorite: (bookId) => api.post(`/auth/users/me/favorites/${bookId}`),
   removeFavorite: (bookId) => api.delete(`/auth/users/me/favorites/${bookId}`),
   getFavorites: () => api.get('/auth/me/favorites'),
+  getShelf: (shelf, params) => api.get(`/auth/users/me/shelf/${shelf}`, { params }),
   addReadBook: (bookId) => api.post(`/auth/users/me/read_books/${bookId}`),
   removeReadBook: (bookId) => api.delete(`/auth/users/me/read_books/${bookId}`)
 }
@@ -40,6 +40,26 @@ export const useAuthStore = defineStore('auth', () => {
     return response.data
   }
 
+  // 찜/읽음 ID 목록을 shelf_version 이후 변경분만 받아 갱신
+  async function syncShelves() {
+    const since = user.value?.shelf_version
+    if (since == null || !Array.isArray(user.value?.favorite_ids)) return fetchUser()
+    const { data } = await authAPI.getMe({ since })
+    const apply = (ids, { added, removed }) => {
+      const gone = new Set(removed)
+      const kept = ids.filter(id => !gone.has(id))
+      return kept.concat(added.filter(id => !kept.includes(id)))
+    }
+    const { shelf_changes: changes, ...profile } = data
+    user.value = {
+      ...profile,
+      favorite_ids: apply(user.value.favorite_ids, changes.favorites),
+      read_book_ids: apply(user.value.read_book_ids || [], changes.read_books),
+    }
+    localStorage.setItem('user', JSON.stringify(user.value))
+    return user.value
+  }
+
   async function updateUser(userData) {
     const response = await authAPI.updateMe(userData)
     user.value = response.data
@@ -55,6 +75,7 @@ export const useAuthStore = defineStore('auth', () => {
     signup,
     logout,
     fetchUser,
+    syncShelves,
     updateUser
   }
 })